@@ -0,0 +1,109 @@
+"""Micro-benchmark that compares the dynamic-programming creature selection against the recursive CMC search
+
+Usage: python -m benchmarks.deck_optimizer [--sizes 15 20 25 30] [--seed 7]
+
+The creature lists are generated with random CMC values and win rates, and sorted by win rate like build_deck.
+The high-CMC creatures are given the highest win rates, which is the worst case for the recursive search since
+most of the combinations that start with the top creatures exceed the CMC limit.
+Each selection is timed, and the combined win rate of the selected creatures is reported for both methods.
+"""
+import sys
+import random
+import timeit
+import argparse
+from src import constants
+from src.card_logic import select_cmc_cards
+
+DECK_TYPE_LIMITS = {"Mid": (15, 3.04), "Aggro": (17, 2.40), "Control": (10, 3.68)}
+
+
+def card_cmc_search(deck, offset, starting_cmc, cmc_limit, remaining_count):
+    '''The recursive search that was used by build_deck, kept for comparison'''
+    cards = []
+    unused = []
+    for count, card in enumerate(deck[offset:]):
+        card_cmc = card[constants.DATA_FIELD_CMC]
+
+        if card_cmc + starting_cmc <= cmc_limit:
+            card_cmc += starting_cmc
+            current_offset = offset + count
+            current_remaining = int(max(remaining_count - 1, 0))
+            if current_remaining == 0:
+                cards.append(card)
+                unused.extend(deck[current_offset + 1:])
+                break
+            elif current_offset > (len(deck) - remaining_count):
+                unused.extend(deck[current_offset:])
+                break
+            else:
+                current_offset += 1
+                cards, skipped = card_cmc_search(
+                    deck, current_offset, card_cmc, cmc_limit, current_remaining)
+                if cards:
+                    cards.append(card)
+                    unused.extend(skipped)
+                    break
+                else:
+                    unused.append(card)
+        else:
+            unused.append(card)
+    return cards, unused
+
+
+def create_creatures(card_count, rng):
+    '''Return a list of creatures sorted by win rate, with the highest win rates on the high-CMC creatures'''
+    creatures = []
+    for x in range(card_count):
+        cmc = rng.randint(1, 7)
+        creatures.append({constants.DATA_FIELD_NAME: f"Creature {x}",
+                          constants.DATA_FIELD_CMC: cmc,
+                          "results": [round(rng.uniform(48.0, 56.0) + cmc, 2)]})
+    return sorted(creatures, key=lambda x: x["results"][0], reverse=True)
+
+
+def time_selection(selection, repeat):
+    '''Return the result of the selection and the best time, in milliseconds'''
+    result = selection()
+    selection_time = min(timeit.repeat(selection, number=repeat, repeat=3)) / repeat * 1000
+    return result, selection_time
+
+
+def combined_rating(cards):
+    '''Return the combined win rate of a list of cards'''
+    return round(sum(x["results"][0] for x in cards), 2)
+
+
+def run_benchmark(sizes, seed, repeat):
+    '''Time both selection methods for each creature list size and deck type'''
+    rng = random.Random(seed)
+    results = []
+    for size in sizes:
+        creatures = create_creatures(size, rng)
+        for deck_type, (card_count, cmc_average) in DECK_TYPE_LIMITS.items():
+            cmc_limit = card_count * cmc_average
+            (search_cards, _), search_time = time_selection(
+                lambda: card_cmc_search(creatures, 0, 0, cmc_limit, card_count), repeat)
+            (optimizer_cards, _), optimizer_time = time_selection(
+                lambda: select_cmc_cards(creatures, cmc_limit, card_count), repeat)
+            results.append((size, deck_type, search_time, combined_rating(search_cards),
+                            optimizer_time, combined_rating(optimizer_cards)))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[15, 20, 25, 30])
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.sizes, args.seed, args.repeat)
+    print(f"{'Creatures':>10}{'Type':>10}{'Search (ms)':>14}{'Rating':>10}{'Optimizer (ms)':>17}{'Rating':>10}")
+    for size, deck_type, search_time, search_rating, optimizer_time, optimizer_rating in results:
+        print(f"{size:>10}{deck_type:>10}{search_time:>14.3f}{search_rating:>10.2f}"
+              f"{optimizer_time:>17.3f}{optimizer_rating:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""Micro-benchmark that compares the targeted payload extraction against the full JSON decoding of the Arena log lines
+
+Usage: python -m benchmarks.payload_decoding [Logs/DraftLog_*.log ...]
+
+The pack and pick lines are collected from the log files. If no files are provided, a set of
+synthetic lines that follow the Arena log format is used instead.
+Each line is decoded with the stdlib json module, with the selected JSON backend (orjson if it's installed),
+and with the targeted extraction (only for the lines where the fields are requested from a nested payload)
+"""
+import sys
+import json
+import timeit
+import argparse
+import src.log_scanner as LS
+import src.payload_decoder as PD
+
+
+def full_p1p1_pack(line, string_offset, loads=json.loads):
+    draft_data = loads(line[line.find("{\"id\":"):])
+    card_data = loads(loads(draft_data["request"])["Payload"])
+    return [str(x) for x in card_data["CardsInPack"]], card_data["PackNumber"], card_data["PickNumber"]
+
+
+def full_notify_pack(line, string_offset, loads=json.loads):
+    draft_data = loads(line[line.find("{", string_offset):])
+    return [str(x) for x in draft_data["PackCards"].split(',')], draft_data["SelfPack"], draft_data["SelfPick"]
+
+
+def full_make_pick(line, string_offset, loads=json.loads):
+    draft_data = loads(line[line.find("{\"id\""):])
+    param_data = loads(loads(draft_data["request"])["Payload"])
+    return int(param_data["Pack"]), int(param_data["Pick"]), str(param_data["GrpId"])
+
+
+def full_quick_pack(line, string_offset, loads=json.loads):
+    draft_data = loads(line[line.find("{\"CurrentModule\""):])
+    payload_data = loads(draft_data["Payload"])
+    return (payload_data["DraftStatus"], [str(x) for x in payload_data["DraftPack"] or []],
+            payload_data["PackNumber"] + 1, payload_data["PickNumber"] + 1)
+
+
+def full_quick_pick(line, string_offset, loads=json.loads):
+    draft_data = loads(line[string_offset + len(LS.DRAFT_BOT_PICK_STRING):])
+    pick_data = loads(loads(draft_data["request"])["Payload"])["PickInfo"]
+    return pick_data["PackNumber"] + 1, pick_data["PickNumber"] + 1, str(pick_data["CardId"])
+
+
+DECODERS = {
+    "CardsInPack": (full_p1p1_pack, LS.P1P1_PACK_FIELDS),
+    LS.DRAFT_NOTIFY_STRING: (full_notify_pack, None),
+    LS.DRAFT_MAKE_PICK_STRING: (full_make_pick, LS.MAKE_PICK_FIELDS),
+    "DraftPack": (full_quick_pack, None),
+    LS.DRAFT_BOT_PICK_STRING: (full_quick_pick, LS.QUICK_PICK_FIELDS),
+}
+
+
+def nested_line(prefix, payload):
+    request = json.dumps({"Payload": json.dumps(payload)})
+    return prefix + json.dumps({"id": "9f3c1a", "request": request}) + "\n"
+
+
+def synthetic_lines():
+    '''Return lines that follow the format of the recorded Arena log lines'''
+    cards = list(range(87000, 87015))
+    lines = {
+        "CardsInPack": nested_line("[UnityCrossThreadLogger]==> LogBusinessEvents ",
+                                   {"PlayerId": "A1B2C3", "ClientPlatform": "Windows", "DraftId": "9f3c1a",
+                                    "EventId": "PremierDraft_LTR_20230620", "SeatNumber": 3, "PackNumber": 1,
+                                    "PickNumber": 1, "PickGrpId": 0, "CardsInPack": cards,
+                                    "AutoPick": False, "TimeRemainingOnPick": 60.0,
+                                    "EventType": 24, "EventTime": "2023-06-21T01:02:03.000Z"}),
+        LS.DRAFT_NOTIFY_STRING: LS.DRAFT_NOTIFY_STRING + json.dumps(
+            {"draftId": "9f3c1a", "SelfPick": 2, "SelfPack": 1,
+             "PackCards": ",".join(str(x) for x in cards[:14])}) + "\n",
+        LS.DRAFT_MAKE_PICK_STRING: nested_line(LS.DRAFT_MAKE_PICK_STRING,
+                                               {"EventName": "PremierDraft_LTR_20230620",
+                                                "GrpId": 87003, "Pack": 1, "Pick": 2}),
+        "DraftPack": "[UnityCrossThreadLogger]<== BotDraft_DraftStatus " + json.dumps(
+            {"CurrentModule": "BotDraft", "Payload": json.dumps(
+                {"Result": "Success", "EventName": "QuickDraft_LTR_20230620", "DraftStatus": "PickNext",
+                 "PackNumber": 0, "PickNumber": 0, "NumCardsToPick": 1,
+                 "DraftPack": [str(x) for x in cards], "PackStyles": [], "PickedCards": [],
+                 "PickedStyles": []})}) + "\n",
+        LS.DRAFT_BOT_PICK_STRING: nested_line(LS.DRAFT_BOT_PICK_STRING,
+                                              {"EventName": "QuickDraft_LTR_20230620",
+                                               "PickInfo": {"CardId": "87003", "PackNumber": 0,
+                                                            "PickNumber": 0}}),
+    }
+    return [(marker, line) for marker, line in lines.items()]
+
+
+def collect_lines(files):
+    '''Collect the pack and pick lines from the log files'''
+    lines = []
+    for file in files:
+        with open(file, 'r', encoding="utf-8", errors="replace") as log:
+            for line in log:
+                for marker in DECODERS:
+                    if marker in line:
+                        lines.append((marker, line))
+                        break
+    return lines
+
+
+def time_decoder(decoder, marker_lines, repeat):
+    '''Return the average time, in microseconds, that it takes to decode a line'''
+    total_time = min(timeit.repeat(lambda: [decoder(x, y) for x, y in marker_lines],
+                                   number=repeat, repeat=3))
+    return total_time / (len(marker_lines) * repeat) * 1e6
+
+
+def run_benchmark(lines, repeat):
+    '''Time the json decoding, the backend decoding, and the targeted extraction for each marker'''
+    results = []
+    for marker, (full_decoder, fields) in DECODERS.items():
+        marker_lines = [(line, line.find(marker)) for x, line in lines if x == marker]
+        if not marker_lines:
+            continue
+        json_time = time_decoder(full_decoder, marker_lines, repeat)
+        backend_time = time_decoder(lambda x, y: full_decoder(x, y, PD.json_loads), marker_lines, repeat)
+        targeted_time = None
+        if fields:
+            extracted = [PD.extract_fields(x, fields) for x, _ in marker_lines]
+            print(f"{marker.strip()}: {extracted.count(None)} of {len(marker_lines)} lines require the fallback")
+            targeted_time = time_decoder(lambda x, y: PD.extract_fields(x, fields), marker_lines, repeat)
+        results.append((marker.strip(), len(marker_lines), json_time, backend_time, targeted_time))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    lines = collect_lines(args.files) if args.files else synthetic_lines()
+    print(f"JSON backend: {PD.JSON_BACKEND}")
+    results = run_benchmark(lines, args.repeat)
+    print(f"{'Marker':<60}{'Lines':>8}{'json (us)':>12}{'Backend (us)':>14}{'Targeted (us)':>15}")
+    for marker, count, json_time, backend_time, targeted_time in results:
+        targeted = f"{targeted_time:>15.2f}" if targeted_time is not None else f"{'-':>15}"
+        print(f"{marker:<60}{count:>8}{json_time:>12.2f}{backend_time:>14.2f}{targeted}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
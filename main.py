@@ -2,10 +2,13 @@
 """! @brief Magic the Gathering draft application that utilizes 17Lands data"""
 
 # Imports
+from multiprocessing import freeze_support
 from src.overlay import start_overlay
 
 def main():
     start_overlay()
 
 if __name__ == "__main__":
+    # Required by the process pool that builds the suggested decks when the application is frozen (PyInstaller)
+    freeze_support()
     main()
@@ -1,11 +1,9 @@
 import os
 import json
-import urllib.request
-import ssl
 import re
-import shutil
 import zipfile
 from typing import Tuple
+from src.http_client import HTTPClient, default_client
 from src.logger import create_logger
 
 logger = create_logger()
@@ -20,18 +18,17 @@ if not os.path.exists(DOWNLOADS_FOLDER):
 
 
 class AppUpdate:
-    def __init__(self):
+    def __init__(self, client: HTTPClient = None):
         self.version: str = ""
         self.file_location: str = ""
-        self.context: ssl.SSLContext = ssl.SSLContext()
+        self.client: HTTPClient = client or default_client()
 
     def retrieve_file_version(self, search_location: str = UPDATE_LATEST_URL) -> Tuple[str, str]:
         '''Retrieve the file version'''
         self.version = ""
         self.file_location = ""
         try:
-            url_data = urllib.request.urlopen(
-                search_location, context=self.context).read()
+            url_data = self.client.get(search_location)
             url_json = json.loads(url_data)
             self.__process_file_version(url_json)
         except Exception as error:
@@ -48,9 +45,8 @@ class AppUpdate:
             temp_output_location = os.path.join(
                 DOWNLOADS_FOLDER, output_filename)
 
-            with urllib.request.urlopen(input_url, context=self.context) as response:
-                with open(temp_input_location, 'wb') as file:
-                    shutil.copyfileobj(response, file)
+            with open(temp_input_location, 'wb') as file:
+                self.client.download(input_url, file)
 
             if zipfile.is_zipfile(temp_input_location):
                 with zipfile.ZipFile(temp_input_location, 'r') as zip_ref:
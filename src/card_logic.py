@@ -1,15 +1,26 @@
 """This module contains the functions that are used for processing the collected cards"""
 from itertools import combinations
 from dataclasses import dataclass, field
+from functools import lru_cache
+import os
 import logging
 import math
-import copy
+import time
+import threading
+import multiprocessing
 import numpy
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from src import constants
 from src.logger import create_logger
 
 logger = create_logger()
 
+CARD_COLOR_BITS = {color: 1 << index for index, color in enumerate(constants.CARD_COLORS)}
+CARD_TYPE_BITS = {card_type: 1 << index for index, card_type in enumerate(constants.CARD_TYPE_LIST)}
+DECK_METRICS_MAXIMUM_CMC = 6
+SUGGEST_DECK_MAXIMUM_WORKERS = 4
+
 
 @dataclass
 class DeckMetrics:
@@ -32,44 +43,100 @@ class SetMetrics:
     standard_deviation: float = 0.0
 
 
+@dataclass
+class DeckRating:
+    """This class holds the components of a deck rating (see deck_rating)
+
+    - card_rating: combined GIHWR of the cards with a GIHWR above the threshold
+    - creature_count: number of creatures in the deck
+    - creature_penalty: 50 for each creature below the recommended creature count
+    - cmc_average: average CMC of the creatures
+    - cmc_penalty: 500 if the average CMC of the creatures is above the deck type's CMC average
+    """
+    card_rating: float = 0.0
+    creature_count: int = 0
+    creature_penalty: int = 0
+    cmc_average: float = 0.0
+    cmc_penalty: int = 0
+
+    @property
+    def rating(self):
+        return int(self.card_rating - self.creature_penalty - self.cmc_penalty)
+
+
+@dataclass(frozen=True)
+class CardProfile:
+    """This class holds the color and type information of a card as bitmasks
+
+    - mana_colors: colors within the mana cost, in the order of constants.CARD_COLORS
+    - colors: colors that are used for filtering (the card colors for lands, since they don't have a mana cost)
+    - color_mask: bitmask of the filtering colors (see CARD_COLOR_BITS)
+    - type_mask: bitmask of the card types (see CARD_TYPE_BITS)
+    """
+    mana_colors: tuple = ()
+    colors: tuple = ()
+    color_mask: int = 0
+    type_mask: int = 0
+
+
+class ResultRow:
+    """This class holds the results for a card along with a reference to the card data
+
+    The card data isn't copied, so the row supports read-only lookups of the card fields (e.g., row["name"])
+    """
+    __slots__ = ("card", "results")
+
+    def __init__(self, card, results):
+        self.card = card
+        self.results = results
+
+    def __getitem__(self, key):
+        return self.results if key == "results" else self.card[key]
+
+    def __contains__(self, key):
+        return key == "results" or key in self.card
+
+    def get(self, key, default=None):
+        return self.results if key == "results" else self.card.get(key, default)
+
+
 class CardResult:
     """This class processes a card list and produces results based on a list of fields (i.e., ALSA, GIHWR, COLORS, etc.)"""
 
-    def __init__(self, set_metrics, tier_data, configuration, pick_number):
+    def __init__(self, set_metrics, tier_data, configuration, pick_number, ratings_engine=None):
         self.metrics = set_metrics
         self.tier_data = tier_data
         self.configuration = configuration
         self.pick_number = pick_number
+        self.ratings_engine = ratings_engine
 
     def return_results(self, card_list, colors, fields):
-        """This function processes a card list and returns a list with the requested field results"""
+        """This function processes a card list and returns a list of ResultRow objects with the requested field results"""
         return_list = []
-        wheel_sum = 0
+        wheel_results = []
         if constants.DATA_FIELD_WHEEL in fields.values():
-            wheel_sum = self.__retrieve_wheel_sum(card_list)
+            wheel_results = self.__retrieve_wheel_results(card_list)
 
-        for card in card_list:
+        for index, card in enumerate(card_list):
             try:
-                selected_card = copy.deepcopy(card)
-                selected_card["results"] = ["NA"] * len(fields)
+                results = ["NA"] * len(fields)
 
                 for count, option in enumerate(fields.values()):
                     if constants.FILTER_OPTION_TIER in option:
-                        selected_card["results"][count] = self.__process_tier(
+                        results[count] = self.__process_tier(
                             card, option)
                     elif option == constants.DATA_FIELD_COLORS:
-                        selected_card["results"][count] = self.__process_colors(
+                        results[count] = self.__process_colors(
                             card)
                     elif option == constants.DATA_FIELD_WHEEL:
-                        selected_card["results"][count] = self.__process_wheel_normalized(
-                            card, wheel_sum)
+                        results[count] = wheel_results[index]
                     elif option in card:
-                        selected_card["results"][count] = card[option]
+                        results[count] = card[option]
                     else:
-                        selected_card["results"][count] = self.__process_filter_fields(
+                        results[count] = self.__process_filter_fields(
                             card, option, colors)
 
-                return_list.append(selected_card)
+                return_list.append(ResultRow(card, results))
             except Exception as error:
                 logger.error(error)
         return return_list
@@ -100,21 +167,34 @@ class CardResult:
                 # For lands, the card mana cost can't be used to identify the card colors
                 result = "".join(card[constants.DATA_FIELD_COLORS])
             else:
-                result = "".join(
-                    list(card_colors(card[constants.DATA_FIELD_MANA_COST]).keys()))
+                result = "".join(card_profile(card).mana_colors)
         except Exception as error:
             logger.error(error)
 
         return result
 
-    def __retrieve_wheel_sum(self, card_list):
-        """Calculate the sum of all wheel percentage values for the card list"""
-        total_sum = 0
+    def __retrieve_wheel_results(self, card_list):
+        """Calculate the normalized wheel percentages for the card list
 
-        for card in card_list:
-            total_sum += self.__process_wheel(card)
+           The percentages are read from the wheel table of the ratings engine, if all of the cards are in the table
+        """
+        wheel_results = [0] * len(card_list)
+        try:
+            wheel_values = None
+            if self.ratings_engine:
+                wheel_values = self.ratings_engine.wheel_values(
+                    [x.get(constants.DATA_FIELD_NAME) for x in card_list], self.pick_number)
 
-        return total_sum
+            if wheel_values is None:
+                wheel_values = numpy.array([self.__process_wheel(x) for x in card_list], dtype=numpy.float64)
+
+            total_sum = sum(wheel_values.tolist())
+            if total_sum > 0:
+                wheel_results = numpy.round((wheel_values / total_sum) * 100, 1).tolist()
+        except Exception as error:
+            logger.error(error)
+
+        return wheel_results
 
     def __process_wheel(self, card):
         """Calculate wheel percentage"""
@@ -135,19 +215,6 @@ class CardResult:
 
         return result
 
-    def __process_wheel_normalized(self, card, total_sum):
-        """Calculate the normalized wheel percentage using the sum of all percentages within the card list"""
-        result = 0
-
-        try:
-            result = self.__process_wheel(card)
-
-            result = round((result / total_sum)*100, 1) if total_sum > 0 else 0
-        except Exception as error:
-            logger.error(error)
-
-        return result
-
     def __process_filter_fields(self, card, option, colors):
         """Retrieve win rate result based on the application settings"""
         result = "NA"
@@ -177,6 +244,19 @@ class CardResult:
     def __format_win_rate(self, card, winrate_field, winrate_count, color):
         """The function will return a grade, rating, or win rate depending on the application's Result Format setting"""
         result = 0
+        if self.ratings_engine:
+            # Look up the precomputed result for cards that are in the set's ratings matrix
+            result = self.ratings_engine.lookup(card[constants.DATA_FIELD_NAME],
+                                                color,
+                                                winrate_field,
+                                                self.configuration.settings.result_format,
+                                                self.configuration.settings.bayesian_average_enabled,
+                                                self.metrics.mean,
+                                                self.metrics.standard_deviation)
+            if result is not None:
+                return result
+            result = 0
+
         # Produce a result that matches the Result Format setting
         if self.configuration.settings.result_format == constants.RESULT_FORMAT_RATING:
             result = self.__card_rating(
@@ -237,6 +317,156 @@ class CardResult:
         return result
 
 
+class PoolAggregate:
+    """This class maintains running totals for a collection of taken cards
+
+    The cards are grouped by their color mask, type mask, and CMC, so the metrics for a color and type filter
+    (see deck_card_search and deck_metrics) are calculated from the groups instead of the cards.
+    The color ratings (see calculate_color_rating and calculate_color_affinity) are summed for each threshold
+    and Bayesian setting the first time they're requested, and then updated as cards are added.
+    """
+
+    def __init__(self, cards=None):
+        self.cards = []
+        self.card_ids = []
+        self.set_data = None
+        self.categories = {}
+        self.__rating_sums = {}
+        if cards:
+            self.add_cards(cards)
+
+    def clear(self):
+        """Remove all of the cards"""
+        self.cards = []
+        self.card_ids = []
+        self.set_data = None
+        self.categories = {}
+        self.__rating_sums = {}
+
+    def add_cards(self, cards):
+        """Add a collection of cards"""
+        for card in cards:
+            self.add_card(card)
+
+    def add_card(self, card):
+        """Add a single card to the running totals"""
+        self.cards.append(card)
+        try:
+            profile = card_profile(card)
+            cmc = card[constants.DATA_FIELD_CMC]
+            key = (profile.color_mask, bool(profile.colors), profile.type_mask,
+                   int(min(cmc, DECK_METRICS_MAXIMUM_CMC)))
+            totals = self.categories.setdefault(key, [0, 0])
+            totals[0] += 1
+            totals[1] += cmc
+        except Exception as error:
+            logger.error(error)
+
+        for (threshold, bayesian_enabled), sums in self.__rating_sums.items():
+            add_color_ratings(sums, card, threshold, bayesian_enabled)
+
+    def sync(self, card_ids, set_data, card_lookup):
+        """Add the cards that were taken since the last call
+
+           The totals are rebuilt if the set data changed or if card_ids doesn't start with the stored ids
+        """
+        count = len(self.card_ids)
+        if (set_data is not self.set_data) or (card_ids[:count] != self.card_ids):
+            self.clear()
+            self.set_data = set_data
+            count = 0
+        for card_id in card_ids[count:]:
+            self.card_ids.append(card_id)
+            self.add_card(card_lookup(card_id))
+        return self
+
+    def __color_sums(self, threshold, bayesian_enabled):
+        """Return the rating and affinity sums for a threshold, summing the stored cards on the first request"""
+        key = (threshold, bool(bayesian_enabled))
+        sums = self.__rating_sums.get(key)
+        if sums is None:
+            sums = self.__rating_sums[key] = {"ratings": {}, "affinity": {}}
+            for card in self.cards:
+                add_color_ratings(sums, card, threshold, bayesian_enabled)
+        return sums
+
+    def color_rating(self, color_filter, threshold, configuration):
+        """Return the same value as calculate_color_rating for the stored cards"""
+        return self.__color_sums(threshold, configuration.settings.bayesian_average_enabled)["ratings"].get(
+            color_filter, 0)
+
+    def color_affinity(self, threshold, configuration):
+        """Return the same value as calculate_color_affinity, with the All Decks filter, for the stored cards"""
+        return dict(self.__color_sums(threshold, configuration.settings.bayesian_average_enabled)["affinity"])
+
+    def deck_metrics(self, search_colors, card_types, include_types, include_colorless, include_partial,
+                     excluded_types=None):
+        """Return the DeckMetrics of the cards that deck_card_search would return for the stored cards
+
+           excluded_types: optional list of card types that are removed from the results
+        """
+        metrics = DeckMetrics()
+        cmc_total = 0
+        search_mask = color_mask(search_colors)
+        search_type_mask = type_mask(card_types)
+        excluded_type_mask = type_mask(excluded_types or [])
+        for (mask, has_colors, types, cmc_index), (count, cmc_sum) in self.categories.items():
+            if (bool(types & search_type_mask) != bool(include_types)) or (types & excluded_type_mask):
+                continue
+
+            if has_colors and not (mask & ~search_mask):
+                copies = 1
+            elif (mask & search_mask) and include_partial:
+                # deck_card_search adds a partial match once for each of its colors that are in the search colors
+                copies = bin(mask & search_mask).count("1")
+            elif not has_colors and include_colorless:
+                copies = 1
+            else:
+                continue
+
+            count *= copies
+            metrics.total_cards += count
+            if types & CARD_TYPE_BITS[constants.CARD_TYPE_CREATURE]:
+                metrics.creature_count += count
+                metrics.total_non_land_cards += count
+                cmc_total += cmc_sum * copies
+                metrics.distribution_creatures[cmc_index] += count
+            else:
+                if not types & CARD_TYPE_BITS[constants.CARD_TYPE_LAND]:
+                    cmc_total += cmc_sum * copies
+                    metrics.total_non_land_cards += count
+                    metrics.distribution_noncreatures[cmc_index] += count
+                metrics.noncreature_count += count
+            metrics.distribution_all[cmc_index] += count
+
+        metrics.cmc_average = (cmc_total / metrics.total_non_land_cards
+                               if metrics.total_non_land_cards
+                               else 0.0)
+        return metrics
+
+
+def add_color_ratings(sums, card, threshold, bayesian_enabled):
+    """This function adds a card's GIHWR values that are above the threshold to the color rating and affinity sums"""
+    try:
+        deck_colors_data = card[constants.DATA_FIELD_DECK_COLORS]
+    except Exception as error:
+        logger.error(error)
+        return
+
+    for color_filter, ratings in deck_colors_data.items():
+        try:
+            gihwr = calculate_win_rate(ratings[constants.DATA_FIELD_GIHWR],
+                                       ratings[constants.DATA_FIELD_GIH],
+                                       bayesian_enabled)
+            if gihwr > threshold:
+                sums["ratings"][color_filter] = sums["ratings"].get(color_filter, 0) + (gihwr - threshold)
+                if color_filter == constants.FILTER_OPTION_ALL_DECKS:
+                    for color in card_profile(card).mana_colors:
+                        sums["affinity"][color] = sums["affinity"].get(color, 0) + (gihwr - threshold)
+        except Exception as error:
+            logger.error(error)
+
+
 def field_process_sort(field_value):
     """This function collects the numeric order of a letter grade for the purpose of sorting"""
     processed_value = field_value
@@ -269,46 +499,83 @@ def format_tier_results(value, old_format, new_format):
     return new_value
 
 
-def deck_card_search(deck, search_colors, card_types, include_types, include_colorless, include_partial):
-    """This function retrieves a subset of cards that meet certain criteria (type, color, etc.)"""
-    card_color_sorted = {}
-    main_color = ""
-    combined_cards = []
-    for card in deck:
-        try:
-            colors = list(card_colors(
-                card[constants.DATA_FIELD_MANA_COST]).keys())
+def color_mask(colors):
+    """This function converts a list or string of color symbols into a bitmask"""
+    mask = 0
+    for color in colors:
+        for symbol in color:
+            mask |= CARD_COLOR_BITS.get(symbol, 0)
+    return mask
 
-            if constants.CARD_TYPE_LAND in card[constants.DATA_FIELD_TYPES]:
-                colors = card[constants.DATA_FIELD_COLORS]
 
-            if colors and (set(colors) <= set(search_colors)):
-                main_color = colors[0]
+def type_mask(card_types):
+    """This function converts a list of card types into a bitmask"""
+    mask = 0
+    for card_type, bit in CARD_TYPE_BITS.items():
+        if card_type in card_types:
+            mask |= bit
+    return mask
+
+
+@lru_cache(maxsize=None)
+def cached_card_profile(mana_cost, card_types, land_colors):
+    """This function builds the color and type bitmasks for a mana cost and type line
+
+       The profiles are cached by value, so the cards that share a mana cost and type line share a profile and
+       nothing is stored in the card data
+    """
+    mana_colors = mana_cost_colors(mana_cost)
+    card_type_mask = type_mask(card_types)
+    colors = land_colors if card_type_mask & CARD_TYPE_BITS[constants.CARD_TYPE_LAND] else mana_colors
+    return CardProfile(mana_colors=mana_colors, colors=colors, color_mask=color_mask(colors),
+                       type_mask=card_type_mask)
 
-                if ((include_types and any(x in card[constants.DATA_FIELD_TYPES] for x in card_types)) or
-                   (not include_types and not any(x in card[constants.DATA_FIELD_TYPES] for x in card_types))):
 
-                    if main_color not in card_color_sorted:
-                        card_color_sorted[main_color] = []
+def create_card_profile(card):
+    """This function returns the color and type bitmasks for a card"""
+    card_types = tuple(card[constants.DATA_FIELD_TYPES])
+    land_colors = tuple(card[constants.DATA_FIELD_COLORS]) if constants.CARD_TYPE_LAND in card_types else ()
+    return cached_card_profile(card[constants.DATA_FIELD_MANA_COST], card_types, land_colors)
 
-                    card_color_sorted[main_color].append(card)
 
-            elif set(search_colors).intersection(colors) and include_partial:
-                for color in colors:
-                    if ((include_types and any(x in card[constants.DATA_FIELD_TYPES] for x in card_types)) or
-                       (not include_types and not any(x in card[constants.DATA_FIELD_TYPES] for x in card_types))):
+def card_profile(card):
+    """This function returns the profile of a card from the profile cache"""
+    return create_card_profile(card)
+
+
+def profile_cards(cards):
+    """This function adds the profile of each card within a collection of cards to the profile cache
+       (e.g., when a set file is loaded)
+    """
+    for card in cards:
+        try:
+            create_card_profile(card)
+        except Exception as error:
+            logger.error(error)
 
-                        if color not in card_color_sorted:
-                            card_color_sorted[color] = []
 
-                        card_color_sorted[color].append(card)
+def deck_card_search(deck, search_colors, card_types, include_types, include_colorless, include_partial):
+    """This function retrieves a subset of cards that meet certain criteria (type, color, etc.)"""
+    card_color_sorted = {}
+    combined_cards = []
+    search_mask = color_mask(search_colors)
+    search_type_mask = type_mask(card_types)
+    for card in deck:
+        try:
+            profile = card_profile(card)
+            type_match = bool(profile.type_mask & search_type_mask) == bool(include_types)
+            if not type_match:
+                continue
 
-            if not colors and include_colorless:
+            if profile.colors and not (profile.color_mask & ~search_mask):
+                card_color_sorted.setdefault(profile.colors[0], []).append(card)
 
-                if ((include_types and any(x in card[constants.DATA_FIELD_TYPES] for x in card_types)) or
-                   (not include_types and not any(x in card[constants.DATA_FIELD_TYPES] for x in card_types))):
+            elif (profile.color_mask & search_mask) and include_partial:
+                for color in profile.colors:
+                    card_color_sorted.setdefault(color, []).append(card)
 
-                    combined_cards.append(card)
+            if not profile.colors and include_colorless:
+                combined_cards.append(card)
         except Exception as error:
             logger.error(error)
 
@@ -363,12 +630,12 @@ def deck_metrics(deck):
     return metrics
 
 
-def option_filter(deck, option_selection, metrics, configuration):
+def option_filter(deck, option_selection, metrics, configuration, aggregate=None):
     """This function returns a list of colors based on the deck filter option"""
     filtered_color_list = [option_selection]
     try:
         if constants.FILTER_OPTION_AUTO in option_selection:
-            filtered_color_list = auto_colors(deck, 5, metrics, configuration)
+            filtered_color_list = auto_colors(deck, 5, metrics, configuration, aggregate)
         else:
             filtered_color_list = [option_selection]
     except Exception as error:
@@ -376,13 +643,17 @@ def option_filter(deck, option_selection, metrics, configuration):
     return filtered_color_list
 
 
-def deck_colors(deck, colors_max, metrics, configuration):
-    """This function determines the prominent colors for a collection of cards"""
+def deck_colors(deck, colors_max, metrics, configuration, aggregate=None):
+    """This function determines the prominent colors for a collection of cards
+
+       aggregate: optional PoolAggregate of the same cards, which is built from the deck if it's not provided
+    """
     colors_result = {}
     try:
+        if aggregate is None:
+            aggregate = PoolAggregate(deck)
         threshold = metrics.mean - 0.33 * metrics.standard_deviation
-        colors = calculate_color_affinity(
-            deck, constants.FILTER_OPTION_ALL_DECKS, threshold, configuration)
+        colors = aggregate.color_affinity(threshold, configuration)
 
         # Modify the dictionary to include ratings
         color_list = list(
@@ -427,18 +698,17 @@ def deck_colors(deck, colors_max, metrics, configuration):
 
         # Recalculate values based on the filtered win rates
         for color in colors_result:
-            base_rating = calculate_color_rating(deck,
-                                                 color,
+            base_rating = aggregate.color_rating(color,
                                                  threshold,
                                                  configuration)
-            curve_factor = calculate_curve_factor(deck,
+            curve_factor = calculate_curve_factor(aggregate.cards,
                                                   color,
-                                                  configuration)
+                                                  configuration,
+                                                  aggregate)
             colors_result[color] = base_rating * curve_factor
 
         # Add All Decks as a baseline
-        colors_result[constants.FILTER_OPTION_ALL_DECKS] = calculate_color_rating(deck,
-                                                                                  constants.FILTER_OPTION_ALL_DECKS,
+        colors_result[constants.FILTER_OPTION_ALL_DECKS] = aggregate.color_rating(constants.FILTER_OPTION_ALL_DECKS,
                                                                                   metrics.mean,
                                                                                   configuration)
         colors_result = dict(
@@ -449,14 +719,14 @@ def deck_colors(deck, colors_max, metrics, configuration):
     return colors_result
 
 
-def auto_colors(deck, colors_max, metrics, configuration):
+def auto_colors(deck, colors_max, metrics, configuration, aggregate=None):
     """When the Auto deck filter is selected, this function identifies the prominent color pairs from the collected cards"""
     try:
         deck_colors_list = [constants.FILTER_OPTION_ALL_DECKS]
         colors_dict = {}
         deck_length = len(deck)
         if deck_length > 15:
-            colors_dict = deck_colors(deck, colors_max, metrics, configuration)
+            colors_dict = deck_colors(deck, colors_max, metrics, configuration, aggregate)
             colors = list(colors_dict.keys())
             auto_select_threshold = max(70 - deck_length, 25)
             if len(colors) >= 2:
@@ -510,7 +780,7 @@ def sort_cards_win_rate(cards, filter_order, bayesian_enabled):
     return sorted_cards
 
 
-def calculate_curve_factor(deck, color_filter, configuration):
+def calculate_curve_factor(deck, color_filter, configuration, aggregate=None):
     """This function will assign a rating to a collection of cards based on how well they meet the deck building requirements"""
     curve_levels = [.10, .10, .10, .10, .15,
                     .15, .15, .20, .20, .20,
@@ -526,14 +796,15 @@ def calculate_curve_factor(deck, color_filter, configuration):
     minimum_creature_count = configuration.card_logic.minimum_creatures
 
     try:
-        filtered_cards = deck_card_search(
-            deck,
-            color_filter,
-            constants.CARD_TYPE_DICT[constants.CARD_TYPE_SELECTION_NON_LANDS][0],
-            True,
-            True,
-            False)
-        deck_info = deck_metrics(filtered_cards)
+        search_options = (color_filter,
+                          constants.CARD_TYPE_DICT[constants.CARD_TYPE_SELECTION_NON_LANDS][0],
+                          True,
+                          True,
+                          False)
+        if aggregate is not None:
+            deck_info = aggregate.deck_metrics(*search_options)
+        else:
+            deck_info = deck_metrics(deck_card_search(deck, *search_options))
         curve_level = curve_levels[int(
             min(index, len(curve_levels) - 1))]
 
@@ -563,9 +834,7 @@ def calculate_color_affinity(deck_cards, color_filter, threshold, configuration)
                                            card[constants.DATA_FIELD_DECK_COLORS][color_filter][constants.DATA_FIELD_GIH],
                                            configuration.settings.bayesian_average_enabled)
                 if gihwr > threshold:
-                    mana_colors = card_colors(
-                        card[constants.DATA_FIELD_MANA_COST])
-                    for color in mana_colors:
+                    for color in card_profile(card).mana_colors:
                         if color not in colors:
                             colors[color] = 0
                         colors[color] += (gihwr - threshold)
@@ -576,7 +845,7 @@ def calculate_color_affinity(deck_cards, color_filter, threshold, configuration)
 
 def row_color_tag(mana_cost):
     """This function selects the color tag for a table row based on a card's mana cost"""
-    colors = list(card_colors(mana_cost).keys())
+    colors = mana_cost_colors(mana_cost if isinstance(mana_cost, str) else tuple(mana_cost))
 
     row_tag = constants.CARD_ROW_COLOR_COLORLESS_TAG
     if len(colors) > 1:
@@ -691,26 +960,24 @@ def calculate_win_rate(winrate, count, bayesian_enabled):
     return calculated_winrate
 
 
-def deck_color_stats(deck, color):
+def deck_color_stats(deck, color, aggregate=None):
     """The function will identify the number of creature and noncreature cards in a collection of cards"""
     creature_count = 0
     noncreature_count = 0
 
     try:
-        creature_cards = deck_card_search(
-            deck, color, [constants.CARD_TYPE_CREATURE], True, True, False)
-        noncreature_cards = deck_card_search(
-            deck, color, [constants.CARD_TYPE_CREATURE], False, True, False)
-        noncreature_cards = deck_card_search(
-            noncreature_cards, color,
+        if aggregate is None:
+            aggregate = PoolAggregate(deck)
+        creature_count = aggregate.deck_metrics(
+            color, [constants.CARD_TYPE_CREATURE], True, True, False).total_cards
+        noncreature_count = aggregate.deck_metrics(
+            color,
             [constants.CARD_TYPE_INSTANT,
              constants.CARD_TYPE_SORCERY,
              constants.CARD_TYPE_ARTIFACT,
              constants.CARD_TYPE_ENCHANTMENT,
-             constants.CARD_TYPE_PLANESWALKER], True, True, False)
-
-        creature_count = len(creature_cards)
-        noncreature_count = len(noncreature_cards)
+             constants.CARD_TYPE_PLANESWALKER], True, True, False,
+            excluded_types=[constants.CARD_TYPE_CREATURE]).total_cards
 
     except Exception as error:
         logger.error(error)
@@ -718,46 +985,67 @@ def deck_color_stats(deck, color):
     return creature_count, noncreature_count
 
 
-def card_cmc_search(deck, offset, starting_cmc, cmc_limit, remaining_count):
-    """The function will use recursion to search through a collection of cards and produce a list of cards with a mean CMC that is below a specific limit"""
-    cards = []
-    unused = []
+def select_cmc_cards(cards, cmc_limit, card_count):
+    """The function will select the set of cards with the highest combined win rate whose combined CMC doesn't exceed a specific limit
+
+       The selection is solved as a knapsack problem with dynamic programming: best[k][c] holds the highest
+       combined win rate for k cards with a combined CMC of at most c. The table is bounded by the card count and
+       the CMC limit, so the runtime is O(cards x card_count x cmc_limit) instead of exponential.
+       Ties are resolved in favor of the cards that appear first in the list, so the result is deterministic.
+       Returns the selected cards and the unused cards, in list order. No cards are selected if the limit can't be met.
+    """
+    cards_selected = []
+    unused = cards[:]
     try:
-        for count, card in enumerate(deck[offset:]):
-            card_cmc = card[constants.DATA_FIELD_CMC]
-
-            if card_cmc + starting_cmc <= cmc_limit:
-                card_cmc += starting_cmc
-                current_offset = offset + count
-                current_remaining = int(max(remaining_count - 1, 0))
-                if current_remaining == 0:
-                    cards.append(card)
-                    unused.extend(deck[current_offset + 1:])
-                    break
-                elif current_offset > (len(deck) - remaining_count):
-                    unused.extend(deck[current_offset:])
-                    break
-                else:
-                    current_offset += 1
-                    cards, skipped = card_cmc_search(
-                        deck, current_offset, card_cmc, cmc_limit, current_remaining)
-                    if cards:
-                        cards.append(card)
-                        unused.extend(skipped)
-                        break
-                    else:
-                        unused.append(card)
+        card_count = int(card_count)
+        if card_count <= 0 or card_count > len(cards) or cmc_limit < 0:
+            return cards_selected, unused
+
+        cmc_values = [int(math.ceil(x[constants.DATA_FIELD_CMC])) for x in cards]
+        # Win rates are compared in hundredths so the sums are exact
+        scores = [int(round(x["results"][0] * 100)) for x in cards]
+        cmc_limit = int(min(math.floor(cmc_limit), sum(sorted(cmc_values)[-card_count:])))
+
+        # Build the tables from the last card to the first so the selection can be recovered in list order
+        unreachable = numpy.iinfo(numpy.int64).min // 2
+        best = numpy.full((card_count + 1, cmc_limit + 1), unreachable, dtype=numpy.int64)
+        best[0, :] = 0
+        tables = [best]
+        for cmc, score in zip(reversed(cmc_values), reversed(scores)):
+            if cmc <= cmc_limit:
+                best = best.copy()
+                best[1:, cmc:] = numpy.maximum(best[1:, cmc:], tables[-1][:-1, :cmc_limit + 1 - cmc] + score)
+            tables.append(best)
+        tables.reverse()
+
+        if tables[0][card_count, cmc_limit] < 0:
+            return cards_selected, unused
+
+        unused = []
+        remaining_count = card_count
+        remaining_cmc = cmc_limit
+        for index, card in enumerate(cards):
+            cmc = cmc_values[index]
+            following = tables[index + 1]
+            if (remaining_count and cmc <= remaining_cmc and
+                following[remaining_count - 1, remaining_cmc - cmc] + scores[index] >=
+                    following[remaining_count, remaining_cmc]):
+                cards_selected.append(card)
+                remaining_count -= 1
+                remaining_cmc -= cmc
             else:
                 unused.append(card)
     except Exception as error:
         logger.error(error)
+        cards_selected = []
+        unused = cards[:]
 
-    return cards, unused
+    return cards_selected, unused
 
 
-def deck_rating(deck, deck_type, color, threshold, bayesian_enabled):
-    """The function will produce a deck rating based on the combined GIHWR value for each card with a GIHWR value above a certain threshold"""
-    rating = 0
+def deck_rating_breakdown(deck, deck_type, color, threshold, bayesian_enabled):
+    """The function will produce the components of a deck rating, based on the combined GIHWR value for each card with a GIHWR value above a certain threshold"""
+    breakdown = DeckRating()
     try:
         # Combined GIHWR of the cards
         for card in deck:
@@ -766,7 +1054,7 @@ def deck_rating(deck, deck_type, color, threshold, bayesian_enabled):
                                            card[constants.DATA_FIELD_DECK_COLORS][color][constants.DATA_FIELD_GIH],
                                            bayesian_enabled)
                 if gihwr > threshold:
-                    rating += gihwr
+                    breakdown.card_rating += gihwr
             except Exception:
                 pass
 
@@ -774,37 +1062,27 @@ def deck_rating(deck, deck_type, color, threshold, bayesian_enabled):
         recommended_creature_count = deck_type.recommended_creature_count
         filtered_cards = deck_card_search(
             deck, color, [constants.CARD_TYPE_CREATURE], True, True, False)
+        breakdown.creature_count = len(filtered_cards)
 
         if len(filtered_cards) < recommended_creature_count:
-            rating -= (recommended_creature_count - len(filtered_cards)) * 50
+            breakdown.creature_penalty = (recommended_creature_count - len(filtered_cards)) * 50
 
         # Average CMC of the creatures is below the ideal cmc average
-        cmc_average = deck_type.cmc_average
-        total_cards = len(filtered_cards)
-        total_cmc = 0
-
-        for card in filtered_cards:
-            total_cmc += card[constants.DATA_FIELD_CMC]
-
-        cmc = total_cmc / total_cards
+        if filtered_cards:
+            breakdown.cmc_average = sum(x[constants.DATA_FIELD_CMC] for x in filtered_cards) / len(filtered_cards)
 
-        if cmc > cmc_average:
-            rating -= 500
-
-        # Cards fit distribution
-        minimum_distribution = deck_type.distribution
-        distribution = [0, 0, 0, 0, 0, 0, 0]
-        for card in filtered_cards:
-            index = int(min(card[constants.DATA_FIELD_CMC],
-                        len(minimum_distribution) - 1))
-            distribution[index] += 1
+            if breakdown.cmc_average > deck_type.cmc_average:
+                breakdown.cmc_penalty = 500
 
     except Exception as error:
         logger.error(error)
 
-    rating = int(rating)
+    return breakdown
 
-    return rating
+
+def deck_rating(deck, deck_type, color, threshold, bayesian_enabled):
+    """The function will produce a deck rating based on the combined GIHWR value for each card with a GIHWR value above a certain threshold"""
+    return deck_rating_breakdown(deck, deck_type, color, threshold, bayesian_enabled).rating
 
 
 def copy_deck(deck, sideboard):
@@ -851,22 +1129,22 @@ def stack_cards(cards):
     return deck_list
 
 
-def card_colors(mana_cost):
-    """The function parses a mana cost string and returns a list of mana symbols"""
-    colors = {}
+@lru_cache(maxsize=None)
+def mana_cost_colors(mana_cost):
+    """The function returns the colors within a mana cost string, in the order of constants.CARD_COLORS"""
+    colors = ()
     try:
-        for color in constants.CARD_COLORS:
-            if color in mana_cost:
-                if color not in colors:
-                    colors[color] = 1
-                else:
-                    colors[color] += 1
-
+        colors = tuple(color for color in constants.CARD_COLORS if color in mana_cost)
     except Exception as error:
         logger.error(error)
     return colors
 
 
+def card_colors(mana_cost):
+    """The function parses a mana cost string and returns a list of mana symbols"""
+    return {color: 1 for color in mana_cost_colors(mana_cost)}
+
+
 def color_splash(cards, colors, splash_threshold, configuration):
     """The function will parse a list of cards to determine if there are any cards that might justify a splash"""
     color_affinity = {}
@@ -961,62 +1239,202 @@ def mana_base(deck):
     return combined_deck
 
 
-def suggest_deck(taken_cards, metrics, configuration):
-    """The function will analyze the list of taken cards and produce several viable decks based on specific criteria"""
-    colors_max = 5
-    maximum_card_count = 22
-    sorted_decks = {}
+def card_snapshot(cards, color):
+    """The function will produce a copy of the cards that only contains the ratings for a specific deck color
+
+       build_deck stores its results in the cards, so each color is built from its own copy of the taken cards
+    """
+    snapshot = []
+    for card in cards:
+        card_copy = {x: y for x, y in card.items() if x != "results"}
+        deck_colors = card.get(constants.DATA_FIELD_DECK_COLORS, {})
+        card_copy[constants.DATA_FIELD_DECK_COLORS] = {
+            x: deck_colors[x] for x in (color, constants.FILTER_OPTION_ALL_DECKS) if x in deck_colors}
+        snapshot.append(card_copy)
+    return tuple(snapshot)
+
+
+def suggest_color_deck(color, cards, deck_types, metrics, configuration):
+    """The function will build each deck type for a color and return the deck with the highest rating, or None"""
+    suggested_deck = None
     try:
-        deck_types = {"Mid": configuration.card_logic.deck_mid,
-                      "Aggro": configuration.card_logic.deck_aggro,
-                      "Control": configuration.card_logic.deck_control}
-        # Identify the top color combinations
-        colors = deck_colors(taken_cards, colors_max, metrics, configuration)
-        filtered_colors = []
-
-        colors.pop(constants.FILTER_OPTION_ALL_DECKS, None)
-
-        # Collect color stats and remove colors that don't meet the minimum requirements
-        for color in colors:
-            creature_count, noncreature_count = deck_color_stats(
-                taken_cards, color)
-            if ((creature_count >= configuration.card_logic.minimum_creatures) and
-               (noncreature_count >= configuration.card_logic.minimum_noncreatures) and
-               (creature_count + noncreature_count >= maximum_card_count)):
-                filtered_colors.append(color)
-
-        decks = {}
         threshold = metrics.mean - 0.33 * metrics.standard_deviation
-        for color in filtered_colors:
-            for key, value in deck_types.items():
-                deck, sideboard_cards = build_deck(
-                    value, taken_cards, color, metrics, configuration)
-                rating = deck_rating(
-                    deck, value, color, threshold, configuration.settings.bayesian_average_enabled)
-                if rating >= configuration.card_logic.ratings_threshold:
-
-                    if ((color not in decks) or
-                            (color in decks and rating > decks[color]["rating"])):
-                        decks[color] = {}
-                        decks[color]["deck_cards"] = stack_cards(deck)
-                        decks[color]["sideboard_cards"] = stack_cards(
-                            sideboard_cards)
-                        decks[color]["rating"] = rating
-                        decks[color]["type"] = key
-                        decks[color]["deck_cards"].extend(mana_base(deck))
-
-        sorted_colors = sorted(
-            decks, key=lambda x: decks[x]["rating"], reverse=True)
-        for color in sorted_colors:
-            sorted_decks[color] = decks[color]
+        for key, value in deck_types.items():
+            deck, sideboard_cards = build_deck(
+                value, list(cards), color, metrics, configuration)
+            rating = deck_rating(
+                deck, value, color, threshold, configuration.settings.bayesian_average_enabled)
+            if rating >= configuration.card_logic.ratings_threshold:
+
+                if (suggested_deck is None) or (rating > suggested_deck["rating"]):
+                    suggested_deck = {}
+                    suggested_deck["deck_cards"] = stack_cards(deck)
+                    suggested_deck["sideboard_cards"] = stack_cards(
+                        sideboard_cards)
+                    suggested_deck["rating"] = rating
+                    suggested_deck["type"] = key
+                    suggested_deck["deck_cards"].extend(mana_base(deck))
     except Exception as error:
         logger.error(error)
+    return suggested_deck
+
+
+suggest_deck_pool = None
+suggest_deck_pool_workers = 0
+
+
+def suggest_deck_executor(workers):
+    """The function will return the process pool that's used to build the suggested decks
+
+       The pool is created on first use and reused while the number of workers is unchanged. The worker processes are
+       spawned rather than forked, since the overlay process is running the Tk, log monitor, and logger threads
+    """
+    global suggest_deck_pool, suggest_deck_pool_workers
+    if (suggest_deck_pool is None) or (suggest_deck_pool_workers != workers):
+        shutdown_suggest_deck_executor()
+        suggest_deck_pool = ProcessPoolExecutor(max_workers=workers,
+                                                mp_context=multiprocessing.get_context("spawn"))
+        suggest_deck_pool_workers = workers
+    return suggest_deck_pool
+
+
+def shutdown_suggest_deck_executor():
+    """The function will stop the worker processes that are used to build the suggested decks"""
+    global suggest_deck_pool, suggest_deck_pool_workers
+    if suggest_deck_pool is not None:
+        suggest_deck_pool.shutdown(wait=False, cancel_futures=True)
+        suggest_deck_pool = None
+        suggest_deck_pool_workers = 0
+
+
+def suggest_deck_tasks(taken_cards, metrics, configuration):
+    """The function will identify the colors that can be built and return the colors and the suggest_color_deck
+       arguments for each color
+    """
+    colors_max = 5
+    maximum_card_count = 22
+    deck_types = {"Mid": configuration.card_logic.deck_mid,
+                  "Aggro": configuration.card_logic.deck_aggro,
+                  "Control": configuration.card_logic.deck_control}
+    # Identify the top color combinations
+    aggregate = PoolAggregate(taken_cards)
+    colors = deck_colors(taken_cards, colors_max, metrics, configuration, aggregate)
+    filtered_colors = []
+
+    colors.pop(constants.FILTER_OPTION_ALL_DECKS, None)
+
+    # Collect color stats and remove colors that don't meet the minimum requirements
+    for color in colors:
+        creature_count, noncreature_count = deck_color_stats(
+            taken_cards, color, aggregate)
+        if ((creature_count >= configuration.card_logic.minimum_creatures) and
+           (noncreature_count >= configuration.card_logic.minimum_noncreatures) and
+           (creature_count + noncreature_count >= maximum_card_count)):
+            filtered_colors.append(color)
+
+    tasks = [(color, card_snapshot(taken_cards, color), deck_types, metrics, configuration)
+             for color in filtered_colors]
+    return filtered_colors, tasks
+
+
+class SuggestDeckRequest:
+    """This class builds the suggested decks for a list of taken cards without blocking the caller
+
+       Each color is built from its own snapshot of the taken cards. If there's more than one color, and more than
+       one worker, the colors are built in a process pool and collected by the future callbacks. The UI thread calls
+       poll (e.g., from root.after) until the decks are ready, and the decks are merged in the order of the colors.
+    """
+
+    def __init__(self, taken_cards, metrics, configuration, workers=None):
+        self.start_time = time.perf_counter()
+        self.card_count = len(taken_cards)
+        self.colors = []
+        self.tasks = []
+        self.decks = None
+        self.workers = min(workers or os.cpu_count() or 1, SUGGEST_DECK_MAXIMUM_WORKERS)
+        self.__results = {}
+        self.__pending = 0
+        self.__broken = False
+        self.__lock = threading.Lock()
+        self.__complete = threading.Event()
+        try:
+            self.colors, self.tasks = suggest_deck_tasks(taken_cards, metrics, configuration)
+            if (self.workers > 1) and (len(self.tasks) > 1):
+                self.__submit()
+        except Exception as error:
+            logger.error(error)
+        if not self.__pending:
+            self.__complete.set()
+
+    def __submit(self):
+        """Submit the colors to the process pool"""
+        try:
+            executor = suggest_deck_executor(self.workers)
+            futures = [executor.submit(suggest_color_deck, *x) for x in self.tasks]
+        except (BrokenProcessPool, RuntimeError) as error:
+            logger.error(error)
+            self.__broken = True
+            return
+        self.__pending = len(futures)
+        for index, future in enumerate(futures):
+            future.add_done_callback(lambda x, index=index: self.__collect(index, x))
+
+    def __collect(self, index, future):
+        """Store the deck of a color that was built in the process pool"""
+        try:
+            deck = future.result()
+            with self.__lock:
+                self.__results[index] = deck
+        except Exception as error:
+            logger.error(error)
+            self.__broken = True
+        with self.__lock:
+            self.__pending -= 1
+            if not self.__pending:
+                self.__complete.set()
+
+    def poll(self):
+        """Return the suggested decks, or None if the process pool is still building them
+
+           The colors that couldn't be built in the process pool are built in the calling thread
+        """
+        if (self.decks is None) and self.__complete.is_set():
+            sorted_decks = {}
+            try:
+                if self.__broken:
+                    shutdown_suggest_deck_executor()
+                suggested_decks = [self.__results[index] if index in self.__results else suggest_color_deck(*task)
+                                   for index, task in enumerate(self.tasks)]
+                decks = {color: deck for color, deck in zip(self.colors, suggested_decks) if deck}
+                for color in sorted(decks, key=lambda x: decks[x]["rating"], reverse=True):
+                    sorted_decks[color] = decks[color]
+                logger.info("Deck suggestions: %d cards, %d decks in %.1f ms (%d workers)", self.card_count,
+                            len(sorted_decks), (time.perf_counter() - self.start_time) * 1000,
+                            self.workers if self.__results else 1)
+            except Exception as error:
+                logger.error(error)
+            self.decks = sorted_decks
+        return self.decks
+
+    def result(self, timeout=None):
+        """Wait for the process pool and return the suggested decks"""
+        self.__complete.wait(timeout)
+        return self.poll()
+
+
+def suggest_deck(taken_cards, metrics, configuration, workers=None):
+    """The function will analyze the list of taken cards and produce several viable decks based on specific criteria
+
+       The function waits for the decks; the overlay uses SuggestDeckRequest.poll so the UI isn't blocked
+    """
+    return SuggestDeckRequest(taken_cards, metrics, configuration, workers).result()
 
-    return sorted_decks
 
+def build_deck(deck_type, cards, color, metrics, configuration, splash=None):
+    """The function will build a deck list that meets specific criteria
 
-def build_deck(deck_type, cards, color, metrics, configuration):
-    """The function will build a deck list that meets specific criteria"""
+       splash: color that's added to the deck colors; if it's None, the splash color is selected with color_splash
+    """
     minimum_distribution = deck_type.distribution
     maximum_card_count = deck_type.maximum_card_count
     maximum_deck_size = 40
@@ -1032,9 +1450,11 @@ def build_deck(deck_type, cards, color, metrics, configuration):
                                                   configuration.settings.bayesian_average_enabled)]
 
         # identify a splashable color
-        splash_threshold = metrics.mean + \
-            2.33 * metrics.standard_deviation
-        color += (color_splash(cards, color, splash_threshold, configuration))
+        if splash is None:
+            splash_threshold = metrics.mean + \
+                2.33 * metrics.standard_deviation
+            splash = color_splash(cards, color, splash_threshold, configuration)
+        color += splash
 
         card_colors_sorted = deck_card_search(
             cards, color, [constants.CARD_TYPE_CREATURE], True, True, False)
@@ -1062,9 +1482,9 @@ def build_deck(deck_type, cards, color, metrics, configuration):
 
         unused_creature_list.sort(key=lambda x: x["results"][0], reverse=True)
 
-        # Identify remaining cards that won't exceed recommeneded CMC average
-        cmc_cards, unused_creature_list = card_cmc_search(
-            unused_creature_list, 0, 0, unused_cmc_combined, recommended_creature_count - used_count)
+        # Identify the remaining cards with the highest combined rating that won't exceed the recommended CMC average
+        cmc_cards, unused_creature_list = select_cmc_cards(
+            unused_creature_list, unused_cmc_combined, recommended_creature_count - used_count)
 
         for card in cmc_cards:
             deck_list.append(card)
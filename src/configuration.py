@@ -41,6 +41,7 @@ class Settings(BaseModel):
     color_bonus_enabled: bool = False
     bayesian_average_enabled: bool = False
     draft_log_enabled: bool = True
+    draft_log_format: str = constants.DRAFT_LOG_FORMAT_RAW
     color_identity_enabled: bool = False
     current_draft_enabled: bool = True
     data_source_enabled: bool = True
@@ -79,6 +80,14 @@ class Settings(BaseModel):
             return cls.__fields__[field_name].default
         return value
 
+    @validator('draft_log_format')
+    def validate_draft_log_format(cls, value, field):
+        allowed_values = constants.DRAFT_LOG_FORMAT_LIST  # List of options
+        field_name = field.name
+        if value not in allowed_values:
+            return cls.__fields__[field_name].default
+        return value
+
     @validator('ui_size')
     def validate_ui_size(cls, value, field):
         allowed_values = constants.UI_SIZE_DICT  # List of options
@@ -95,6 +104,7 @@ class CardLogic(BaseModel):
     ratings_threshold: int = 500
     alsa_weight: float = 0.0
     iwd_weight: float = 0.0
+    sealed_explorer_time_budget: float = 3.0
     deck_mid: DeckType = DeckType(distribution=[
                                   0, 0, 4, 3, 2, 1, 0], maximum_card_count=23, recommended_creature_count=15, cmc_average=3.04)
     deck_aggro: DeckType = DeckType(distribution=[
@@ -154,6 +154,13 @@ UI_SIZE_DEFAULT = "100%"
 DRAFT_LOG_PREFIX = "DraftLog_"
 DRAFT_LOG_FOLDER = os.path.join(os.getcwd(), "Logs")
 
+DRAFT_LOG_FORMAT_RAW = "Raw"
+DRAFT_LOG_FORMAT_JSONL = "JSONL"
+DRAFT_LOG_FORMAT_JSONL_GZIP = "JSONL (gzip)"
+DRAFT_LOG_FORMAT_LIST = [DRAFT_LOG_FORMAT_RAW,
+                         DRAFT_LOG_FORMAT_JSONL,
+                         DRAFT_LOG_FORMAT_JSONL_GZIP]
+
 TIER_FOLDER = os.path.join(os.getcwd(), "Tier")
 TIER_FILE_PREFIX = "Tier_"
 
@@ -257,8 +264,12 @@ SETS_FOLDER = os.path.join(os.getcwd(), "Sets")
 SET_FILE_SUFFIX = "Data.json"
 
 CARD_RATINGS_BACKOFF_DELAY_SECONDS = 30
-CARD_RATINGS_INTER_DELAY_SECONDS = 1
+CARD_RATINGS_BACKOFF_BASE_SECONDS = 2
 CARD_RATINGS_ATTEMPT_MAX = 5
+CARD_RATINGS_WORKERS = 4
+CARD_RATINGS_RATE_LIMIT = 2.0
+CARD_RATINGS_BURST = 4
+CARD_RATINGS_REQUEST_TIMEOUT_SECONDS = 60
 
 SCRYFALL_REQUEST_BACKOFF_DELAY_SECONDS = 5
 SCRYFALL_REQUEST_ATTEMPT_MAX = 5
@@ -269,6 +280,12 @@ PLATFORM_ID_LINUX = "linux"
 
 LOG_NAME = "Player.log"
 
+LOG_MONITOR_CHECK_INTERVAL_MS = 50
+SUGGEST_DECK_CHECK_INTERVAL_MS = 50
+LOG_MONITOR_POLL_INTERVAL_SECONDS = 0.25
+LOG_MONITOR_COALESCE_SECONDS = 0.05
+LOG_MONITOR_BURST_MAX_SECONDS = 0.25
+
 LOG_LOCATION_WINDOWS = os.path.join('Users', getpass.getuser(
 ), "AppData", "LocalLow", "Wizards Of The Coast", "MTGA", LOG_NAME)
 LOG_LOCATION_OSX = os.path.join(
@@ -326,6 +343,15 @@ TABLE_STYLE = "Treeview"
 TEMP_FOLDER = os.path.join(os.getcwd(), "Temp")
 TEMP_LOCALIZATION_FILE = os.path.join(TEMP_FOLDER, "temp_localization.json")
 TEMP_CARD_DATA_FILE = os.path.join(TEMP_FOLDER, "temp_card_data.json")
+SCANNER_CHECKPOINT_FILE = os.path.join(TEMP_FOLDER, "scanner_checkpoint.json")
+SET_CATALOG_FILE = os.path.join(TEMP_FOLDER, "set_catalog.json")
+HTTP_CACHE_FOLDER = os.path.join(TEMP_FOLDER, "HTTPCache")
+HTTP_CACHE_MAX_SIZE_BYTES = 256 * 1024 * 1024
+HTTP_CACHE_TTL_SECONDS = 60 * 60
+LIMITED_SETS_CACHE_TTL_SECONDS = 12 * 60 * 60
+DOWNLOAD_STAGING_FOLDER = os.path.join(TEMP_FOLDER, "Staging")
+DOWNLOAD_STAGING_MAX_AGE_SECONDS = 12 * 60 * 60
+SCANNER_CHECKPOINT_INTERVAL_SECONDS = 5
 
 BW_ROW_COLOR_ODD_TAG = "bw_odd"
 BW_ROW_COLOR_EVEN_TAG = "bw_even"
@@ -361,6 +387,9 @@ CARD_TYPE_ENCHANTMENT = "Enchantment"
 CARD_TYPE_ARTIFACT = "Artifact"
 CARD_TYPE_LAND = "Land"
 
+CARD_TYPE_LIST = [CARD_TYPE_CREATURE, CARD_TYPE_PLANESWALKER, CARD_TYPE_INSTANT, CARD_TYPE_SORCERY,
+                  CARD_TYPE_ENCHANTMENT, CARD_TYPE_ARTIFACT, CARD_TYPE_LAND]
+
 CARD_TYPE_SELECTION_ALL = "All Cards"
 CARD_TYPE_SELECTION_CREATURES = "Creatures"
 CARD_TYPE_SELECTION_NONCREATURES = "Noncreatures"
@@ -0,0 +1,82 @@
+"""This module contains the staging area for the 17Lands card ratings downloads
+
+Each color response is written to the staging area as soon as it's downloaded, in a folder that's keyed by the set
+code, draft format, and date range. If the download fails, the next attempt for the same key only requests the colors
+that are missing from the folder. The folder is removed once the set file is exported.
+
+Staged responses expire after DOWNLOAD_STAGING_MAX_AGE_SECONDS, since 17Lands updates the card data once a day.
+"""
+import os
+import re
+import json
+import time
+import shutil
+from src import constants
+from src.payload_decoder import json_loads
+from src.logger import create_logger
+
+logger = create_logger()
+
+
+def staging_key(set_code, draft, start_date, end_date):
+    '''Return the name of the staging folder for a set download'''
+    return re.sub(r"[^\w\-]", "", "_".join((set_code, draft, start_date, end_date)))
+
+
+class DownloadStaging:
+    '''Class that stores the color responses of the incomplete set downloads'''
+
+    def __init__(self, directory: str = constants.DOWNLOAD_STAGING_FOLDER,
+                 max_age: float = constants.DOWNLOAD_STAGING_MAX_AGE_SECONDS,
+                 clock=time.time):
+        self.directory = directory
+        self.max_age = max_age
+        self.clock = clock
+
+    def __location(self, key, color):
+        return os.path.join(self.directory, key, f"{color}.json")
+
+    def stage(self, key, color, data):
+        '''Write a color response to the staging area. Returns True if the response was written'''
+        result = False
+        try:
+            location = self.__location(key, color)
+            os.makedirs(os.path.dirname(location), exist_ok=True)
+            temp_file = location + ".tmp"
+            with open(temp_file, 'w', encoding="utf-8", errors="replace") as file:
+                json.dump(data, file)
+            os.replace(temp_file, location)
+            result = True
+        except Exception as error:
+            logger.error(error)
+        return result
+
+    def load(self, key, color):
+        '''Read a staged color response, or return None if it's missing or expired'''
+        data = None
+        try:
+            location = self.__location(key, color)
+            if self.clock() - os.path.getmtime(location) < self.max_age:
+                with open(location, 'rb') as file:
+                    data = json_loads(file.read())
+        except FileNotFoundError:
+            pass
+        except Exception as error:
+            logger.error(error)
+        return data
+
+    def load_colors(self, key, colors):
+        '''Return a dictionary of the staged responses for a list of colors'''
+        staged = {}
+        for color in colors:
+            data = self.load(key, color)
+            if data is not None:
+                staged[color] = data
+        return staged
+
+    def clear(self, key):
+        '''Remove the staging folder for a set download'''
+        try:
+            shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+        except Exception as error:
+            logger.error(error)
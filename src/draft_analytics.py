@@ -0,0 +1,249 @@
+"""This module contains the batch analytics that aggregate personal card statistics over a directory of draft logs
+
+Usage: python -m src.draft_analytics [Logs] [--output Logs/draft_analytics.csv] [--workers 4]
+
+The logs are replayed in a process pool. Each worker returns a small per-card summary for its log, and the summaries
+are folded into the totals as they complete. Only a bounded number of logs are in flight at any time, so the memory
+usage depends on the number of distinct cards rather than the number of logs.
+"""
+import os
+import sys
+import csv
+import fnmatch
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from src import constants
+from src.draft_replay import DraftReplay
+from src.draft_log import is_event_log, draft_log_name
+from src.file_extractor import check_file_integrity, Result
+from src.limited_sets import LimitedSets, TEMP_LIMITED_SETS
+from src.scanner_events import DraftStarted, PackSeen, PickMade
+from src.logger import create_logger
+
+logger = create_logger()
+
+DRAFT_LOG_PATTERNS = [f"{constants.DRAFT_LOG_PREFIX}*{x}" for x in (".log", ".jsonl", ".jsonl.gz")]
+ANALYTICS_OUTPUT_FILE = os.path.join(constants.DRAFT_LOG_FOLDER, "draft_analytics.csv")
+ANALYTICS_TASKS_PER_WORKER = 4
+ANALYTICS_FIELDS = ["set", "format", "card", "name", "drafts", "seen", "taken",
+                    "take_rate", "avg_pick", "alsa", "ata", "pick_vs_alsa"]
+
+# Index of the values in the per-card lists that are returned by the workers
+SEEN_INDEX = 0
+TAKEN_INDEX = 1
+PICK_TOTAL_INDEX = 2
+
+worker_set_list = None
+
+
+@dataclass
+class CardStats:
+    '''Personal statistics for a card
+       - seen: number of packs that contained the card
+       - taken: number of times that the card was picked
+       - pick_total: sum of the pick numbers (within the pack) at which the card was picked
+    '''
+    seen: int = 0
+    taken: int = 0
+    pick_total: int = 0
+
+    @property
+    def take_rate(self):
+        return self.taken / self.seen if self.seen else 0.0
+
+    @property
+    def avg_pick(self):
+        return self.pick_total / self.taken if self.taken else 0.0
+
+
+def initialize_worker(set_list):
+    '''Store the set list in the worker process so that it isn't sent with every task'''
+    global worker_set_list
+    worker_set_list = set_list
+
+
+def summarize_log(filename, set_list=None):
+    '''Replay a draft log and return the per-card values for each (set, format) in the log
+
+       Returns a dictionary of {(set, format): {"drafts": count, "cards": {card: [seen, taken, pick_total]}}}
+    '''
+    summary = {}
+    current = None
+
+    def collect_event(timed_event):
+        nonlocal current
+        event = timed_event.event
+        if isinstance(event, DraftStarted):
+            key = (event.sets[0] if event.sets else "UNKN", event.event_type)
+            current = summary.setdefault(key, {"drafts": 0, "cards": {}})
+            current["drafts"] += 1
+        elif current is None:
+            return
+        elif isinstance(event, PackSeen):
+            for card in event.cards:
+                current["cards"].setdefault(card, [0, 0, 0])[SEEN_INDEX] += 1
+        elif isinstance(event, PickMade):
+            values = current["cards"].setdefault(event.card, [0, 0, 0])
+            values[TAKEN_INDEX] += 1
+            values[PICK_TOTAL_INDEX] += event.pick
+
+    try:
+        replay = DraftReplay(filename, set_list if set_list is not None else worker_set_list,
+                             on_event=collect_event)
+        replay.run()
+    except Exception as error:
+        logger.error(error)
+    return summary
+
+
+def find_draft_logs(directory, patterns=None):
+    '''Lazily yield the raw and compact draft logs within a directory
+
+       A raw log is skipped if the directory also contains a compact log of the same draft (e.g., a log that was
+       converted with src/draft_log.py), so the draft isn't counted twice
+    '''
+    patterns = patterns or DRAFT_LOG_PATTERNS
+    with os.scandir(directory) as entries:
+        names = [x.name for x in entries
+                 if x.is_file() and any(fnmatch.fnmatch(x.name, pattern) for pattern in patterns)]
+    converted = {draft_log_name(x) for x in names if is_event_log(x)}
+    for name in names:
+        if is_event_log(name) or draft_log_name(name) not in converted:
+            yield os.path.join(directory, name)
+
+
+class DraftAnalytics:
+    '''Class that aggregates the per-card statistics from a collection of draft logs'''
+
+    def __init__(self, set_list, sets_location: str = constants.SETS_FOLDER):
+        self.set_list = set_list
+        self.sets_location = sets_location
+        self.totals = {}
+        self.drafts = {}
+        self.logs = 0
+
+    def add_summary(self, summary):
+        '''Fold the summary of a single log into the totals'''
+        self.logs += 1
+        for key, data in summary.items():
+            self.drafts[key] = self.drafts.get(key, 0) + data["drafts"]
+            cards = self.totals.setdefault(key, {})
+            for card, (seen, taken, pick_total) in data["cards"].items():
+                stats = cards.get(card)
+                if stats is None:
+                    stats = cards[card] = CardStats()
+                stats.seen += seen
+                stats.taken += taken
+                stats.pick_total += pick_total
+
+    def process(self, files, workers=None, progress=None):
+        '''Summarize the logs in a process pool and aggregate the summaries as they complete
+
+           files: iterable of log paths; it's consumed lazily
+           progress: optional function that's called with the number of processed logs
+        '''
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            for filename in files:
+                self.add_summary(summarize_log(filename, self.set_list))
+                if progress:
+                    progress(self.logs)
+            return self.logs
+
+        max_pending = workers * ANALYTICS_TASKS_PER_WORKER
+        files = iter(files)
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=initialize_worker,
+                                 initargs=(self.set_list,)) as executor:
+            pending = set()
+            while True:
+                # Keep the pool busy without queuing every log at once
+                for filename in files:
+                    pending.add(executor.submit(summarize_log, filename))
+                    if len(pending) >= max_pending:
+                        break
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        self.add_summary(future.result())
+                    except Exception as error:
+                        logger.error(error)
+                if progress:
+                    progress(self.logs)
+        return self.logs
+
+    def __load_set_ratings(self, set_code, event_type):
+        '''Return the card ratings from the set file that matches the set and format
+
+           The PremierDraft file is used if there isn't a file for the format
+        '''
+        for draft_format in (event_type, constants.LIMITED_TYPE_STRING_DRAFT_PREMIER):
+            location = os.path.join(self.sets_location,
+                                    "_".join((set_code, draft_format, constants.SET_FILE_SUFFIX)))
+            result, json_data = check_file_integrity(location)
+            if result == Result.VALID:
+                return json_data["card_ratings"]
+        return {}
+
+    def rows(self):
+        '''Yield the output rows, grouped by set and format and sorted by the number of times the card was taken'''
+        for (set_code, event_type), cards in sorted(self.totals.items()):
+            ratings = self.__load_set_ratings(set_code, event_type)
+            for card, stats in sorted(cards.items(), key=lambda x: (-x[1].taken, -x[1].seen, x[0])):
+                card_data = ratings.get(card, {})
+                deck_colors = card_data.get(constants.DATA_FIELD_DECK_COLORS, {}).get(
+                    constants.FILTER_OPTION_ALL_DECKS, {})
+                alsa = deck_colors.get(constants.DATA_FIELD_ALSA, 0.0)
+                ata = deck_colors.get(constants.DATA_FIELD_ATA, 0.0)
+                yield {"set": set_code,
+                       "format": event_type,
+                       "card": card,
+                       "name": card_data.get(constants.DATA_FIELD_NAME, ""),
+                       "drafts": self.drafts.get((set_code, event_type), 0),
+                       "seen": stats.seen,
+                       "taken": stats.taken,
+                       "take_rate": round(stats.take_rate, 3),
+                       "avg_pick": round(stats.avg_pick, 2),
+                       "alsa": alsa,
+                       "ata": ata,
+                       "pick_vs_alsa": round(stats.avg_pick - alsa, 2) if (stats.taken and alsa) else ""}
+
+    def write_csv(self, output_file):
+        '''Write the aggregated statistics to a CSV file'''
+        result = False
+        try:
+            with open(output_file, 'w', encoding="utf-8", newline="") as file:
+                writer = csv.DictWriter(file, fieldnames=ANALYTICS_FIELDS)
+                writer.writeheader()
+                writer.writerows(self.rows())
+            result = True
+        except Exception as error:
+            logger.error(error)
+        return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", nargs="?", default=constants.DRAFT_LOG_FOLDER)
+    parser.add_argument("-o", "--output", default=ANALYTICS_OUTPUT_FILE)
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("--pattern", nargs="+", default=DRAFT_LOG_PATTERNS)
+    parser.add_argument("--sets", default=TEMP_LIMITED_SETS,
+                        help="sets file that's used to identify the set codes")
+    parser.add_argument("--sets-folder", default=constants.SETS_FOLDER)
+    args = parser.parse_args(argv)
+
+    set_list, _ = LimitedSets(args.sets).read_sets_file()
+    analytics = DraftAnalytics(set_list, args.sets_folder)
+    analytics.process(find_draft_logs(args.directory, args.pattern), args.workers)
+    if not analytics.write_csv(args.output):
+        return 1
+    print(f"Processed {analytics.logs} logs, wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""This module contains the functions that are used for writing and reading the compact draft event logs
+
+A compact draft log stores one JSON object per scanner event (e.g., {"event":"PickMade","pack":1,"pick":2,"card":"87003",
+"time":1687309323}) instead of the raw Arena log lines, which can be tens of KB each. The log can be gzip-compressed.
+
+Usage: python -m src.draft_log Logs/DraftLog_*.log [--gzip] [--output-dir Logs]
+Converts raw draft logs to the compact format.
+"""
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import logging
+import argparse
+from datetime import datetime
+from dataclasses import asdict
+from src import constants
+from src.log_scanner import ArenaScanner
+from src.limited_sets import LimitedSets, TEMP_LIMITED_SETS
+from src.scanner_events import ScannerEvent, DraftStarted, DraftResumed, event_from_dict
+from src.logger import create_logger, set_draft_event_log_file, DRAFT_EVENT_LOGGER_NAME
+
+logger = create_logger()
+
+EVENT_LOG_EXTENSION = ".jsonl"
+GZIP_EXTENSION = ".gz"
+EVENT_LOG_EXTENSIONS = (EVENT_LOG_EXTENSION, EVENT_LOG_EXTENSION + GZIP_EXTENSION)
+RAW_LOG_EXTENSION = ".log"
+
+# Timestamp that prefixes each line within a raw draft log (e.g., <21062023 01:02:03>,)
+RAW_TIMESTAMP_PATTERN = re.compile(rb"<(\d{8} \d{2}:\d{2}:\d{2})>,")
+RAW_TIMESTAMP_FORMAT = "%d%m%Y %H:%M:%S"
+
+
+def is_event_log(filename):
+    '''Check if a file is a compact draft log'''
+    return filename.endswith(EVENT_LOG_EXTENSIONS)
+
+
+def draft_log_name(filename):
+    '''Return the file name of a raw or compact draft log without its extension'''
+    base_name = os.path.basename(filename)
+    for extension in (EVENT_LOG_EXTENSION + GZIP_EXTENSION, EVENT_LOG_EXTENSION, RAW_LOG_EXTENSION):
+        if base_name.endswith(extension):
+            return base_name[:-len(extension)]
+    return base_name
+
+
+def event_log_name(card_set, event_type, draft_id, compress):
+    '''Return the file name of the compact draft log for a draft'''
+    extension = EVENT_LOG_EXTENSION + (GZIP_EXTENSION if compress else "")
+    return f"{constants.DRAFT_LOG_PREFIX}{card_set}_{event_type}_{draft_id}{extension}"
+
+
+def serialize_event(event: ScannerEvent, timestamp):
+    '''Return the compact JSON line for an event. The log offset is dropped since it only applies to the Arena log'''
+    data = event.to_dict()
+    del data["offset"]
+    data["time"] = int(timestamp)
+    return json.dumps(data, separators=(",", ":"))
+
+
+def open_event_log(filename, mode="rt"):
+    '''Open a compact draft log, decompressing it if necessary'''
+    if filename.endswith(GZIP_EXTENSION):
+        return gzip.open(filename, mode, encoding="utf-8")
+    return open(filename, mode, encoding="utf-8")
+
+
+def read_event_log(filename):
+    '''Yield the events from a compact draft log'''
+    with open_event_log(filename) as log:
+        for line in log:
+            if line.strip():
+                yield event_from_dict(json.loads(line))
+
+
+class DraftEventLog:
+    '''ArenaScanner listener that records the scanner events in a compact draft log
+
+       The records are sent through the draftEventLog logger, so they're written from the queue listener thread
+       and the scanner controls the logging level (see ArenaScanner.log_enable)
+
+       The DraftStarted record is written before the first record that's logged while logging is enabled. A resumed
+       draft (DraftResumed) appends to the existing log, so its DraftStarted record is only written if the log is new
+    '''
+
+    def __init__(self, log_folder: str = constants.DRAFT_LOG_FOLDER, compress: bool = False):
+        self.log_folder = log_folder
+        self.__compress = compress
+        self.event_log = logging.getLogger(DRAFT_EVENT_LOGGER_NAME)
+        self.draft_event = None
+        self.draft_time = 0
+        self.start_pending = False
+
+    @property
+    def compress(self):
+        return self.__compress
+
+    @compress.setter
+    def compress(self, compress):
+        '''Change the log format. The log of the current draft is reopened with the new format'''
+        changed = compress != self.__compress
+        self.__compress = compress
+        if changed and self.draft_event:
+            try:
+                self.__open_log(self.draft_event, True)
+            except Exception as error:
+                logger.error(error)
+
+    def __open_log(self, event, resumed):
+        '''Direct the records to the log of a draft'''
+        card_set = event.sets[0] if event.sets else "UNKN"
+        log_path = os.path.join(self.log_folder, event_log_name(
+            card_set, event.event_type, event.draft_id, self.__compress))
+        set_draft_event_log_file(log_path, self.__compress)
+        self.start_pending = not resumed or not os.path.exists(log_path)
+
+    def __call__(self, event):
+        try:
+            if isinstance(event, DraftStarted):
+                self.draft_event = DraftStarted(**asdict(event))
+                self.draft_time = time.time()
+                self.__open_log(event, isinstance(event, DraftResumed))
+            if self.event_log.isEnabledFor(logging.INFO):
+                if self.start_pending:
+                    self.start_pending = False
+                    self.event_log.info(serialize_event(self.draft_event, self.draft_time))
+                if not isinstance(event, DraftStarted):
+                    self.event_log.info(serialize_event(event, time.time()))
+        except Exception as error:
+            logger.error(error)
+
+
+def raw_line_timestamp(data, line_end):
+    '''Return the timestamp of the raw draft log line that ends at line_end, or 0 if the line isn't timestamped'''
+    line_start = data.rfind(b"\n", 0, max(line_end - 1, 0)) + 1
+    match = RAW_TIMESTAMP_PATTERN.match(data, line_start)
+    if match:
+        return datetime.strptime(match.group(1).decode(), RAW_TIMESTAMP_FORMAT).timestamp()
+    return 0
+
+
+def convert_draft_log(filename, set_list, output_folder=None, compress=False):
+    '''Convert a raw draft log into a compact draft log. Returns the path of the new log, or an empty string'''
+    output_path = ""
+    try:
+        events = []
+        scanner = ArenaScanner(filename, set_list, checkpoint_file=None, catch_up=False)
+        scanner.log_enable(False)
+        scanner.add_listener(events.append)
+        scanner.draft_start_search()
+
+        with open(filename, 'rb') as log:
+            data = log.read()
+
+        output_path = os.path.join(output_folder or os.path.dirname(filename),
+                                   draft_log_name(filename) + EVENT_LOG_EXTENSION + (GZIP_EXTENSION if compress else ""))
+        with open_event_log(output_path, "wt") as log:
+            for event in events:
+                log.write(serialize_event(event, raw_line_timestamp(data, event.offset)) + "\n")
+    except Exception as error:
+        logger.error(error)
+        output_path = ""
+    return output_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert raw draft logs to the compact draft log format")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--output-dir", default=None)
+    parser.add_argument("--sets", default=TEMP_LIMITED_SETS,
+                        help="sets file that's used to identify the set codes")
+    args = parser.parse_args(argv)
+
+    set_list, _ = LimitedSets(args.sets).read_sets_file()
+
+    result = 0
+    for filename in args.files:
+        output_path = convert_draft_log(filename, set_list, args.output_dir, args.gzip)
+        if output_path:
+            print(f"{filename} ({os.path.getsize(filename)} bytes) -> "
+                  f"{output_path} ({os.path.getsize(output_path)} bytes)")
+        else:
+            result = 1
+    return result
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""This module contains the headless replay engine that feeds a draft log or a Player.log through the ArenaScanner
+
+Compact draft logs (see src/draft_log.py) already contain the scanner events, so they're read back directly.
+
+Usage: python -m src.draft_replay Logs/DraftLog_LTR_PremierDraft_abc123.log [--events] [--sets Temp/temp_set_list.json]
+
+The whole file is parsed in a single pass, without the catch-up search, so every draft in the file is replayed.
+Each ScannerEvent is reported with the time that the scanner spent between the previous event and the event.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from dataclasses import dataclass, field
+from typing import List, Callable
+from src.log_scanner import ArenaScanner
+from src.log_tailer import TAILER_CHUNK_SIZE
+from src.limited_sets import LimitedSets, TEMP_LIMITED_SETS
+from src.scanner_events import ScannerEvent
+from src.draft_log import is_event_log, read_event_log
+from src.logger import create_logger
+
+logger = create_logger()
+
+
+@dataclass
+class TimedEvent:
+    '''A scanner event along with the time that it took to parse it
+       - elapsed: seconds between the previous event (or the start of the replay) and this event
+       - timestamp: seconds between the start of the replay and this event
+    '''
+    event: ScannerEvent
+    elapsed: float = 0.0
+    timestamp: float = 0.0
+
+    def to_dict(self):
+        return {**self.event.to_dict(),
+                "elapsed_us": round(self.elapsed * 1e6, 1),
+                "timestamp_us": round(self.timestamp * 1e6, 1)}
+
+
+@dataclass
+class ReplayResult:
+    '''The event stream and the scanner metrics for a replayed file'''
+    filename: str = ""
+    events: List[TimedEvent] = field(default_factory=list)
+    duration: float = 0.0
+    bytes_read: int = 0
+    lines_decoded: int = 0
+    lines_matched: int = 0
+
+    @property
+    def megabytes_per_second(self):
+        return (self.bytes_read / (1024 * 1024)) / self.duration if self.duration else 0.0
+
+    @property
+    def events_per_second(self):
+        return len(self.events) / self.duration if self.duration else 0.0
+
+    def event_timings(self):
+        '''Return the count, mean, and maximum parse time, in seconds, for each event type'''
+        timings = {}
+        for timed_event in self.events:
+            timings.setdefault(timed_event.event.name, []).append(timed_event.elapsed)
+        return {name: (len(values), sum(values) / len(values), max(values))
+                for name, values in timings.items()}
+
+
+class DraftReplay:
+    '''Class that replays a log file through the ArenaScanner as fast as possible'''
+
+    def __init__(self, filename, set_list, chunk_size: int = TAILER_CHUNK_SIZE, on_event: Callable = None):
+        self.filename = filename
+        self.set_list = set_list
+        self.chunk_size = chunk_size
+        self.on_event = on_event
+        self.__start_time = 0.0
+        self.__event_time = 0.0
+        self.__result = None
+
+    def run(self):
+        '''Parse the file and return a ReplayResult with the timed event stream'''
+        self.__result = ReplayResult(filename=self.filename)
+        if is_event_log(self.filename):
+            return self.__read_event_log()
+        try:
+            scanner = ArenaScanner(self.filename, self.set_list,
+                                   checkpoint_file=None, catch_up=False)
+            scanner.log_enable(False)
+            scanner.tailer.chunk_size = self.chunk_size
+            scanner.add_listener(self.__record_event)
+
+            self.__start_time = self.__event_time = time.perf_counter()
+            scanner.draft_start_search()
+            self.__result.duration = time.perf_counter() - self.__start_time
+
+            metrics = scanner.tailer.metrics
+            self.__result.bytes_read = metrics.bytes_read
+            self.__result.lines_decoded = metrics.lines_decoded
+            self.__result.lines_matched = metrics.lines_matched
+        except Exception as error:
+            logger.error(error)
+        return self.__result
+
+    def __read_event_log(self):
+        '''Read the events from a compact draft log'''
+        try:
+            self.__start_time = self.__event_time = time.perf_counter()
+            for event in read_event_log(self.filename):
+                self.__result.lines_decoded += 1
+                self.__result.lines_matched += 1
+                self.__record_event(event)
+            self.__result.duration = time.perf_counter() - self.__start_time
+            self.__result.bytes_read = os.path.getsize(self.filename)
+        except Exception as error:
+            logger.error(error)
+        return self.__result
+
+    def __record_event(self, event):
+        '''Scanner listener that timestamps each event'''
+        current_time = time.perf_counter()
+        timed_event = TimedEvent(event=event,
+                                 elapsed=current_time - self.__event_time,
+                                 timestamp=current_time - self.__start_time)
+        self.__result.events.append(timed_event)
+        if self.on_event:
+            self.on_event(timed_event)
+        # Exclude the time spent in on_event from the next event
+        self.__event_time = time.perf_counter()
+
+
+def print_summary(result, output=sys.stdout):
+    '''Print the throughput and the per-event timings of a replay'''
+    print(f"{result.filename}: {len(result.events)} events, {result.bytes_read} bytes, "
+          f"{result.lines_matched}/{result.lines_decoded} lines matched/decoded in {result.duration * 1000:.2f} ms "
+          f"({result.megabytes_per_second:.1f} MB/s, {result.events_per_second:.0f} events/s)", file=output)
+    for name, (count, mean, maximum) in result.event_timings().items():
+        print(f"    {name:<14}{count:>8}  mean {mean * 1e6:>10.1f} us  max {maximum * 1e6:>10.1f} us",
+              file=output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--sets", default=TEMP_LIMITED_SETS,
+                        help="sets file that's used to identify the set codes")
+    parser.add_argument("--events", action="store_true",
+                        help="print each event as a JSON line")
+    parser.add_argument("--chunk-size", type=int, default=TAILER_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    set_list, _ = LimitedSets(args.sets).read_sets_file()
+
+    def print_event(timed_event):
+        print(json.dumps(timed_event.to_dict()))
+
+    for filename in args.files:
+        replay = DraftReplay(filename, set_list, args.chunk_size,
+                             print_event if args.events else None)
+        print_summary(replay.run())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,21 @@
 """This module contains the functions and classes that are used for building the set files and communicating with platforms"""
-from enum import Enum
 from urllib.parse import quote as urlencode
 from typing import Tuple
 import sys
 import os
 import time
 import json
-import urllib.request
 import datetime
-import ssl
 import itertools
 import re
 import sqlite3
 import copy
 from src import constants
+from src.set_catalog import Result, check_file_integrity, retrieve_local_set_list, retrieve_set_catalog
+from src.ratings_matrix import export_ratings_matrix
+from src.ratings_downloader import RatingsDownloader, card_ratings_url
+from src.http_client import default_client
+from src.download_staging import DownloadStaging, staging_key
 from src.logger import create_logger
 
 logger = create_logger()
@@ -28,13 +30,6 @@ if not os.path.exists(constants.TEMP_FOLDER):
     os.makedirs(constants.TEMP_FOLDER)
 
 
-class Result(Enum):
-    '''Enumeration class for file integrity results'''
-    VALID = 0
-    ERROR_MISSING_FILE = 1
-    ERROR_UNREADABLE_FILE = 2
-
-
 def initialize_card_data(card_data):
     card_data[constants.DATA_FIELD_DECK_COLORS] = {}
     for color in constants.DECK_COLORS:
@@ -76,38 +71,6 @@ def decode_mana_cost(encoded_cost):
     return decoded_cost, cmc
 
 
-def retrieve_local_set_list(sets):
-    '''Scans the Sets folder and returns a list of valid set files'''
-    file_list = []
-    main_sets = [v.seventeenlands[0] for k, v in sets.items()]
-    for file in os.listdir(constants.SETS_FOLDER):
-        try:
-            name_segments = file.split("_")
-            if len(name_segments) == 3:
-
-                if ((name_segments[0].upper() in main_sets) and
-                    (name_segments[1] in constants.LIMITED_TYPES_DICT) and
-                        (name_segments[2] == constants.SET_FILE_SUFFIX)):
-
-                    set_name = list(sets.keys())[list(
-                        main_sets).index(name_segments[0].upper())]
-                    result, json_data = check_file_integrity(
-                        os.path.join(constants.SETS_FOLDER, file))
-                    if result == Result.VALID:
-                        if json_data["meta"]["version"] == 1:
-                            start_date, end_date = json_data["meta"]["date_range"].split(
-                                "->")
-                        else:
-                            start_date = json_data["meta"]["start_date"]
-                            end_date = json_data["meta"]["end_date"]
-                        file_list.append(
-                            (set_name, name_segments[1], start_date, end_date))
-        except Exception as error:
-            logger.error(error)
-
-    return file_list
-
-
 def search_arena_log_locations(input_location=None):
     '''Searches local directories for the location of the Arena Player.log file'''
     log_location = ""
@@ -219,59 +182,10 @@ def check_date(date):
     return result
 
 
-def check_file_integrity(filename):
-    '''Extracts data from a file to determine if it's formatted correctly'''
-    result = Result.VALID
-    json_data = {}
-
-    try:
-        with open(filename, 'r', encoding="utf-8", errors="replace") as json_file:
-            json_data = json_file.read()
-    except FileNotFoundError:
-        return Result.ERROR_MISSING_FILE, json_data
-
-    try:
-        json_data = json.loads(json_data)
-
-        if json_data.get("meta"):
-            meta = json_data["meta"]
-            version = meta.get("version")
-            if version == 1:
-                meta.get("date_range", "").split("->")
-            else:
-                meta.get("start_date")
-                meta.get("end_date")
-        else:
-            return Result.ERROR_UNREADABLE_FILE, json_data
-
-        cards = json_data.get("card_ratings")
-        if isinstance(cards, dict) and len(cards) >= 100:
-            for card in cards.values():
-                card.get(constants.DATA_FIELD_NAME)
-                card.get(constants.DATA_FIELD_COLORS)
-                card.get(constants.DATA_FIELD_CMC)
-                card.get(constants.DATA_FIELD_TYPES)
-                card.get("mana_cost")
-                card.get(constants.DATA_SECTION_IMAGES)
-                deck_colors = card.get(constants.DATA_FIELD_DECK_COLORS, {}).get(
-                    constants.FILTER_OPTION_ALL_DECKS, {})
-                deck_colors.get(constants.DATA_FIELD_GIHWR)
-                deck_colors.get(constants.DATA_FIELD_ALSA)
-                deck_colors.get(constants.DATA_FIELD_IWD)
-                break
-        else:
-            return Result.ERROR_UNREADABLE_FILE, json_data
-
-    except json.JSONDecodeError:
-        return Result.ERROR_UNREADABLE_FILE, json_data
-
-    return result, json_data
-
-
 class FileExtractor:
     '''Class that handles the creation of set files and the retrieval of platform information'''
 
-    def __init__(self, directory):
+    def __init__(self, directory, client=None, staging=None, downloader=None):
         self.selected_sets = []
         self.set_list = []
         self.draft = ""
@@ -279,7 +193,9 @@ class FileExtractor:
         self.start_date = ""
         self.end_date = ""
         self.directory = directory
-        self.context = ssl.SSLContext()
+        self.client = client or default_client()
+        self.staging = staging or DownloadStaging()
+        self.downloader = downloader
         self.card_ratings = {}
         self.combined_data = {
             "meta": {"collection_date": str(datetime.datetime.now())}}
@@ -339,6 +255,20 @@ class FileExtractor:
 
         return result, result_string, temp_size
 
+    def extract_card_data(self, ui_root, status, database_size=0):
+        '''Wrapper function for building the temporary card data file from the local Arena files
+
+           Returns the size of the Arena card database, or 0 if the database couldn't be extracted
+        '''
+        temp_size = 0
+        try:
+            _, _, temp_size = self._retrieve_local_arena_data(
+                ui_root, status, database_size)
+        except Exception as error:
+            logger.error(error)
+
+        return temp_size
+
     def _download_expansion(self, ui_root, progress_bar, status, database_size):
         ''' Function that performs the following steps:
             1. Build a card data file from local Arena files (stored as temp_card_data.json in the Temp folder)
@@ -739,8 +669,7 @@ class FileExtractor:
                     root.update()
                     url = "https://api.scryfall.com/cards/search?order=set&unique=prints&q=e" + \
                         urlencode(':', safe='') + f"{card_set}"
-                    url_data = urllib.request.urlopen(
-                        url, context=self.context).read()
+                    url_data = self.client.get(url)
 
                     set_json_data = json.loads(url_data)
 
@@ -749,8 +678,7 @@ class FileExtractor:
 
                     while set_json_data["has_more"]:
                         url = set_json_data["next_page"]
-                        url_data = urllib.request.urlopen(
-                            url, context=self.context).read()
+                        url_data = self.client.get(url)
                         set_json_data = json.loads(url_data)
                         result, result_string = self._process_scryfall_data(
                             set_json_data["data"])
@@ -780,53 +708,52 @@ class FileExtractor:
         for data in self.card_dict.values():
             initialize_card_data(data)
 
-    def retrieve_17lands_data(self, sets, deck_colors, root, progress, initial_progress, status):
-        '''Use the 17Lands endpoint to download the card ratings data for all of the deck filter options'''
+    def retrieve_17lands_data(self, sets, deck_colors, root, progress, initial_progress, status, downloader=None):
+        '''Use the 17Lands endpoint to download the card ratings data for all of the deck filter options
+
+           The deck colors are requested concurrently (see src/ratings_downloader.py), and the responses are
+           processed in the order of deck_colors. Each response is staged as soon as it's downloaded
+           (see src/download_staging.py), so a failed download resumes with the colors that are missing.
+        '''
         self.card_ratings = {}
         current_progress = 0
         result = False
-        url = ""
+        downloader = downloader or self.downloader or RatingsDownloader(self.client)
         for set_code in sets:
-            for color in deck_colors:
-                retry = constants.CARD_RATINGS_ATTEMPT_MAX
-                result = False
-                while retry:
-
-                    try:
-                        status.set(f"Collecting {color} 17Lands Data")
-                        root.update()
-                        url = f"https://www.17lands.com/card_ratings/data?expansion={set_code}&format={self.draft}&start_date={self.start_date}&end_date={self.end_date}"
-
-                        if color != constants.FILTER_OPTION_ALL_DECKS:
-                            url += "&colors=" + color
-                        url_data = urllib.request.urlopen(
-                            url, context=self.context).read()
+            key = staging_key(set_code, self.draft, self.start_date, self.end_date)
+            responses = self.staging.load_colors(key, deck_colors)
+            requests = [(color, card_ratings_url(downloader.base_url, set_code, self.draft,
+                                                 self.start_date, self.end_date, color))
+                        for color in deck_colors if color not in responses]
+            completed = len(responses)
+            current_progress += completed * (3 / len(sets))
+            progress['value'] = current_progress + initial_progress
+
+            def update_progress(download_result):
+                nonlocal completed, current_progress
+                if not download_result.success:
+                    if download_result.attempts:
+                        status.set(f"Collecting {download_result.key} 17Lands Data - Request Failed "
+                                   f"({download_result.attempts}/{downloader.attempts})")
+                    return
+                self.staging.stage(key, download_result.key, download_result.data)
+                responses[download_result.key] = download_result.data
+                completed += 1
+                current_progress += (3 / len(sets))
+                progress['value'] = current_progress + initial_progress
+                status.set(f"Collecting 17Lands Data ({completed}/{len(deck_colors)})")
+
+            status.set(f"Collecting 17Lands Data ({completed}/{len(deck_colors)})")
+            root.update()
+            if requests:
+                downloader.download(requests, update_progress, root.update)
+            result = all(x in responses for x in deck_colors)
+            if not result:
+                break
 
-                        set_json_data = json.loads(url_data)
-                        self._process_17lands_data(color, set_json_data)
-                        result = True
-                        break
-                    except Exception as error:
-                        logger.error(url)
-                        logger.error(error)
-                        retry -= 1
-
-                        if retry:
-                            attempt_count = constants.CARD_RATINGS_ATTEMPT_MAX - retry
-                            status.set(
-                                f"""Collecting {color} 17Lands Data - Request Failed ({attempt_count}/{constants.CARD_RATINGS_ATTEMPT_MAX}) - Retry in {constants.CARD_RATINGS_BACKOFF_DELAY_SECONDS} seconds""")
-                            root.update()
-                            time.sleep(
-                                constants.CARD_RATINGS_BACKOFF_DELAY_SECONDS)
-
-                if result:
-                    current_progress += (3 /
-                                         len(self.selected_sets.seventeenlands))
-                    progress['value'] = current_progress + initial_progress
-                    root.update()
-                else:
-                    break
-                time.sleep(constants.CARD_RATINGS_INTER_DELAY_SECONDS)
+            for color in deck_colors:
+                self._process_17lands_data(color, responses[color])
+            root.update()
 
         return result
 
@@ -843,7 +770,7 @@ class FileExtractor:
         '''Use 17Lands endpoint to collect the data from the color_ratings page'''
         try:
             url = f"https://www.17lands.com/color_ratings/data?expansion={self.selected_sets.seventeenlands[0]}&event_type={self.draft}&start_date={self.start_date}&end_date={self.end_date}&combine_splash=true"
-            url_data = urllib.request.urlopen(url, context=self.context).read()
+            url_data = self.client.get(url)
 
             color_json_data = json.loads(url_data)
             self._process_17lands_color_ratings(color_json_data)
@@ -1018,22 +945,34 @@ class FileExtractor:
 
         return result
 
-    def export_card_data(self):
-        '''Build the file for the set data'''
+    def export_card_data(self, sets_location=constants.SETS_FOLDER):
+        '''Build the file for the set data
+
+           The file is written to a temporary file and validated before it replaces the existing set file. The
+           staged 17Lands responses are removed once the file is exported
+        '''
         result = True
         try:
             output_file = "_".join(
                 (self.selected_sets.seventeenlands[0], self.draft, constants.SET_FILE_SUFFIX))
-            location = os.path.join(constants.SETS_FOLDER, output_file)
+            location = os.path.join(sets_location, output_file)
+            temp_location = location + ".tmp"
 
-            with open(location, 'w', encoding="utf-8", errors="replace") as file:
+            with open(temp_location, 'w', encoding="utf-8", errors="replace") as file:
                 json.dump(self.combined_data, file)
 
             # Verify that the file was written
-            write_data = check_file_integrity(location)
+            write_data = check_file_integrity(temp_location)
 
             if write_data[0] != Result.VALID:
                 result = False
+                os.remove(temp_location)
+            else:
+                os.replace(temp_location, location)
+                export_ratings_matrix(location, self.combined_data)
+                retrieve_set_catalog(sets_location).update_file(location, *write_data)
+                for set_code in self.selected_sets.seventeenlands:
+                    self.staging.clear(staging_key(set_code, self.draft, self.start_date, self.end_date))
 
         except Exception as error:
             logger.error(error)
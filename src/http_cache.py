@@ -0,0 +1,362 @@
+"""This module contains the on-disk cache for the HTTP responses
+
+The response bodies are stored in the cache folder under the SHA-256 digest of their content, so identical responses
+(e.g., an unchanged Scryfall page or a 17Lands color that has no new games) are stored once. The index file maps each
+URL to its body digest, along with the ETag/Last-Modified validators, the time that the response was last validated,
+and its time-to-live.
+
+A response that's within its time-to-live is served from the cache. An expired response is revalidated with a
+conditional GET, and it's served from the cache if the server returns 304 Not Modified, or if the server can't be
+reached. The least recently used responses are evicted when the bodies exceed the size limit.
+
+Several processes (e.g., the overlay and the set_refresh command-line tool) can share the cache folder. The bodies and
+the index are only changed while the lock file is held, and the index is re-read and merged with the changes before
+it's written, so a process doesn't drop the entries of another process or delete a body that another entry uses. The
+files are written to uniquely named temporary files and then renamed. The access times of the cache hits are kept in
+memory and written with the next change to the index (or when the cache is closed).
+"""
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Optional
+from pydantic import BaseModel, Field
+from src import constants
+from src.logger import create_logger
+
+logger = create_logger()
+
+HTTP_CACHE_VERSION = 1
+HTTP_CACHE_INDEX_FILE = "index.json"
+HTTP_CACHE_LOCK_FILE = "index.lock"
+HTTP_CACHE_LOCK_TIMEOUT_SECONDS = 10
+HTTP_CACHE_LOCK_STALE_SECONDS = 30
+HTTP_CACHE_LOCK_INTERVAL_SECONDS = 0.01
+
+
+class CacheEntry(BaseModel):
+    """This class holds the metadata of a single cached response"""
+    digest: str = ""
+    size: int = 0
+    etag: str = ""
+    last_modified: str = ""
+    validated: float = 0.0
+    accessed: float = 0.0
+    ttl: float = 0.0
+
+
+class CacheIndex(BaseModel):
+    """This class groups together the data stored in the index file"""
+    version: int = HTTP_CACHE_VERSION
+    entries: Dict[str, CacheEntry] = Field(default_factory=dict)
+
+
+@dataclass
+class CacheStats:
+    '''Counters for the cache lookups
+       - hits: responses that were served without a request
+       - misses: responses that weren't in the cache
+       - revalidated: expired responses that the server confirmed with 304 Not Modified
+       - stale: expired responses that were served because the request failed
+    '''
+    hits: int = 0
+    misses: int = 0
+    revalidated: int = 0
+    stale: int = 0
+    evictions: int = 0
+
+
+@dataclass
+class CachedResponse:
+    '''A response body that was read from the cache'''
+    url: str
+    entry: CacheEntry
+    data: bytes
+    fresh: bool
+
+
+def content_digest(data):
+    '''Return the SHA-256 digest that's used as the name of a body file'''
+    return hashlib.sha256(data).hexdigest()
+
+
+def write_file_atomic(location, data):
+    '''Write bytes to a uniquely named temporary file in the same folder, then rename it to the location'''
+    folder = os.path.dirname(location)
+    os.makedirs(folder, exist_ok=True)
+    handle, temp_file = tempfile.mkstemp(dir=folder, prefix=os.path.basename(location) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(handle, 'wb') as file:
+            file.write(data)
+        os.replace(temp_file, location)
+    except BaseException:
+        try:
+            os.remove(temp_file)
+        except OSError:
+            pass
+        raise
+
+
+class CacheLock:
+    '''Lock file that allows one process at a time to change the files in a cache folder
+
+       A lock file that's older than the stale limit was left behind by a process that exited, so it's removed
+    '''
+
+    def __init__(self, location, timeout=HTTP_CACHE_LOCK_TIMEOUT_SECONDS, stale=HTTP_CACHE_LOCK_STALE_SECONDS):
+        self.location = location
+        self.timeout = timeout
+        self.stale = stale
+        self.locked = False
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.location), exist_ok=True)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                handle = os.open(self.location, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(handle, str(os.getpid()).encode("ascii"))
+                os.close(handle)
+                self.locked = True
+                return self
+            except FileExistsError:
+                pass
+            try:
+                if time.time() - os.path.getmtime(self.location) > self.stale:
+                    os.remove(self.location)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Unable to lock {self.location}")
+            time.sleep(HTTP_CACHE_LOCK_INTERVAL_SECONDS)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.locked:
+            self.locked = False
+            try:
+                os.remove(self.location)
+            except OSError as error:
+                logger.error(error)
+
+
+class ResponseCache:
+    '''Class that stores the HTTP response bodies on disk, keyed by URL'''
+
+    def __init__(self, directory: str = constants.HTTP_CACHE_FOLDER,
+                 max_size: int = constants.HTTP_CACHE_MAX_SIZE_BYTES,
+                 ttl: float = constants.HTTP_CACHE_TTL_SECONDS,
+                 clock=time.time):
+        self.directory = directory
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = CacheStats()
+        self.index = self.__read_index() or CacheIndex()
+        # Access times of the cache hits that haven't been written to the index
+        self.__accessed = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def size(self):
+        '''Return the size, in bytes, of the stored bodies'''
+        return sum({x.digest: x.size for x in self.index.entries.values()}.values())
+
+    def lookup(self, url) -> Optional[CachedResponse]:
+        '''Return the cached response for a URL, or None if the URL isn't cached'''
+        with self.__lock:
+            entry = self.index.entries.get(url)
+            if not entry:
+                self.stats.misses += 1
+                return None
+            data = self.__read_body(entry.digest)
+            if data is None:
+                self.stats.misses += 1
+                try:
+                    with self.__update():
+                        if url in self.index.entries and self.index.entries[url].digest == entry.digest:
+                            del self.index.entries[url]
+                except Exception as error:
+                    logger.error(error)
+                return None
+            now = self.clock()
+            fresh = now - entry.validated < entry.ttl
+            if fresh:
+                entry.accessed = now
+                self.__accessed[url] = now
+                self.stats.hits += 1
+            return CachedResponse(url, entry.copy(), data, fresh)
+
+    def conditional_headers(self, cached: Optional[CachedResponse]):
+        '''Return the If-None-Match/If-Modified-Since headers for revalidating a cached response'''
+        headers = {}
+        if cached:
+            if cached.entry.etag:
+                headers["If-None-Match"] = cached.entry.etag
+            if cached.entry.last_modified:
+                headers["If-Modified-Since"] = cached.entry.last_modified
+        return headers
+
+    def store(self, url, data, headers=None, ttl=None):
+        '''Store a response body and its validators, then evict the least recently used responses'''
+        headers = headers or {}
+        cache_control = (headers.get("Cache-Control") or "").lower()
+        if "no-store" in cache_control:
+            return None
+        with self.__lock:
+            digest = content_digest(data)
+            try:
+                with self.__update():
+                    self.__write_body(digest, data)
+                    now = self.clock()
+                    entry = CacheEntry(digest=digest, size=len(data),
+                                       etag=headers.get("ETag") or "",
+                                       last_modified=headers.get("Last-Modified") or "",
+                                       validated=now, accessed=now,
+                                       ttl=self.ttl if ttl is None else ttl)
+                    previous = self.index.entries.get(url)
+                    self.index.entries[url] = entry
+                    if previous and previous.digest != digest:
+                        self.__remove_body(previous.digest)
+                    self.__evict()
+            except Exception as error:
+                logger.error(error)
+                return None
+            return entry
+
+    def revalidate(self, url, headers=None, ttl=None):
+        '''Mark a cached response as valid after the server returned 304 Not Modified'''
+        headers = headers or {}
+        entry = None
+        with self.__lock:
+            try:
+                with self.__update():
+                    entry = self.index.entries.get(url)
+                    if entry:
+                        now = self.clock()
+                        entry.validated = now
+                        entry.accessed = now
+                        entry.etag = headers.get("ETag") or entry.etag
+                        entry.last_modified = headers.get("Last-Modified") or entry.last_modified
+                        if ttl is not None:
+                            entry.ttl = ttl
+                        self.stats.revalidated += 1
+            except Exception as error:
+                logger.error(error)
+            return entry
+
+    def serve_stale(self, url):
+        '''Record that an expired response was served because the request failed'''
+        with self.__lock:
+            entry = self.index.entries.get(url)
+            if entry:
+                entry.accessed = self.clock()
+                self.__accessed[url] = entry.accessed
+                self.stats.stale += 1
+
+    def clear(self):
+        '''Remove all of the cached responses'''
+        with self.__lock:
+            try:
+                with self.__update():
+                    for digest in {x.digest for x in self.index.entries.values()}:
+                        self.__remove_body(digest, force=True)
+                    self.index.entries.clear()
+            except Exception as error:
+                logger.error(error)
+
+    def close(self):
+        '''Write the access times of the cache hits to the index'''
+        with self.__lock:
+            if self.__accessed:
+                try:
+                    with self.__update():
+                        pass
+                except Exception as error:
+                    logger.error(error)
+
+    @contextmanager
+    def __update(self):
+        '''Change the cache while the lock file is held
+
+           The index is re-read so that the changes are applied to the entries of every process, and the index is
+           written, along with the pending access times, when the block completes
+        '''
+        with CacheLock(os.path.join(self.directory, HTTP_CACHE_LOCK_FILE)):
+            index = self.__read_index()
+            if index:
+                self.index = index
+            for url, accessed in self.__accessed.items():
+                entry = self.index.entries.get(url)
+                if entry:
+                    entry.accessed = max(entry.accessed, accessed)
+            self.__accessed = {}
+            yield
+            write_file_atomic(os.path.join(self.directory, HTTP_CACHE_INDEX_FILE),
+                              json.dumps(self.index.dict()).encode("utf-8"))
+
+    def __body_location(self, digest):
+        return os.path.join(self.directory, digest)
+
+    def __read_body(self, digest):
+        '''Read a body file and confirm that its content matches the digest'''
+        try:
+            with open(self.__body_location(digest), 'rb') as body:
+                data = body.read()
+            if content_digest(data) == digest:
+                return data
+        except FileNotFoundError:
+            pass
+        except OSError as error:
+            logger.error(error)
+        return None
+
+    def __write_body(self, digest, data):
+        '''Write a body file, unless a file with the same content already exists
+
+           An existing file is only kept if it matches the digest, so a corrupted or truncated file is replaced
+        '''
+        if self.__read_body(digest) is not None:
+            return
+        write_file_atomic(self.__body_location(digest), data)
+
+    def __remove_body(self, digest, force=False):
+        '''Delete a body file if it's no longer referenced by an entry'''
+        if not force and any(x.digest == digest for x in self.index.entries.values()):
+            return
+        try:
+            os.remove(self.__body_location(digest))
+        except FileNotFoundError:
+            pass
+        except OSError as error:
+            logger.error(error)
+
+    def __evict(self):
+        '''Remove the least recently used responses until the bodies fit within the size limit'''
+        size = self.size
+        for url, entry in sorted(self.index.entries.items(), key=lambda x: x[1].accessed):
+            if size <= self.max_size:
+                break
+            del self.index.entries[url]
+            self.stats.evictions += 1
+            if not any(x.digest == entry.digest for x in self.index.entries.values()):
+                size -= entry.size
+                self.__remove_body(entry.digest, force=True)
+
+    def __read_index(self) -> Optional[CacheIndex]:
+        '''Read the index file. Returns None if the file is missing or belongs to a different version'''
+        try:
+            with open(os.path.join(self.directory, HTTP_CACHE_INDEX_FILE), 'r', encoding="utf-8",
+                      errors="replace") as data:
+                index = CacheIndex.parse_obj(json.loads(data.read()))
+            if index.version == HTTP_CACHE_VERSION:
+                return index
+        except FileNotFoundError:
+            pass
+        except Exception as error:
+            logger.error(error)
+        return None
@@ -2,13 +2,12 @@ import copy
 import datetime
 import json
 import re
-import ssl
 import time
 import os
-import urllib.request
 from typing import Dict, List, Tuple
 from pydantic import BaseModel, Field
 from src import constants
+from src.http_client import HTTPClient, default_client
 from src.logger import create_logger
 
 logger = create_logger()
@@ -58,12 +57,12 @@ def shift_date(start_date, shifted_days, string_format, next_dow=None):
 
 
 class LimitedSets:
-    def __init__(self, sets_file_location: str = TEMP_LIMITED_SETS):
+    def __init__(self, sets_file_location: str = TEMP_LIMITED_SETS, client: HTTPClient = None):
         self.sets_file_location: str = sets_file_location
         self.limited_sets: SetDictionary()
         self.sets_scryfall = SetDictionary()
         self.sets_17lands = SetDictionary()
-        self.context: ssl.SSLContext = ssl.SSLContext()
+        self.client: HTTPClient = client or default_client()
 
     def retrieve_limited_sets(self) -> SetDictionary:
         '''Retrieve a list of sets from 17Lands and Scryfall
@@ -99,16 +98,16 @@ class LimitedSets:
         while retries:
             try:
                 url = "https://api.scryfall.com/sets"
-                url_data = urllib.request.urlopen(
-                    url, context=self.context).read()
+                url_data = self.client.get(
+                    url, ttl=constants.LIMITED_SETS_CACHE_TTL_SECONDS)
                 set_json_data = json.loads(url_data)
 
                 self.__process_scryfall_sets(set_json_data["data"])
 
                 while set_json_data["has_more"]:
                     url = set_json_data["next_page"]
-                    url_data = urllib.request.urlopen(
-                        url, context=self.context).read()
+                    url_data = self.client.get(
+                        url, ttl=constants.LIMITED_SETS_CACHE_TTL_SECONDS)
                     set_json_data = json.loads(url_data)
                     self.__process_scryfall_sets(set_json_data["data"])
 
@@ -130,8 +129,8 @@ class LimitedSets:
         while retries:
             try:
                 url = "https://www.17lands.com/data/filters"
-                url_data = urllib.request.urlopen(
-                    url, context=self.context).read()
+                url_data = self.client.get(
+                    url, ttl=constants.LIMITED_SETS_CACHE_TTL_SECONDS)
                 set_json_data = json.loads(url_data)
 
                 self.__process_17lands_sets(set_json_data)
@@ -0,0 +1,223 @@
+"""This module contains the classes that are used for monitoring the Arena log for changes"""
+import os
+import sys
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from dataclasses import dataclass
+from src import constants
+from src.logger import create_logger
+
+logger = create_logger()
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+INOTIFY_EVENT_HEADER = struct.Struct("iIII")
+INOTIFY_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+@dataclass
+class LatencyMetrics:
+    '''Tracks the time between a log change notification and the completion of the table update'''
+    count: int = 0
+    last: float = 0.0
+    total: float = 0.0
+    maximum: float = 0.0
+
+    def record(self, seconds):
+        self.count += 1
+        self.last = seconds
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class PollingBackend:
+    '''Detects log changes by comparing the file size, modification time, and inode'''
+    name = "poll"
+
+    def __init__(self, filename, interval=constants.LOG_MONITOR_POLL_INTERVAL_SECONDS):
+        self.filename = filename
+        self.interval = interval
+        self.previous_state = self.__file_state()
+
+    def __file_state(self):
+        try:
+            stat = os.stat(self.filename)
+            return (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        except OSError:
+            return None
+
+    def wait(self, timeout):
+        '''Block until the file changes or the timeout expires. Returns True if the file changed'''
+        deadline = time.monotonic() + timeout
+        while True:
+            current_state = self.__file_state()
+            if current_state != self.previous_state:
+                self.previous_state = current_state
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+
+class InotifyBackend:
+    '''Detects log changes with the Linux inotify API
+
+       The parent directory is watched so that a replaced log (e.g., Arena creating a new Player.log) is also detected
+    '''
+    name = "inotify"
+
+    def __init__(self, filename):
+        self.filename = os.path.basename(filename).encode()
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        directory = os.path.dirname(os.path.abspath(filename)).encode()
+        if self.libc.inotify_add_watch(self.fd, directory, INOTIFY_WATCH_MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, "inotify_add_watch failed")
+
+    def wait(self, timeout):
+        '''Block until the file changes or the timeout expires. Returns True if the file changed'''
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            readable, _, _ = select.select([self.fd], [], [], remaining)
+            if not readable:
+                return False
+            if self.__read_events():
+                return True
+
+    def __read_events(self):
+        '''Drain the pending inotify events and check if any of them refer to the monitored file'''
+        changed = False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        offset = 0
+        while offset + INOTIFY_EVENT_HEADER.size <= len(data):
+            _, _, _, name_length = INOTIFY_EVENT_HEADER.unpack_from(
+                data, offset)
+            offset += INOTIFY_EVENT_HEADER.size
+            name = data[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+            if name == self.filename:
+                changed = True
+        return changed
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+def create_backend(filename):
+    '''Return the inotify backend on Linux and the polling backend everywhere else'''
+    if sys.platform.startswith(constants.PLATFORM_ID_LINUX):
+        try:
+            return InotifyBackend(filename)
+        except Exception as error:
+            logger.info("inotify unavailable, falling back to polling: %s", error)
+    return PollingBackend(filename)
+
+
+class LogMonitor:
+    '''Class that watches the Arena log from a background thread and flags changes for the UI thread
+
+       Bursts of notifications (e.g., Arena writing several lines for a single pick) are coalesced into a single change
+    '''
+
+    def __init__(self, filename, coalesce_seconds=constants.LOG_MONITOR_COALESCE_SECONDS):
+        self.filename = filename
+        self.coalesce_seconds = coalesce_seconds
+        self.latency = LatencyMetrics()
+        self.backend = None
+        self.changes = 0
+        self.notifications = 0
+        self.__lock = threading.Lock()
+        self.__pending = None
+        self.__stop = threading.Event()
+        self.__thread = None
+
+    @property
+    def backend_name(self):
+        return self.backend.name if self.backend else ""
+
+    def start(self):
+        '''Start the monitor thread. The first check always reports a change so the log gets an initial scan'''
+        self.stop()
+        self.__stop.clear()
+        self.__pending = time.perf_counter()
+        try:
+            self.backend = create_backend(self.filename)
+            self.__thread = threading.Thread(target=self.__run, daemon=True)
+            self.__thread.start()
+            logger.info("Monitoring %s (%s)", self.filename, self.backend_name)
+        except Exception as error:
+            logger.error(error)
+
+    def stop(self):
+        '''Stop the monitor thread'''
+        self.__stop.set()
+        if self.__thread:
+            self.__thread.join(timeout=1)
+            self.__thread = None
+        if self.backend:
+            self.backend.close()
+            self.backend = None
+
+    def set_file(self, filename):
+        '''Monitor a different file'''
+        self.filename = filename
+        self.start()
+
+    def consume(self):
+        '''Return the perf_counter timestamp of the first notification in the pending change, or None if nothing changed'''
+        with self.__lock:
+            pending = self.__pending
+            self.__pending = None
+        return pending
+
+    def __run(self):
+        backend = self.backend
+        while not self.__stop.is_set():
+            try:
+                if not backend.wait(constants.LOG_MONITOR_POLL_INTERVAL_SECONDS):
+                    continue
+                first_notification = time.perf_counter()
+                self.notifications += 1
+                # Wait for the burst to settle before flagging the change
+                burst_deadline = first_notification + constants.LOG_MONITOR_BURST_MAX_SECONDS
+                while (time.perf_counter() < burst_deadline and
+                       backend.wait(self.coalesce_seconds)):
+                    self.notifications += 1
+                with self.__lock:
+                    if self.__pending is None:
+                        self.__pending = first_notification
+                    self.changes += 1
+            except Exception as error:
+                logger.error(error)
+                self.__stop.wait(constants.LOG_MONITOR_POLL_INTERVAL_SECONDS)
@@ -2,20 +2,151 @@
 import os
 import json
 import re
+import time
 import logging
+from dataclasses import asdict
+from typing import List
+from pydantic import BaseModel, Field
 import src.constants as constants
 import src.card_logic as CL
 import src.file_extractor as FE
-from src.logger import create_logger
+import src.set_catalog as SC
+import src.payload_decoder as PD
+from src.ratings_matrix import load_set_file
+from src.ratings_engine import RatingsEngine
+from src.scanner_events import DraftStarted, DraftResumed, PackSeen, PickMade, SealedPool
+from src.log_tailer import (LogTailer, LineMatcher, LogFingerprint, FINGERPRINT_HEAD_SIZE,
+                            create_fingerprint, fingerprint_matches)
+from src.logger import create_logger, set_draft_log_file, DRAFT_LOGGER_NAME, DRAFT_EVENT_LOGGER_NAME
 
 if not os.path.exists(constants.DRAFT_LOG_FOLDER):
     os.makedirs(constants.DRAFT_LOG_FOLDER)
 
-LOG_TYPE_DRAFT = "draftLog"
+LOG_TYPE_DRAFT = DRAFT_LOGGER_NAME
+
+MATCHER_DRAFT_START = "draft_start"
+MATCHER_DRAFT_DATA = "draft_data"
+
+DRAFT_NOTIFY_STRING = "[UnityCrossThreadLogger]Draft.Notify "
+DRAFT_MAKE_PICK_STRING = "[UnityCrossThreadLogger]==> Event_PlayerDraftMakePick "
+DRAFT_HUMAN_PICK_STRING = "[UnityCrossThreadLogger]==> Draft.MakeHumanDraftPick "
+DRAFT_BOT_PICK_STRING = "[UnityCrossThreadLogger]==> BotDraft_DraftPick "
+
+P1P1_PACK_FIELDS = {"CardsInPack": PD.FieldType.CARD_LIST,
+                    "PackNumber": PD.FieldType.INT,
+                    "PickNumber": PD.FieldType.INT}
+MAKE_PICK_FIELDS = {"Pack": PD.FieldType.INT,
+                    "Pick": PD.FieldType.INT,
+                    "GrpId": PD.FieldType.INT}
+HUMAN_PICK_FIELDS = {"packNumber": PD.FieldType.INT,
+                     "pickNumber": PD.FieldType.INT,
+                     "cardId": PD.FieldType.INT}
+QUICK_PICK_FIELDS = {"PackNumber": PD.FieldType.INT,
+                     "PickNumber": PD.FieldType.INT,
+                     "CardId": PD.FieldType.INT}
 
 logger = create_logger()
 
 
+def full_decode_p1p1_pack(line):
+    '''Decode the payload from a premier/traditional P1P1 string'''
+    # Remove any prefix (e.g. log timestamp)
+    draft_data = PD.json_loads(line[line.find("{\"id\":"):])
+    request_data = PD.json_loads(draft_data["request"])
+    return PD.json_loads(request_data["Payload"])
+
+
+def full_decode_make_pick(line):
+    '''Decode the payload from a premier/traditional pick string'''
+    draft_data = PD.json_loads(line[line.find("{\"id\""):])
+    request_data = PD.json_loads(draft_data["request"])
+    return PD.json_loads(request_data["Payload"])
+
+
+def full_decode_human_pick(line):
+    '''Decode the request parameters from a premier Draft.MakeHumanDraftPick string'''
+    draft_data = PD.json_loads(
+        line[line.find(DRAFT_HUMAN_PICK_STRING) + len(DRAFT_HUMAN_PICK_STRING):])
+    return PD.json_loads(draft_data["request"])["params"]
+
+
+def full_decode_quick_pick(line):
+    '''Decode the pick information from a quick draft pick string'''
+    draft_data = PD.json_loads(
+        line[line.find(DRAFT_BOT_PICK_STRING) + len(DRAFT_BOT_PICK_STRING):])
+    request_data = PD.json_loads(draft_data["request"])
+    return PD.json_loads(request_data["Payload"])["PickInfo"]
+
+
+def decode_p1p1_pack(line):
+    '''Return the pack cards, pack number, and pick number from a premier/traditional P1P1 string'''
+    fields = PD.decode_fields(line, P1P1_PACK_FIELDS, full_decode_p1p1_pack)
+    return ([str(card) for card in fields["CardsInPack"]],
+            fields["PackNumber"],
+            fields["PickNumber"])
+
+
+def decode_notify_pack(line, string_offset):
+    '''Return the pack cards, pack number, and pick number from a premier/traditional Draft.Notify string'''
+    # The Draft.Notify data isn't nested, so it's always decoded in a single pass
+    draft_data = PD.json_loads(line[line.find("{", string_offset):])
+    return ([str(card) for card in draft_data["PackCards"].split(',')],
+            draft_data["SelfPack"],
+            draft_data["SelfPick"])
+
+
+def decode_make_pick(line):
+    '''Return the pack number, pick number, and card from a premier/traditional pick string'''
+    fields = PD.decode_fields(line, MAKE_PICK_FIELDS, full_decode_make_pick)
+    return int(fields["Pack"]), int(fields["Pick"]), str(fields["GrpId"])
+
+
+def decode_human_pick(line):
+    '''Return the pack number, pick number, and card from a premier Draft.MakeHumanDraftPick string'''
+    fields = PD.decode_fields(line, HUMAN_PICK_FIELDS, full_decode_human_pick)
+    return int(fields["packNumber"]), int(fields["pickNumber"]), str(fields["cardId"])
+
+
+def decode_quick_pack(line):
+    '''Return the draft status, pack cards, pack number, and pick number from a quick draft pack string'''
+    # The pack payload is only nested once, so it's always decoded in full
+    draft_data = PD.json_loads(line[line.find("{\"CurrentModule\""):])
+    payload_data = PD.json_loads(draft_data["Payload"])
+    return (payload_data["DraftStatus"],
+            [str(card) for card in payload_data["DraftPack"] or []],
+            payload_data["PackNumber"] + 1,
+            payload_data["PickNumber"] + 1)
+
+
+def decode_quick_pick(line):
+    '''Return the pack number, pick number, and card from a quick draft pick string'''
+    fields = PD.decode_fields(line, QUICK_PICK_FIELDS, full_decode_quick_pick)
+    return fields["PackNumber"] + 1, fields["PickNumber"] + 1, str(fields["CardId"])
+
+
+class ScannerCheckpoint(BaseModel):
+    """This class holds the scanner cursors and the draft state that are stored between sessions"""
+    fingerprint: dict = Field(default_factory=dict)
+    offset: int = 0
+    pick_offset: int = 0
+    pack_offset: int = 0
+    draft_start_offset: int = 0
+    draft_type: int = constants.LIMITED_TYPE_UNKNOWN
+    draft_sets: List[str] = Field(default_factory=list)
+    event_string: str = ""
+    event_type: str = ""
+    draft_id: str = ""
+    current_pick: int = 0
+    current_pack: int = 0
+    picked_cards: list = Field(default_factory=list)
+    taken_cards: list = Field(default_factory=list)
+    sideboard: list = Field(default_factory=list)
+    pack_cards: list = Field(default_factory=list)
+    initial_pack: list = Field(default_factory=list)
+    previous_picked_pack: int = 0
+    current_picked_pick: int = 0
+
+
 def retrieve_card_data(set_data, card):
     card_data = {}
     if (set_data is not None) and (card in set_data["card_ratings"]):
@@ -33,17 +164,24 @@ def retrieve_card_data(set_data, card):
 class ArenaScanner:
     '''Class that handles the processing of the information within Arena Player.log file'''
 
-    def __init__(self, filename, set_list, sets_location: str = constants.SETS_FOLDER, step_through: bool = False):
+    def __init__(self, filename, set_list, sets_location: str = constants.SETS_FOLDER, step_through: bool = False,
+                 checkpoint_file: str = constants.SCANNER_CHECKPOINT_FILE, catch_up: bool = True):
         self.arena_file = filename
         self.set_list = set_list
         self.draft_log = logging.getLogger(LOG_TYPE_DRAFT)
         self.draft_log.setLevel(logging.INFO)
+        self.event_log = logging.getLogger(DRAFT_EVENT_LOGGER_NAME)
+        self.event_log.setLevel(logging.CRITICAL)
         self.sets_location = sets_location
 
         self.logging_enabled = False
+        self.log_format = constants.DRAFT_LOG_FORMAT_RAW
 
         self.step_through = step_through
+        self.pool_aggregate = CL.PoolAggregate()
         self.set_data = None
+        self.ratings_matrix = None
+        self.ratings_engine = None
         self.draft_type = constants.LIMITED_TYPE_UNKNOWN
         self.pick_offset = 0
         self.pack_offset = 0
@@ -59,39 +197,81 @@ class ArenaScanner:
         self.initial_pack = [[]] * 8
         self.previous_picked_pack = 0
         self.current_picked_pick = 0
-        self.file_size = 0
         self.data_source = "None"
         self.event_string = ""
+        self.event_type = ""
+        self.draft_id = ""
+        self.draft_started = False
+        self.sealed_update = False
+        self.previous_state = (0, 0, 0)
+
+        self.tailer = LogTailer(filename)
+        self.fingerprint = None
+        self.checkpoint_file = None if step_through else checkpoint_file
+        self.checkpoint_time = 0
+        self.checkpoint_matches = 0
+        self.catch_up = catch_up
+        self.listeners = []
+        self.resumed_draft = None
+        self.__register_start_matchers()
+        self.__restore_checkpoint()
 
     def set_arena_file(self, filename):
         '''Public function that's used for storing the location of the Player.log file'''
         self.arena_file = filename
 
-    def log_enable(self, enable):
-        '''Enable/disable the application draft log feature that records draft data in a log file within the Logs folder'''
+    def add_listener(self, listener):
+        '''Register a function that's called with every ScannerEvent that's found in the log
+
+           If the scanner resumed a draft from the checkpoint, the listener is called with a DraftResumed event first
+        '''
+        self.listeners.append(listener)
+        if self.resumed_draft:
+            try:
+                listener(self.resumed_draft)
+            except Exception as error:
+                logger.error(error)
+
+    def remove_listener(self, listener):
+        '''Remove a function that was registered with add_listener'''
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def __emit(self, event):
+        '''Hand an event to the registered listeners'''
+        for listener in self.listeners:
+            try:
+                listener(event)
+            except Exception as error:
+                logger.error(error)
+
+    def log_enable(self, enable, log_format=None):
+        '''Enable/disable the application draft log feature that records draft data in a log file within the Logs folder
+
+           The raw format records the matched Arena log lines, while the JSONL formats record the scanner events
+           (see src/draft_log.py)
+        '''
         self.logging_enabled = enable
+        if log_format:
+            self.log_format = log_format
         self.log_suspend(not enable)
 
     def log_suspend(self, suspended):
         '''Prevents the application from updating the draft log file'''
         if suspended:
             self.draft_log.setLevel(logging.CRITICAL)
+            self.event_log.setLevel(logging.CRITICAL)
         elif self.logging_enabled:
-            self.draft_log.setLevel(logging.INFO)
+            raw_format = self.log_format == constants.DRAFT_LOG_FORMAT_RAW
+            self.draft_log.setLevel(logging.INFO if raw_format else logging.CRITICAL)
+            self.event_log.setLevel(logging.CRITICAL if raw_format else logging.INFO)
 
     def __new_log(self, card_set, event, draft_id):
         '''Create a new draft log file'''
         try:
             log_name = f"DraftLog_{card_set}_{event}_{draft_id}.log"
             log_path = os.path.join(constants.DRAFT_LOG_FOLDER, log_name)
-            for handler in self.draft_log.handlers:
-                if isinstance(handler, logging.FileHandler):
-                    self.draft_log.removeHandler(handler)
-            formatter = logging.Formatter(
-                '%(asctime)s,%(message)s', datefmt='<%d%m%Y %H:%M:%S>')
-            new_handler = logging.FileHandler(log_path, delay=True)
-            new_handler.setFormatter(formatter)
-            self.draft_log.addHandler(new_handler)
+            set_draft_log_file(log_path)
             logger.info("Creating new draft log: %s", log_path)
         except Exception as error:
             logger.error(error)
@@ -101,8 +281,12 @@ class ArenaScanner:
         if full_clear:
             self.search_offset = 0
             self.draft_start_offset = 0
-            self.file_size = 0
+            self.tailer.reset(0)
+        self.tailer.unregister(MATCHER_DRAFT_DATA)
+        self.resumed_draft = None
         self.set_data = None
+        self.ratings_matrix = None
+        self.ratings_engine = None
         self.draft_type = constants.LIMITED_TYPE_UNKNOWN
         self.pick_offset = 0
         self.pack_offset = 0
@@ -120,57 +304,246 @@ class ArenaScanner:
 
     def draft_start_search(self):
         '''Search for the string that represents the start of a draft'''
-        update = False
-        event_type = ""
-        event_line = ""
-        draft_id = ""
+        self.__scan_log()
+        update = self.draft_started
+        self.draft_started = False
+        return update
 
+    def __scan_log(self):
+        '''Read the new section of the Player.log file once and hand the lines to the registered matchers'''
         try:
+            if self.tailer.filename != self.arena_file:
+                self.tailer.set_file(self.arena_file)
+                self.fingerprint = None
             # Check if a new player.log was created (e.g. application was started before Arena was started)
-            arena_file_size = os.path.getsize(self.arena_file)
-            if self.file_size > arena_file_size:
+            if not self.__check_log_identity():
                 self.clear_draft(True)
-                logger.info(
-                    "New Arena Log Detected (%d), (%d)", self.file_size, arena_file_size)
-            self.file_size = arena_file_size
-            offset = self.search_offset
-            with open(self.arena_file, 'r', encoding="utf-8", errors="replace") as log:
-                log.seek(offset)
-                while True:
-                    line = log.readline()
-                    if not line:
-                        break
-                    offset = log.tell()
-                    self.search_offset = offset
-                    for start_string in constants.DRAFT_START_STRINGS:
-                        if start_string in line:
-                            self.draft_start_offset = offset
-                            string_offset = line.find(start_string)
-                            event_data = json.loads(
-                                line[string_offset + len(start_string):])
-                            update, event_type, draft_id = self.__check_event(
-                                event_data)
-                            event_line = line
-
-            if update:
-                self.__new_log(self.draft_sets[0], event_type, draft_id)
-                self.draft_log.info(event_line)
-                self.pick_offset = self.draft_start_offset
-                self.pack_offset = self.draft_start_offset
-                logger.info(
-                    "New draft detected %s, %s", event_type, self.draft_sets)
+                self.fingerprint = create_fingerprint(self.arena_file)
+                logger.info("New Arena Log Detected %s", self.arena_file)
+            if self.catch_up and self.tailer.offset == 0:
+                self.__catch_up()
+            self.search_offset = self.tailer.process()
+            self.__periodic_checkpoint()
         except Exception as error:
             logger.error(error)
 
-        return update
+    def __check_log_identity(self):
+        '''Compare the log against the fingerprint of the log that the cursors belong to'''
+        if self.fingerprint is None:
+            self.fingerprint = create_fingerprint(self.arena_file)
+            return True
+
+        if ((not fingerprint_matches(self.fingerprint, self.arena_file)) or
+                (os.path.getsize(self.arena_file) < self.tailer.offset)):
+            return False
+
+        if self.fingerprint.head_size < FINGERPRINT_HEAD_SIZE:
+            # The log was smaller than the fingerprint head when it was first seen
+            self.fingerprint = create_fingerprint(self.arena_file)
+        return True
+
+    def __periodic_checkpoint(self):
+        '''Store a checkpoint if new draft data was found since the last checkpoint'''
+        if ((self.tailer.metrics.lines_matched != self.checkpoint_matches) and
+                (time.monotonic() - self.checkpoint_time >= constants.SCANNER_CHECKPOINT_INTERVAL_SECONDS)):
+            self.save_checkpoint()
+
+    def save_checkpoint(self):
+        '''Store the scanner cursors and the draft state so that a restarted scanner can resume from the same position'''
+        success = False
+        if not self.checkpoint_file or self.fingerprint is None:
+            return success
 
-    def __check_event(self, event_data):
-        '''Parse a draft start string and extract pertinent information'''
-        update = False
-        event_type = ""
-        draft_id = ""
         try:
-            draft_id = event_data["id"]
+            checkpoint = ScannerCheckpoint(fingerprint=asdict(self.fingerprint),
+                                           offset=self.tailer.offset,
+                                           pick_offset=self.pick_offset,
+                                           pack_offset=self.pack_offset,
+                                           draft_start_offset=self.draft_start_offset,
+                                           draft_type=self.draft_type,
+                                           draft_sets=self.draft_sets or [],
+                                           event_string=self.event_string,
+                                           event_type=self.event_type,
+                                           draft_id=self.draft_id,
+                                           current_pick=self.current_pick,
+                                           current_pack=self.current_pack,
+                                           picked_cards=self.picked_cards,
+                                           taken_cards=self.taken_cards,
+                                           sideboard=self.sideboard,
+                                           pack_cards=self.pack_cards,
+                                           initial_pack=self.initial_pack,
+                                           previous_picked_pack=self.previous_picked_pack,
+                                           current_picked_pick=self.current_picked_pick)
+            temp_file = self.checkpoint_file + ".tmp"
+            with open(temp_file, 'w', encoding="utf-8", errors="replace") as data:
+                json.dump(checkpoint.dict(), data)
+            os.replace(temp_file, self.checkpoint_file)
+            self.checkpoint_time = time.monotonic()
+            self.checkpoint_matches = self.tailer.metrics.lines_matched
+            success = True
+        except Exception as error:
+            logger.error(error)
+
+        return success
+
+    def __restore_checkpoint(self):
+        '''Resume from the stored checkpoint if it belongs to the current log'''
+        restored = False
+        try:
+            if not self.checkpoint_file or not os.path.exists(self.checkpoint_file):
+                return restored
+
+            with open(self.checkpoint_file, 'r', encoding="utf-8", errors="replace") as data:
+                checkpoint = ScannerCheckpoint.parse_obj(json.loads(data.read()))
+
+            fingerprint = LogFingerprint(**checkpoint.fingerprint)
+            if not fingerprint_matches(fingerprint, self.arena_file):
+                return restored
+
+            self.fingerprint = fingerprint
+            self.tailer.reset(checkpoint.offset)
+            self.search_offset = checkpoint.offset
+            self.pick_offset = checkpoint.pick_offset
+            self.pack_offset = checkpoint.pack_offset
+            self.draft_start_offset = checkpoint.draft_start_offset
+            self.draft_type = checkpoint.draft_type
+            self.draft_sets = checkpoint.draft_sets
+            self.event_string = checkpoint.event_string
+            self.event_type = checkpoint.event_type
+            self.draft_id = checkpoint.draft_id
+            self.current_pick = checkpoint.current_pick
+            self.current_pack = checkpoint.current_pack
+            self.picked_cards = checkpoint.picked_cards
+            self.taken_cards = checkpoint.taken_cards
+            self.sideboard = checkpoint.sideboard
+            self.pack_cards = checkpoint.pack_cards
+            self.initial_pack = checkpoint.initial_pack
+            self.previous_picked_pack = checkpoint.previous_picked_pack
+            self.current_picked_pick = checkpoint.current_picked_pick
+            self.checkpoint_matches = self.tailer.metrics.lines_matched
+
+            if self.draft_type != constants.LIMITED_TYPE_UNKNOWN:
+                self.__new_log(self.draft_sets[0],
+                               self.event_type, self.draft_id)
+                self.__register_draft_matchers()
+                self.draft_started = True
+                self.resumed_draft = DraftResumed(offset=self.draft_start_offset,
+                                                  event_type=self.event_type,
+                                                  draft_type=self.draft_type,
+                                                  sets=list(self.draft_sets),
+                                                  event_name=self.event_string,
+                                                  draft_id=self.draft_id)
+
+            restored = True
+            logger.info("Resuming %s from checkpoint offset %d",
+                        self.arena_file, checkpoint.offset)
+        except Exception as error:
+            logger.error(error)
+
+        return restored
+
+    def __catch_up(self):
+        '''Skip to the most recent draft start by searching backwards from the end of the log
+
+           Only the section of the log that follows the last limited event is parsed, so the time
+           it takes to collect the draft data doesn't grow with the size of the log
+        '''
+        try:
+            for line_start, line in self.tailer.reverse_search(constants.DRAFT_START_STRINGS):
+                event_data = self.__parse_start_line(line)
+                if event_data and self.__identify_event(event_data):
+                    self.tailer.reset(line_start)
+                    logger.info("Draft start found at offset %d", line_start)
+                    return
+
+            # No draft in the log, so start at the end of the last complete line
+            self.tailer.reset(self.tailer.last_line_end())
+        except Exception as error:
+            logger.error(error)
+
+    def __parse_start_line(self, line):
+        '''Return the JSON data that follows a draft start string'''
+        for start_string in constants.DRAFT_START_STRINGS:
+            string_offset = line.find(start_string)
+            if string_offset != -1:
+                return json.loads(line[line.find("{", string_offset):])
+        return None
+
+    def __register_start_matchers(self):
+        '''Register the line matchers that identify the start of a draft'''
+        for start_string in constants.DRAFT_START_STRINGS:
+            self.tailer.register(LineMatcher(name=MATCHER_DRAFT_START,
+                                             markers=[start_string],
+                                             callback=self.__draft_start_line))
+
+    def __register_draft_matchers(self):
+        '''Register the line matchers that collect the pack and pick data for the active format'''
+        self.tailer.unregister(MATCHER_DRAFT_DATA)
+
+        def p1p1_missing():
+            return len(self.initial_pack[0]) == 0
+
+        matchers = []
+        if self.draft_type == constants.LIMITED_TYPE_DRAFT_PREMIER_V1:
+            matchers = [(["CardsInPack"], self.__draft_pack_search_p1p1, p1p1_missing),
+                        ([DRAFT_NOTIFY_STRING], self.__draft_pack_search_notify, None),
+                        ([DRAFT_MAKE_PICK_STRING], self.__draft_picked_search_make_pick, None)]
+        elif self.draft_type == constants.LIMITED_TYPE_DRAFT_PREMIER_V2:
+            matchers = [(["CardsInPack"], self.__draft_pack_search_p1p1, p1p1_missing),
+                        ([DRAFT_NOTIFY_STRING], self.__draft_pack_search_notify, None),
+                        ([DRAFT_HUMAN_PICK_STRING], self.__draft_picked_search_human_pick, None)]
+        elif self.draft_type == constants.LIMITED_TYPE_DRAFT_QUICK:
+            matchers = [(["DraftPack"], self.__draft_pack_search_quick, None),
+                        ([DRAFT_BOT_PICK_STRING], self.__draft_picked_search_quick, None)]
+        elif self.draft_type == constants.LIMITED_TYPE_DRAFT_TRADITIONAL:
+            matchers = [(["CardsInPack"], self.__draft_pack_search_p1p1, p1p1_missing),
+                        ([DRAFT_NOTIFY_STRING], self.__draft_pack_search_notify, None),
+                        ([DRAFT_MAKE_PICK_STRING], self.__draft_picked_search_make_pick, None)]
+        elif ((self.draft_type == constants.LIMITED_TYPE_SEALED)
+                or (self.draft_type == constants.LIMITED_TYPE_SEALED_TRADITIONAL)):
+            matchers = [(["EventGrantCardPool"], self.__sealed_pack_search, None),
+                        ([f'\"InternalEventName\":\"{self.event_string}\"', "CardPool"],
+                         self.__sealed_pack_search_v2, None)]
+
+        for markers, callback, enabled in matchers:
+            self.tailer.register(LineMatcher(name=MATCHER_DRAFT_DATA,
+                                             markers=markers,
+                                             callback=callback,
+                                             enabled=enabled))
+
+    def __draft_start_line(self, line, string_offset, offset):
+        '''Process a line that contains one of the draft start strings'''
+        self.draft_start_offset = offset
+        event_data = self.__parse_start_line(line)
+        update, event_type, draft_id = self.__check_event(event_data)
+
+        if update:
+            self.event_type = event_type
+            self.draft_id = draft_id
+            self.__new_log(self.draft_sets[0], event_type, draft_id)
+            self.draft_log.info(line)
+            self.pick_offset = self.draft_start_offset
+            self.pack_offset = self.draft_start_offset
+            self.draft_started = True
+            self.resumed_draft = None
+            self.__register_draft_matchers()
+            self.__emit(DraftStarted(offset=offset,
+                                     event_type=event_type,
+                                     draft_type=self.draft_type,
+                                     sets=list(self.draft_sets),
+                                     event_name=self.event_string,
+                                     draft_id=draft_id))
+            logger.info(
+                "New draft detected %s, %s", event_type, self.draft_sets)
+        return False
+
+    def __identify_event(self, event_data):
+        '''Parse the event name from a draft start string and identify the limited event
+
+           Returns a tuple with the event type, draft type, sets, and event name, or None for non-limited events
+        '''
+        event = None
+        try:
             request_data = json.loads(event_data["request"])
             payload_data = json.loads(request_data["Payload"])
             event_name = payload_data["EventName"]
@@ -201,6 +574,24 @@ class ArenaScanner:
                 else:
                     event_type = events[0]
                 draft_type = constants.LIMITED_TYPES_DICT[event_type]
+                event = (event_type, draft_type, sets, event_name)
+
+        except Exception as error:
+            logger.error(error)
+
+        return event
+
+    def __check_event(self, event_data):
+        '''Parse a draft start string and extract pertinent information'''
+        update = False
+        event_type = ""
+        draft_id = ""
+        try:
+            draft_id = event_data["id"]
+            event = self.__identify_event(event_data)
+
+            if event:
+                event_type, draft_type, sets, event_name = event
                 self.clear_draft(False)
                 self.draft_type = draft_type
                 self.draft_sets = sets
@@ -214,743 +605,197 @@ class ArenaScanner:
 
     def draft_data_search(self):
         '''Collect draft data from the Player.log file based on the current active format'''
-        update = False
-        previous_pick = self.current_pick
-        previous_pack = self.current_pack
-        previous_picked = self.current_picked_pick
+        previous_pick, previous_pack, previous_picked = self.previous_state
 
-        if self.draft_type == constants.LIMITED_TYPE_DRAFT_PREMIER_V1:
-            if len(self.initial_pack[0]) == 0:
-                self.__draft_pack_search_premier_p1p1()
-            self.__draft_pack_search_premier_v1()
-            self.__draft_picked_search_premier_v1()
-        elif self.draft_type == constants.LIMITED_TYPE_DRAFT_PREMIER_V2:
-            if len(self.initial_pack[0]) == 0:
-                self.__draft_pack_search_premier_p1p1()
-            self.__draft_pack_search_premier_v2()
-            self.__draft_picked_search_premier_v2()
-        elif self.draft_type == constants.LIMITED_TYPE_DRAFT_QUICK:
-            self.__draft_pack_search_quick()
-            self.__draft_picked_search_quick()
-        elif self.draft_type == constants.LIMITED_TYPE_DRAFT_TRADITIONAL:
-            if len(self.initial_pack[0]) == 0:
-                self.__draft_pack_search_traditional_p1p1()
-            self.__draft_pack_search_traditional()
-            self.__draft_picked_search_traditional()
-        elif ((self.draft_type == constants.LIMITED_TYPE_SEALED)
-                or (self.draft_type == constants.LIMITED_TYPE_SEALED_TRADITIONAL)):
-            update = self.__sealed_pack_search()
-            if not update:
-                update = self.__sealed_pack_search_v2()
+        self.__scan_log()
+
+        update = self.sealed_update
+        self.sealed_update = False
         if not update:
             if ((previous_pack != self.current_pack) or
                 (previous_pick != self.current_pick) or
                     (previous_picked != self.current_picked_pick)):
                 update = True
 
+        self.previous_state = (self.current_pick,
+                               self.current_pack,
+                               self.current_picked_pick)
         return update
 
-    def __draft_pack_search_premier_p1p1(self):
-        '''Parse premier draft string that contains the P1P1 pack data'''
-        offset = self.pack_offset
-        draft_data = object()
-        draft_string = "CardsInPack"
-        pack_cards = []
-        pack = 0
-        pick = 0
-        # Identify and print out the log lines that contain the draft packs
-        try:
-            with open(self.arena_file, 'r', encoding="utf-8", errors="replace") as log:
-                log.seek(offset)
+    def __update_pack(self, pack, pick, pack_cards, offset):
+        '''Store the contents of a pack that was presented to the user'''
+        pack_index = (pick - 1) % 8
 
-                while True:
-                    line = log.readline()
-                    if not line:
-                        break
-                    offset = log.tell()
+        if self.current_pack != pack:
+            self.initial_pack = [[]] * 8
 
-                    string_offset = line.find(draft_string)
+        if len(self.initial_pack[pack_index]) == 0:
+            self.initial_pack[pack_index] = pack_cards
 
-                    if string_offset != -1:
-                        # Remove any prefix (e.g. log timestamp)
-                        start_offset = line.find("{\"id\":")
-                        self.draft_log.info(line)
-                        draft_data = json.loads(line[start_offset:])
-                        request_data = draft_data["request"]
-                        payload_data = json.loads(request_data)["Payload"]
+        self.pack_cards[pack_index] = pack_cards
+        self.__emit(PackSeen(offset=offset, pack=pack,
+                    pick=pick, cards=pack_cards))
 
-                        pack_cards = []
-                        try:
+    def __update_pick(self, pack, pick, card, offset):
+        '''Store a card that was picked by the user'''
+        pack_index = (pick - 1) % 8
 
-                            card_data = json.loads(payload_data)
-                            cards = card_data["CardsInPack"]
+        if self.previous_picked_pack != pack:
+            self.picked_cards = [[] for i in range(8)]
 
-                            for card in cards:
-                                pack_cards.append(str(card))
+        self.picked_cards[pack_index].append(card)
+        self.taken_cards.append(card)
 
-                            pack = card_data["PackNumber"]
-                            pick = card_data["PickNumber"]
+        self.previous_picked_pack = pack
+        self.current_picked_pick = pick
+        self.__emit(PickMade(offset=offset, pack=pack, pick=pick, card=card))
 
-                            pack_index = (pick - 1) % 8
-
-                            if self.current_pack != pack:
-                                self.initial_pack = [[]] * 8
-
-                            if len(self.initial_pack[pack_index]) == 0:
-                                self.initial_pack[pack_index] = pack_cards
-
-                            self.pack_cards[pack_index] = pack_cards
+    def __draft_pack_search_p1p1(self, line, string_offset, offset):
+        '''Parse the premier/traditional draft string that contains the P1P1 pack data'''
+        try:
+            self.draft_log.info(line)
+            pack_cards, pack, pick = decode_p1p1_pack(line)
 
-                            if (self.current_pack == 0) and (self.current_pick == 0):
-                                self.current_pack = pack
-                                self.current_pick = pick
+            self.__update_pack(pack, pick, pack_cards, offset)
 
-                            if self.step_through:
-                                break
+            if (self.current_pack == 0) and (self.current_pick == 0):
+                self.current_pack = pack
+                self.current_pick = pick
 
-                        except Exception as error:
-                            self.draft_log.info(
-                                "__draft_pack_search_premier_p1p1 Sub Error: %s", error)
         except Exception as error:
             self.draft_log.info(
-                "__draft_pack_search_premier_p1p1 Error: %s", error)
+                "__draft_pack_search_p1p1 Error: %s", error)
 
-        return pack_cards
+        return self.step_through
 
-    def __draft_picked_search_premier_v1(self):
-        '''Parse the premier draft string that contains the player pick information'''
-        offset = self.pick_offset
-        draft_data = object()
-        draft_string = "[UnityCrossThreadLogger]==> Event_PlayerDraftMakePick "
-        pack = 0
-        pick = 0
-        # Identify and print out the log lines that contain the draft packs
+    def __draft_pack_search_notify(self, line, string_offset, offset):
+        '''Parse the premier/traditional draft string that contains the non-P1P1 pack data'''
         try:
-            with open(self.arena_file, 'r', encoding="utf-8", errors="replace") as log:
-                log.seek(offset)
-
-                while True:
-                    line = log.readline()
-                    if not line:
-                        break
-                    offset = log.tell()
+            self.pack_offset = offset
+            self.draft_log.info(line)
+            pack_cards, pack, pick = decode_notify_pack(line, string_offset)
 
-                    string_offset = line.find(draft_string)
+            self.__update_pack(pack, pick, pack_cards, offset)
 
-                    if string_offset != -1:
-                        self.pick_offset = offset
-                        start_offset = line.find("{\"id\"")
-                        self.draft_log.info(line)
+            self.current_pack = pack
+            self.current_pick = pick
 
-                        try:
-                            # Identify the pack
-                            draft_data = json.loads(line[start_offset:])
-
-                            request_data = json.loads(draft_data["request"])
-                            param_data = json.loads(request_data["Payload"])
-
-                            pack = int(param_data["Pack"])
-                            pick = int(param_data["Pick"])
-                            card = str(param_data["GrpId"])
-
-                            pack_index = (pick - 1) % 8
-
-                            if self.previous_picked_pack != pack:
-                                self.picked_cards = [[] for i in range(8)]
-
-                            self.picked_cards[pack_index].append(card)
-                            self.taken_cards.append(card)
-
-                            self.previous_picked_pack = pack
-                            self.current_picked_pick = pick
-
-                            if self.step_through:
-                                break
-
-                        except Exception as error:
-                            self.draft_log.info(
-                                "__draft_picked_search_premier_v1 Error: %s", error)
         except Exception as error:
             self.draft_log.info(
-                "__draft_picked_search_premier_v1 Error: %s", error)
-
-    def __draft_pack_search_premier_v1(self):
-        '''Parse the premier draft string that contains the non-P1P1 pack data'''
-        offset = self.pack_offset
-        draft_data = object()
-        draft_string = "[UnityCrossThreadLogger]Draft.Notify "
-        pack_cards = []
-        pack = 0
-        pick = 0
-        # Identify and print out the log lines that contain the draft packs
-        try:
-            with open(self.arena_file, 'r', encoding="utf-8", errors="replace") as log:
-                log.seek(offset)
-
-                while True:
-                    line = log.readline()
-                    if not line:
-                        break
-                    offset = log.tell()
-
-                    string_offset = line.find(draft_string)
+                "__draft_pack_search_notify Error: %s", error)
 
-                    if string_offset != -1:
-                        self.pack_offset = offset
-                        start_offset = line.find("{\"draftId\"")
-                        self.draft_log.info(line)
-                        pack_cards = []
-                        # Identify the pack
-                        draft_data = json.loads(line[start_offset:])
-                        try:
+        return self.step_through
 
-                            cards = draft_data["PackCards"].split(',')
-
-                            for card in cards:
-                                pack_cards.append(str(card))
-
-                            pack = draft_data["SelfPack"]
-                            pick = draft_data["SelfPick"]
-
-                            pack_index = (pick - 1) % 8
-
-                            if self.current_pack != pack:
-                                self.initial_pack = [[]] * 8
-
-                            if len(self.initial_pack[pack_index]) == 0:
-                                self.initial_pack[pack_index] = pack_cards
-
-                            self.pack_cards[pack_index] = pack_cards
-
-                            self.current_pack = pack
-                            self.current_pick = pick
-
-                            if self.step_through:
-                                break
-
-                        except Exception as error:
-                            self.draft_log.info(
-                                "__draft_pack_search_premier_v1 Error: %s", error)
-
-        except Exception as error:
-            self.draft_log.info(
-                "__draft_pack_search_premier_v1 Error: %s", error)
-        return pack_cards
-
-    def __draft_pack_search_premier_v2(self):
-        '''Parse the premier draft string that contains the non-P1P1 pack data'''
-        offset = self.pack_offset
-        draft_data = object()
-        draft_string = "[UnityCrossThreadLogger]Draft.Notify "
-        pack_cards = []
-        pack = 0
-        pick = 0
-        # Identify and print out the log lines that contain the draft packs
+    def __draft_picked_search_make_pick(self, line, string_offset, offset):
+        '''Parse the premier/traditional draft string that contains the player pick information'''
         try:
-            with open(self.arena_file, 'r', encoding="utf-8", errors="replace") as log:
-                log.seek(offset)
-
-                while True:
-                    line = log.readline()
-                    if not line:
-                        break
-                    offset = log.tell()
-
-                    string_offset = line.find(draft_string)
-
-                    if string_offset != -1:
-                        self.pack_offset = offset
-                        self.draft_log.info(line)
-                        pack_cards = []
-                        # Identify the pack
-                        draft_data = json.loads(line[len(draft_string):])
-                        try:
-
-                            cards = draft_data["PackCards"].split(',')
-
-                            for card in cards:
-                                pack_cards.append(str(card))
-
-                            pack = draft_data["SelfPack"]
-                            pick = draft_data["SelfPick"]
-
-                            pack_index = (pick - 1) % 8
-
-                            if self.current_pack != pack:
-                                self.initial_pack = [[]] * 8
-
-                            if len(self.initial_pack[pack_index]) == 0:
-                                self.initial_pack[pack_index] = pack_cards
-
-                            self.pack_cards[pack_index] = pack_cards
+            self.pick_offset = offset
+            self.draft_log.info(line)
+            pack, pick, card = decode_make_pick(line)
 
-                            self.current_pack = pack
-                            self.current_pick = pick
-
-                            if self.step_through:
-                                break
-
-                        except Exception as error:
-                            self.draft_log.info(
-                                "__draft_pack_search_premier_v2 Error: %s", error)
+            self.__update_pick(pack, pick, card, offset)
 
         except Exception as error:
             self.draft_log.info(
-                "__draft_pack_search_premier_v2 Error: %s", error)
-        return pack_cards
+                "__draft_picked_search_make_pick Error: %s", error)
+
+        return self.step_through
 
-    def __draft_picked_search_premier_v2(self):
+    def __draft_picked_search_human_pick(self, line, string_offset, offset):
         '''Parse the premier draft string that contains the player pick data'''
-        offset = self.pick_offset
-        draft_data = object()
-        draft_string = "[UnityCrossThreadLogger]==> Draft.MakeHumanDraftPick "
-        pack = 0
-        pick = 0
-        # Identify and print out the log lines that contain the draft packs
         try:
-            with open(self.arena_file, 'r', encoding="utf-8", errors="replace") as log:
-                log.seek(offset)
-
-                while True:
-                    line = log.readline()
-                    if not line:
-                        break
-                    offset = log.tell()
-
-                    string_offset = line.find(draft_string)
-
-                    if string_offset != -1:
-                        self.draft_log.info(line)
-                        self.pick_offset = offset
-                        try:
-                            # Identify the pack
-                            draft_data = json.loads(line[len(draft_string):])
-
-                            request_data = json.loads(draft_data["request"])
-                            param_data = request_data["params"]
-
-                            pack = int(param_data["packNumber"])
-                            pick = int(param_data["pickNumber"])
-                            card = param_data["cardId"]
-
-                            pack_index = (pick - 1) % 8
-
-                            if self.previous_picked_pack != pack:
-                                self.picked_cards = [[] for i in range(8)]
-
-                            self.picked_cards[pack_index].append(card)
-                            self.taken_cards.append(card)
-
-                            self.previous_picked_pack = pack
-                            self.current_picked_pick = pick
+            self.draft_log.info(line)
+            self.pick_offset = offset
+            pack, pick, card = decode_human_pick(line)
 
-                            if self.step_through:
-                                break
-
-                        except Exception as error:
-                            self.draft_log.info(
-                                "__draft_picked_search_premier_v2 Error: %s", error)
+            self.__update_pick(pack, pick, card, offset)
 
         except Exception as error:
             self.draft_log.info(
-                "__draft_picked_search_premier_v2 Error: %s", error)
+                "__draft_picked_search_human_pick Error: %s", error)
+
+        return self.step_through
 
-    def __draft_pack_search_quick(self):
+    def __draft_pack_search_quick(self, line, string_offset, offset):
         '''Parse the quick draft string that contains the current pack data'''
-        offset = self.pack_offset
-        draft_data = object()
-        draft_string = "DraftPack"
-        pack_cards = []
-        pack = 0
-        pick = 0
-        # Identify and print out the log lines that contain the draft packs
         try:
-            with open(self.arena_file, 'r', encoding="utf-8", errors="replace") as log:
-                log.seek(offset)
-
-                while True:
-                    line = log.readline()
-                    if not line:
-                        break
-                    offset = log.tell()
-
-                    string_offset = line.find(draft_string)
-
-                    if string_offset != -1:
-                        self.pack_offset = offset
-                        # Remove any prefix (e.g. log timestamp)
-                        start_offset = line.find("{\"CurrentModule\"")
-                        self.draft_log.info(line)
-                        draft_data = json.loads(line[start_offset:])
-                        payload_data = json.loads(draft_data["Payload"])
-                        pack_data = payload_data["DraftPack"]
-                        draft_status = payload_data["DraftStatus"]
-
-                        if draft_status == "PickNext":
-                            pack_cards = []
-                            try:
+            self.pack_offset = offset
+            self.draft_log.info(line)
+            draft_status, pack_cards, pack, pick = decode_quick_pack(line)
 
-                                cards = pack_data
+            if draft_status == "PickNext":
+                self.__update_pack(pack, pick, pack_cards, offset)
 
-                                for card in cards:
-                                    pack_cards.append(str(card))
+                self.current_pack = pack
+                self.current_pick = pick
 
-                                pack = payload_data["PackNumber"] + 1
-                                pick = payload_data["PickNumber"] + 1
-                                pack_index = (pick - 1) % 8
+                return self.step_through
 
-                                if self.current_pack != pack:
-                                    self.initial_pack = [[]] * 8
-
-                                if len(self.initial_pack[pack_index]) == 0:
-                                    self.initial_pack[pack_index] = pack_cards
-
-                                self.pack_cards[pack_index] = pack_cards
-
-                                self.current_pack = pack
-                                self.current_pick = pick
-
-                                if self.step_through:
-                                    break
-
-                            except Exception as error:
-                                self.draft_log.info(
-                                    "__draft_pack_search_quick Error: %s", error)
         except Exception as error:
             self.draft_log.info("__draft_pack_search_quick Error: %s", error)
 
-        return pack_cards
+        return False
 
-    def __draft_picked_search_quick(self):
+    def __draft_picked_search_quick(self, line, string_offset, offset):
         '''Parse the quick draft string that contains the player pick data'''
-        offset = self.pick_offset
-        draft_data = object()
-        draft_string = "[UnityCrossThreadLogger]==> BotDraft_DraftPick "
-        pack = 0
-        pick = 0
-        # Identify and print out the log lines that contain the draft packs
         try:
-            with open(self.arena_file, 'r', encoding="utf-8", errors="replace") as log:
-                log.seek(offset)
+            self.draft_log.info(line)
+            self.pick_offset = offset
+            pack, pick, card = decode_quick_pick(line)
 
-                while True:
-                    line = log.readline()
-                    if not line:
-                        break
-                    offset = log.tell()
+            self.__update_pick(pack, pick, card, offset)
 
-                    string_offset = line.find(draft_string)
-
-                    if string_offset != -1:
-                        self.draft_log.info(line)
-                        self.pick_offset = offset
-                        try:
-                            # Identify the pack
-                            draft_data = json.loads(
-                                line[string_offset+len(draft_string):])
-
-                            request_data = json.loads(draft_data["request"])
-                            payload_data = json.loads(request_data["Payload"])
-                            pick_data = payload_data["PickInfo"]
-
-                            pack = pick_data["PackNumber"] + 1
-                            pick = pick_data["PickNumber"] + 1
-                            card = pick_data["CardId"]
-
-                            pack_index = (pick - 1) % 8
-
-                            if self.previous_picked_pack != pack:
-                                self.picked_cards = [[] for i in range(8)]
-
-                            self.previous_picked_pack = pack
-                            self.current_picked_pick = pick
-
-                            self.picked_cards[pack_index].append(card)
-                            self.taken_cards.append(card)
-
-                            if self.step_through:
-                                break
-
-                        except Exception as error:
-                            self.draft_log.info(
-                                "__draft_picked_search_quick Error: %s", error)
         except Exception as error:
             self.draft_log.info("__draft_picked_search_quick Error: %s", error)
 
-    def __draft_pack_search_traditional_p1p1(self):
-        '''Parse the traditional draft string that contains the P1P1 pack data'''
-        offset = self.pack_offset
-        draft_data = object()
-        draft_string = "CardsInPack"
-        pack_cards = []
-        pack = 0
-        pick = 0
-        # Identify and print out the log lines that contain the draft packs
-        try:
-            with open(self.arena_file, 'r', encoding="utf-8", errors="replace") as log:
-                log.seek(offset)
-
-                while True:
-                    line = log.readline()
-                    if not line:
-                        break
-                    offset = log.tell()
-
-                    string_offset = line.find(draft_string)
-
-                    if string_offset != -1:
-                        # Remove any prefix (e.g. log timestamp)
-                        start_offset = line.find("{\"id\":")
-                        self.draft_log.info(line)
-                        draft_data = json.loads(line[start_offset:])
-                        request_data = draft_data["request"]
-                        payload_data = json.loads(request_data)["Payload"]
-
-                        pack_cards = []
-                        try:
-
-                            card_data = json.loads(payload_data)
-                            cards = card_data["CardsInPack"]
-
-                            for card in cards:
-                                pack_cards.append(str(card))
-
-                            pack = card_data["PackNumber"]
-                            pick = card_data["PickNumber"]
-
-                            pack_index = (pick - 1) % 8
-
-                            if self.current_pack != pack:
-                                self.initial_pack = [[]] * 8
-
-                            if len(self.initial_pack[pack_index]) == 0:
-                                self.initial_pack[pack_index] = pack_cards
-
-                            self.pack_cards[pack_index] = pack_cards
-
-                            if (self.current_pack == 0) and (self.current_pick == 0):
-                                self.current_pack = pack
-                                self.current_pick = pick
-
-                            if self.step_through:
-                                break
-
-                        except Exception as error:
-                            self.draft_log.info(
-                                "__draft_pack_search_traditional_p1p1 Error: %s", error)
-        except Exception as error:
-            self.draft_log.info(
-                "__draft_pack_search_traditional_p1p1 Error: %s", error)
-
-        return pack_cards
-
-    def __draft_picked_search_traditional(self):
-        '''Parse the traditional draft string that contains the player pick data'''
-        offset = self.pick_offset
-        draft_data = object()
-        draft_string = "[UnityCrossThreadLogger]==> Event_PlayerDraftMakePick "
-        pack = 0
-        pick = 0
-        # Identify and print out the log lines that contain the draft packs
-        try:
-            with open(self.arena_file, 'r', encoding="utf-8", errors="replace") as log:
-                log.seek(offset)
-
-                while True:
-                    line = log.readline()
-                    if not line:
-                        break
-                    offset = log.tell()
-
-                    string_offset = line.find(draft_string)
-
-                    if string_offset != -1:
-                        self.pick_offset = offset
-                        start_offset = line.find("{\"id\"")
-                        self.draft_log.info(line)
-
-                        try:
-                            # Identify the pack
-                            draft_data = json.loads(line[start_offset:])
-
-                            request_data = json.loads(draft_data["request"])
-                            param_data = json.loads(request_data["Payload"])
-
-                            pack = int(param_data["Pack"])
-                            pick = int(param_data["Pick"])
-                            card = str(param_data["GrpId"])
-
-                            pack_index = (pick - 1) % 8
-
-                            if self.previous_picked_pack != pack:
-                                self.picked_cards = [[] for i in range(8)]
-
-                            self.picked_cards[pack_index].append(card)
-                            self.taken_cards.append(card)
-
-                            self.previous_picked_pack = pack
-                            self.current_picked_pick = pick
-
-                            if self.step_through:
-                                break
-
-                        except Exception as error:
-                            self.draft_log.info(
-                                "__draft_picked_search_traditional Error: %s", error)
-        except Exception as error:
-            self.draft_log.info(
-                "__draft_picked_search_traditional Error: %s", error)
-
-    def __draft_pack_search_traditional(self):
-        '''Parse the quick draft string that contains the non-P1P1 pack data'''
-        offset = self.pack_offset
-        draft_data = object()
-        draft_string = "[UnityCrossThreadLogger]Draft.Notify "
-        pack_cards = []
-        pack = 0
-        pick = 0
-        # Identify and print out the log lines that contain the draft packs
-        try:
-            with open(self.arena_file, 'r', encoding="utf-8", errors="replace") as log:
-                log.seek(offset)
-
-                while True:
-                    line = log.readline()
-                    if not line:
-                        break
-                    offset = log.tell()
-
-                    string_offset = line.find(draft_string)
-
-                    if string_offset != -1:
-                        self.pack_offset = offset
-                        start_offset = line.find("{\"draftId\"")
-                        self.draft_log.info(line)
-                        pack_cards = []
-                        # Identify the pack
-                        draft_data = json.loads(line[start_offset:])
-                        try:
+        return self.step_through
 
-                            cards = draft_data["PackCards"].split(',')
-
-                            for card in cards:
-                                pack_cards.append(str(card))
-
-                            pack = draft_data["SelfPack"]
-                            pick = draft_data["SelfPick"]
-
-                            pack_index = (pick - 1) % 8
-
-                            if self.current_pack != pack:
-                                self.initial_pack = [[]] * 8
-
-                            if len(self.initial_pack[pack_index]) == 0:
-                                self.initial_pack[pack_index] = pack_cards
-
-                            self.pack_cards[pack_index] = pack_cards
-
-                            self.current_pack = pack
-                            self.current_pick = pick
-
-                            if self.step_through:
-                                break
-
-                        except Exception as error:
-                            self.draft_log.info(
-                                "__draft_pack_search_traditional Error: %s", error)
-
-        except Exception as error:
-            self.draft_log.info(
-                "__draft_pack_search_traditional Error: %s", error)
-        return pack_cards
-
-    def __sealed_pack_search(self):
+    def __sealed_pack_search(self, line, string_offset, offset):
         '''Parse sealed string that contains all of the card data'''
-        offset = self.pack_offset
-        draft_data = object()
-        draft_string = "EventGrantCardPool"
-        update = False
-        # Identify and print out the log lines that contain the draft packs
         try:
-            with open(self.arena_file, 'r', encoding="utf-8", errors="replace") as log:
-                log.seek(offset)
-
-                while True:
-                    line = log.readline()
-                    if not line:
-                        break
-                    offset = log.tell()
-
-                    string_offset = line.find(draft_string)
-
-                    if string_offset != -1:
-                        update = True
-                        self.pack_offset = offset
-                        start_offset = line.find("{\"CurrentModule\"")
-                        self.draft_log.info(line)
-                        # Identify the pack
-                        draft_data = json.loads(line[start_offset:])
-                        payload_data = json.loads(draft_data["Payload"])
-                        changes = payload_data["Changes"]
-                        try:
-                            card_pool = []
-                            for change in changes:
-                                if change["Source"] == "EventGrantCardPool":
-                                    card_list_data = change["GrantedCards"]
-                                    for card_data in card_list_data:
-                                        card = str(card_data["GrpId"])
-                                        card_pool.append(card)
-                            self.__sealed_update(card_pool)
-                        except Exception as error:
-                            self.draft_log.info(
-                                "__sealed_pack_search Error: %s", error)
+            self.sealed_update = True
+            self.pack_offset = offset
+            start_offset = line.find("{\"CurrentModule\"")
+            self.draft_log.info(line)
+            # Identify the pack
+            draft_data = PD.json_loads(line[start_offset:])
+            payload_data = PD.json_loads(draft_data["Payload"])
+            card_pool = []
+            for change in payload_data["Changes"]:
+                if change["Source"] == "EventGrantCardPool":
+                    for card_data in change["GrantedCards"]:
+                        card_pool.append(str(card_data["GrpId"]))
+            self.__sealed_update(card_pool, offset)
 
         except Exception as error:
             self.draft_log.info("__sealed_pack_search Error: %s", error)
-        return update
 
-    def __sealed_pack_search_v2(self):
+        return False
+
+    def __sealed_pack_search_v2(self, line, string_offset, offset):
         '''Parse sealed string that contains all of the card data'''
-        offset = self.pack_offset
-        draft_string = f'\"InternalEventName\":\"{self.event_string}\"'
-        update = False
-        # Identify and print out the log lines that contain the draft packs
         try:
-            with open(self.arena_file, 'r', encoding="utf-8", errors="replace") as log:
-                log.seek(offset)
-
-                while True:
-                    line = log.readline()
-                    if not line:
-                        break
-                    offset = log.tell()
-
-                    #string_offset = line.find(draft_string)
-                    if (draft_string in line) and ("CardPool" in line):
-                        try:
-                            self.pack_offset = offset
-                            self.draft_log.info(line)
-                            start_offset = line.find("{\"Courses\"")
-                            course_data = json.loads(line[start_offset:])
-
-                            for course in course_data["Courses"]:
-                                if course["InternalEventName"] == self.event_string:
-                                    card_pool = [str(x) for x in course["CardPool"]]
-                                    self.__sealed_update(card_pool)
-
-                            update = True
-                        except Exception as error:
-                            self.draft_log.info(
-                                "__sealed_pack_search_v2 Error: %s", error)
+            self.pack_offset = offset
+            self.draft_log.info(line)
+            start_offset = line.find("{\"Courses\"")
+            course_data = PD.json_loads(line[start_offset:])
+
+            for course in course_data["Courses"]:
+                if course["InternalEventName"] == self.event_string:
+                    card_pool = [str(x) for x in course["CardPool"]]
+                    self.__sealed_update(card_pool, offset)
 
+            self.sealed_update = True
         except Exception as error:
             self.draft_log.info("__sealed_pack_search_v2 Error: %s", error)
-        return update
-        
-    def __sealed_update(self, cards):
-        
+
+        return False
+
+    def __sealed_update(self, cards, offset):
+        '''Store the sealed card pool'''
         if not self.taken_cards:
             self.taken_cards.extend(cards)
+            self.__emit(SealedPool(offset=offset, cards=list(cards)))
 
     def retrieve_data_sources(self):
         '''Return a list of set files that can be used with the current active draft'''
@@ -965,19 +810,17 @@ class ArenaScanner:
                     draft_list.index(draft_type)))
 
                 # Search for the set files
+                catalog = SC.retrieve_set_catalog(self.sets_location)
                 for draft_set in self.draft_sets:
                     for draft_type in draft_list:
                         file_name = "_".join(
                             (draft_set, draft_type, constants.SET_FILE_SUFFIX))
-                        file = FE.search_local_files(
-                            [self.sets_location], [file_name])
-                        if file:
-                            result = FE.check_file_integrity(file[0])
-
-                            if result[0] == FE.Result.VALID:
-                                type_string = f"[{draft_set[0:3]}]{draft_type}" if re.findall(
-                                    r"^[Yy]\d{2}", draft_set) else draft_type
-                                data_sources[type_string] = file[0]
+                        entry = catalog.retrieve_entry(file_name)
+                        if entry and entry.valid:
+                            type_string = f"[{draft_set[0:3]}]{draft_type}" if re.findall(
+                                r"^[Yy]\d{2}", draft_set) else draft_type
+                            data_sources[type_string] = os.path.join(
+                                self.sets_location, file_name)
 
         except Exception as error:
             logger.error(error)
@@ -1008,12 +851,22 @@ class ArenaScanner:
         '''Retrieve set data from the set data files'''
         result = FE.Result.ERROR_MISSING_FILE
         self.set_data = None
+        self.ratings_matrix = None
+        self.ratings_engine = None
 
         try:
-            result, json_data = FE.check_file_integrity(file)
+            # The catalog entry allows the set to be loaded from the matrix file without parsing the set file
+            entry = None
+            catalog = SC.retrieve_set_catalog(self.sets_location)
+            if os.path.abspath(os.path.dirname(file)) == catalog.data.location:
+                entry = catalog.retrieve_entry(os.path.basename(file))
+            result, set_data, ratings_matrix = load_set_file(file, entry)
 
             if result == FE.Result.VALID:
-                self.set_data = json_data
+                CL.profile_cards(set_data["card_ratings"].cards.values())
+                self.set_data = set_data
+                self.ratings_matrix = ratings_matrix
+                self.ratings_engine = RatingsEngine(self.ratings_matrix)
 
         except Exception as error:
             logger.error(error)
@@ -1025,7 +878,10 @@ class ArenaScanner:
         set_metrics = CL.SetMetrics()
 
         try:
-            if self.set_data:
+            if self.ratings_engine:
+                set_metrics.mean, set_metrics.standard_deviation = self.ratings_engine.set_metrics(
+                    bayesian_enabled)
+            elif self.set_data:
                 set_metrics.mean = CL.calculate_mean(
                     self.set_data["card_ratings"], bayesian_enabled)
                 set_metrics.standard_deviation = CL.calculate_standard_deviation(
@@ -1123,6 +979,11 @@ class ArenaScanner:
             taken_cards.append(retrieve_card_data(self.set_data, card))
         return taken_cards
 
+    def retrieve_pool_aggregate(self):
+        '''Return the running totals for the taken cards, adding the cards that were picked since the last call'''
+        return self.pool_aggregate.sync(self.taken_cards, self.set_data,
+                                        lambda card: retrieve_card_data(self.set_data, card))
+
     def retrieve_tier_data(self, files):
         '''Parse a tier list file and return the tier data'''
         tier_data = {}
@@ -0,0 +1,258 @@
+"""This module contains the classes that are used for tailing the Arena log and dispatching lines to registered matchers"""
+import os
+import hashlib
+from dataclasses import dataclass
+from typing import Callable, List
+from src.logger import create_logger
+
+logger = create_logger()
+
+TAILER_CHUNK_SIZE = 1024 * 1024
+FINGERPRINT_HEAD_SIZE = 4096
+
+
+@dataclass
+class LogFingerprint:
+    '''Identifies a log file by its device, inode, and a hash of the first few KB'''
+    device: int = 0
+    inode: int = 0
+    head_size: int = 0
+    head_hash: str = ""
+
+
+def hash_file_head(filename, head_size):
+    '''Return the size and the SHA-1 hash of the first head_size bytes of a file'''
+    with open(filename, 'rb') as file:
+        head = file.read(head_size)
+    return len(head), hashlib.sha1(head).hexdigest()
+
+
+def create_fingerprint(filename, head_size=FINGERPRINT_HEAD_SIZE):
+    '''Create the fingerprint for a log file'''
+    stat = os.stat(filename)
+    size, head_hash = hash_file_head(filename, head_size)
+    return LogFingerprint(device=stat.st_dev,
+                          inode=stat.st_ino,
+                          head_size=size,
+                          head_hash=head_hash)
+
+
+def fingerprint_matches(fingerprint, filename):
+    '''Check if a file is the same file that was used to create the fingerprint
+
+       A fingerprint that was created before the file reached FINGERPRINT_HEAD_SIZE bytes
+       is compared against the same number of bytes from the current file
+    '''
+    try:
+        stat = os.stat(filename)
+        if (stat.st_dev, stat.st_ino) != (fingerprint.device, fingerprint.inode):
+            return False
+        size, head_hash = hash_file_head(filename, fingerprint.head_size)
+        return (size == fingerprint.head_size) and (head_hash == fingerprint.head_hash)
+    except OSError:
+        return False
+
+
+@dataclass
+class LineMatcher:
+    '''Describes a line of interest within the log and the callback that processes it
+       - markers: every string in this list must be present in the line
+       - callback: called as callback(line, marker_offset, line_end_offset); returning True stops the current pass
+       - enabled: optional predicate that's checked before the line is handed to the callback
+       - offset: logical cursor that records the end of the last matched line
+    '''
+    name: str
+    markers: List[str]
+    callback: Callable
+    enabled: Callable = None
+    offset: int = 0
+
+
+@dataclass
+class TailerMetrics:
+    bytes_read: int = 0
+    lines_decoded: int = 0
+    lines_matched: int = 0
+    passes: int = 0
+
+
+class LogTailer:
+    '''Class that reads each new byte range of a log file exactly once and hands the lines to a registry of matchers'''
+
+    def __init__(self, filename: str = "", chunk_size: int = TAILER_CHUNK_SIZE):
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.offset = 0
+        self.matchers: List[LineMatcher] = []
+        self.metrics = TailerMetrics()
+        self.registry_version = 0
+
+    def set_file(self, filename: str):
+        '''Point the tailer at a new file and restart from the beginning'''
+        self.filename = filename
+        self.reset()
+
+    def reset(self, offset: int = 0):
+        '''Move the read cursor and all of the matcher cursors to the offset'''
+        self.offset = offset
+        for matcher in self.matchers:
+            matcher.offset = offset
+
+    def register(self, matcher: LineMatcher):
+        '''Add a matcher to the registry. The matcher starts at the current read offset'''
+        matcher.offset = max(matcher.offset, self.offset)
+        self.matchers.append(matcher)
+        self.registry_version += 1
+        return matcher
+
+    def unregister(self, name: str):
+        '''Remove all of the matchers that share a name'''
+        self.matchers = [x for x in self.matchers if x.name != name]
+        self.registry_version += 1
+
+    def process(self):
+        '''Read all of the complete lines between the read offset and the end of the file
+
+           The file is read in binary chunks and the raw bytes are searched for the matcher markers.
+           Only the lines that contain a marker are decoded and handed to the matchers.
+           A trailing line that hasn't been terminated yet is left for the next pass so that
+           partially written entries are never handed to a matcher
+        '''
+        self.metrics.passes += 1
+        with open(self.filename, 'rb') as log:
+            while True:
+                log.seek(self.offset)
+                chunk = self._read_chunk(log)
+                if not chunk:
+                    break
+                stop, consumed = self._scan_chunk(chunk)
+                self.metrics.bytes_read += consumed
+                self.offset += consumed
+                if stop:
+                    break
+
+        return self.offset
+
+    def _read_chunk(self, log) -> bytes:
+        '''Read a block of complete lines from the current position'''
+        chunk = log.read(self.chunk_size)
+        end = chunk.rfind(b"\n")
+        while end == -1:
+            # A single line is longer than the chunk size, so keep reading until it's terminated
+            data = log.read(self.chunk_size)
+            if not data:
+                return b""
+            end = data.rfind(b"\n")
+            if end != -1:
+                end += len(chunk)
+            chunk += data
+        return chunk[:end + 1]
+
+    def _scan_chunk(self, chunk: bytes):
+        '''Search a block of lines for the matcher markers and dispatch the lines that match
+
+           Returns a tuple with the stop flag and the number of bytes that were consumed
+        '''
+        matchers = list(self.matchers)
+        version = self.registry_version
+        hits = []
+        for index, matcher in enumerate(matchers):
+            marker = matcher.markers[0].encode("utf-8")
+            position = chunk.find(marker)
+            while position != -1:
+                line_start = chunk.rfind(b"\n", 0, position) + 1
+                line_end = chunk.find(b"\n", position) + 1
+                hits.append((line_start, index, line_end))
+                position = chunk.find(marker, line_end)
+
+        hits.sort()
+        decoded_start = -1
+        line = ""
+        for line_start, index, line_end in hits:
+            matcher = matchers[index]
+            if self.offset + line_end <= matcher.offset:
+                continue
+            if matcher.enabled and not matcher.enabled():
+                continue
+            if decoded_start != line_start:
+                line = chunk[line_start:line_end].decode("utf-8", errors="replace")
+                decoded_start = line_start
+                self.metrics.lines_decoded += 1
+            if not all(x in line for x in matcher.markers[1:]):
+                continue
+            if self._dispatch(matcher, line, self.offset + line_end):
+                return True, line_end
+            if version != self.registry_version:
+                # The registry changed, so the rest of the chunk needs to be searched with the new matchers
+                return False, line_end
+
+        return False, len(chunk)
+
+    def _dispatch(self, matcher: LineMatcher, line: str, line_end: int) -> bool:
+        '''Hand a line to a matcher'''
+        stop = False
+        matcher.offset = line_end
+        self.metrics.lines_matched += 1
+        try:
+            stop = bool(matcher.callback(line, line.find(matcher.markers[0]), line_end))
+        except Exception as error:
+            logger.error("%s: %s", matcher.name, error)
+        return stop
+
+    def reverse_search(self, markers: List[str]):
+        '''Search the file backwards, from the last complete line to the start, in fixed-size blocks
+
+           Yields a tuple with the line start offset and the decoded line for every line that contains one of the markers
+        '''
+        encoded_markers = [x.encode("utf-8") for x in markers]
+        with open(self.filename, 'rb') as log:
+            block_end = self.last_line_end(log)
+            carry = b""
+            while block_end > 0:
+                block_start = max(block_end - self.chunk_size, 0)
+                log.seek(block_start)
+                data = log.read(block_end - block_start) + carry
+                self.metrics.bytes_read += block_end - block_start
+                region_start = 0
+                if block_start > 0:
+                    # The first line in the block might have started in an earlier block
+                    region_start = data.find(b"\n") + 1
+                    carry = data[:region_start] if region_start else data
+                block_end = block_start
+                if not region_start and block_start > 0:
+                    continue
+
+                line_starts = set()
+                for marker in encoded_markers:
+                    position = data.rfind(marker, region_start)
+                    while position != -1:
+                        line_start = data.rfind(b"\n", region_start, position) + 1
+                        line_starts.add(max(line_start, region_start))
+                        position = data.rfind(marker, region_start, max(line_start - 1, region_start))
+
+                for line_start in sorted(line_starts, reverse=True):
+                    line_end = data.find(b"\n", line_start) + 1
+                    self.metrics.lines_decoded += 1
+                    yield (block_start + line_start,
+                           data[line_start:line_end].decode("utf-8", errors="replace"))
+
+    def last_line_end(self, log=None) -> int:
+        '''Return the offset of the end of the last complete line in the file'''
+        if log is None:
+            with open(self.filename, 'rb') as log_file:
+                return self.last_line_end(log_file)
+
+        position = log.seek(0, os.SEEK_END)
+        while position > 0:
+            block_start = max(position - self.chunk_size, 0)
+            log.seek(block_start)
+            data = log.read(position - block_start)
+            newline = data.rfind(b"\n")
+            if newline != -1:
+                return block_start + newline + 1
+            position = block_start
+        return 0
+
+    def file_size(self) -> int:
+        '''Return the current size of the tailed file'''
+        return os.path.getsize(self.filename)
@@ -1,12 +1,25 @@
 import os
 import sys
+import queue
+import gzip
+import atexit
 import logging
+import multiprocessing
 import logging.handlers
 
 
 DEBUG_LOG_FOLDER = os.path.join(os.getcwd(), "Debug")
 DEBUG_LOG_FILE = os.path.join(DEBUG_LOG_FOLDER, "debug.log")
 DEBUG_LOGGER_NAME = "debug_log"
+DEBUG_LOG_QUEUE_SIZE = 10000
+
+DRAFT_LOGGER_NAME = "draftLog"
+DRAFT_LOG_QUEUE_SIZE = 1000
+
+DRAFT_EVENT_LOGGER_NAME = "draftEventLog"
+
+# Maximum number of records that are written before the handlers are flushed, if the queue never drains
+LOG_BATCH_SIZE = 500
 
 if not os.path.exists(DEBUG_LOG_FOLDER):
     os.makedirs(DEBUG_LOG_FOLDER)
@@ -35,24 +48,255 @@ class CustomFormatter(logging.Formatter):
         return result
 
 
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records, instead of blocking the caller, when the bounded queue is full"""
+
+    def __init__(self, log_queue):
+        logging.handlers.QueueHandler.__init__(self, log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchFlushMixin:
+    """Handler mixin that skips the flush after each record. The BatchQueueListener flushes the handler
+       once the queue is drained, so a burst of records is written with a single flush
+    """
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+    def close(self):
+        self.flush_batch()
+        super().close()
+
+
+class BatchStreamHandler(BatchFlushMixin, logging.StreamHandler):
+    pass
+
+
+class BatchFileHandler(BatchFlushMixin, logging.FileHandler):
+    pass
+
+
+class BatchTimedRotatingFileHandler(BatchFlushMixin, logging.handlers.TimedRotatingFileHandler):
+    pass
+
+
+class BatchGzipFileHandler(BatchFileHandler):
+    """File handler that writes a gzip-compressed text file
+
+       Each batch is closed as a separate gzip member so that the file can be read while the handler is active
+    """
+
+    def _open(self):
+        return gzip.open(self.baseFilename, self.mode + "t", encoding=self.encoding or "utf-8")
+
+    def flush_batch(self):
+        self.acquire()
+        try:
+            if self.stream:
+                self.stream.close()
+                self.stream = None
+        finally:
+            self.release()
+
+
+class HandlerSwap:
+    """Control object that's sent through the queue to replace the listener handlers
+
+       The swap is processed in order with the records, so the records that were logged before the swap
+       are written to the previous handlers
+    """
+
+    def __init__(self, handlers):
+        self.handlers = tuple(handlers)
+
+
+class BatchQueueListener(logging.handlers.QueueListener):
+    """Queue listener that writes the records from a background thread and flushes the handlers in batches"""
+
+    def __init__(self, log_queue, *handlers):
+        logging.handlers.QueueListener.__init__(self, log_queue, *handlers)
+        self.batch_count = 0
+
+    def dequeue(self, block):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            if not block:
+                raise
+        # The queue is drained, so write out the batch before waiting for the next record
+        self.flush_handlers()
+        return self.queue.get(block=True)
+
+    def handle(self, record):
+        if isinstance(record, HandlerSwap):
+            self.flush_handlers()
+            for handler in self.handlers:
+                if handler not in record.handlers:
+                    handler.close()
+            self.handlers = record.handlers
+            return
+        logging.handlers.QueueListener.handle(self, record)
+        self.batch_count += 1
+        if self.batch_count >= LOG_BATCH_SIZE:
+            self.flush_handlers()
+
+    def flush_handlers(self):
+        """Flush the handlers"""
+        self.batch_count = 0
+        for handler in self.handlers:
+            try:
+                if isinstance(handler, BatchFlushMixin):
+                    handler.flush_batch()
+                else:
+                    handler.flush()
+            except (OSError, ValueError):
+                # Same as logging.shutdown(), the stream might already be closed at exit
+                pass
+
+    def swap_handlers(self, *handlers):
+        """Replace the handlers after the records that are already in the queue have been written"""
+        self.queue.put(HandlerSwap(handlers))
+
+    def enqueue_sentinel(self):
+        # The sentinel must not be dropped when the queue is full
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        if self._thread:
+            logging.handlers.QueueListener.stop(self)
+            self.flush_handlers()
+
+
+def worker_process():
+    """Check if the module was loaded by a worker process (e.g., a spawned process pool worker)"""
+    return multiprocessing.current_process().name != "MainProcess"
+
+
+def direct_handler(handler):
+    """Return a handler that writes each record to the same destination as a listener handler
+
+       The file is appended to without rotation, and the gzip-compressed draft event log isn't shared, so None is
+       returned for it
+    """
+    direct = None
+    if isinstance(handler, BatchGzipFileHandler):
+        return None
+    if isinstance(handler, logging.FileHandler):
+        direct = logging.FileHandler(handler.baseFilename, mode="a", encoding=handler.encoding, delay=True)
+    elif isinstance(handler, logging.StreamHandler):
+        direct = logging.StreamHandler(handler.stream)
+    if direct:
+        direct.setLevel(handler.level)
+        direct.setFormatter(handler.formatter)
+    return direct
+
+
+def use_direct_handlers(queue_logger, queue_handler, listener):
+    """Replace the queue handler of a logger with direct handlers in a worker process
+
+       A worker process doesn't start its own listener thread. In a forked process, the listener thread doesn't exist
+       and the queue lock might have been held by the thread when the process was forked, so the queue isn't used
+    """
+    listener._thread = None
+    listener.queue = queue_handler.queue = queue.Queue()
+    queue_logger.removeHandler(queue_handler)
+    for handler in listener.handlers:
+        direct = direct_handler(handler)
+        if direct:
+            queue_logger.addHandler(direct)
+    if not queue_logger.handlers:
+        queue_logger.addHandler(logging.NullHandler())
+
+
+def create_queue_logger(name, queue_size, *handlers):
+    """Route a logger through a bounded queue to a listener thread that writes to the handlers
+
+       The records of a worker process are written directly (see use_direct_handlers)
+    """
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    listener = BatchQueueListener(log_queue, *handlers)
+    queue_logger = logging.getLogger(name)
+    queue_logger.addHandler(queue_handler)
+    if worker_process():
+        use_direct_handlers(queue_logger, queue_handler, listener)
+    else:
+        listener.start()
+        atexit.register(listener.stop)
+
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=lambda: use_direct_handlers(queue_logger, queue_handler, listener))
+    return queue_handler, listener
+
+
 # Create the shared logger
 shared_logger = logging.getLogger(DEBUG_LOGGER_NAME)
 shared_logger.setLevel(logging.DEBUG)
 
 # Create a file handler for the shared logger
 handlers = {
-    logging.handlers.TimedRotatingFileHandler(
-        DEBUG_LOG_FILE, when='D', interval=1, backupCount=7, utc=True),
-    logging.StreamHandler(sys.stdout),
+    BatchTimedRotatingFileHandler(
+        DEBUG_LOG_FILE, when='D', interval=1, backupCount=7, utc=True, delay=True),
+    BatchStreamHandler(sys.stdout),
 }
 
 formatter = CustomFormatter()
 
 for handler in handlers:
     handler.setFormatter(formatter)
-    shared_logger.addHandler(handler)
+
+debug_queue_handler, debug_listener = create_queue_logger(
+    DEBUG_LOGGER_NAME, DEBUG_LOG_QUEUE_SIZE, *handlers)
+
+# The draft log handlers are assigned when a draft is detected
+draft_queue_handler, draft_listener = create_queue_logger(
+    DRAFT_LOGGER_NAME, DRAFT_LOG_QUEUE_SIZE)
+draft_event_queue_handler, draft_event_listener = create_queue_logger(
+    DRAFT_EVENT_LOGGER_NAME, DRAFT_LOG_QUEUE_SIZE)
 
 
 def create_logger():
     logger = logging.getLogger(DEBUG_LOGGER_NAME)
     return logger
+
+
+def set_draft_log_file(log_path):
+    """Direct the draft log records to a new file"""
+    formatter = logging.Formatter(
+        '%(asctime)s,%(message)s', datefmt='<%d%m%Y %H:%M:%S>')
+    file_handler = BatchFileHandler(log_path, delay=True)
+    file_handler.setFormatter(formatter)
+    draft_listener.swap_handlers(file_handler)
+
+
+def set_draft_event_log_file(log_path, compress):
+    """Direct the draft event records to a new file"""
+    handler_type = BatchGzipFileHandler if compress else BatchFileHandler
+    file_handler = handler_type(log_path, delay=True, encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter('%(message)s'))
+    draft_event_listener.swap_handlers(file_handler)
+
+
+def retrieve_dropped_records():
+    """Return the number of records that were dropped because a log queue was full"""
+    return {DEBUG_LOGGER_NAME: debug_queue_handler.dropped,
+            DRAFT_LOGGER_NAME: draft_queue_handler.dropped,
+            DRAFT_EVENT_LOGGER_NAME: draft_event_queue_handler.dropped}
+
+
+def flush_logs():
+    """Block until the queued records have been written"""
+    for listener in (debug_listener, draft_listener, draft_event_listener):
+        if listener._thread:
+            listener.queue.join()
+            listener.flush_handlers()
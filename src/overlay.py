@@ -8,6 +8,7 @@ import os
 import sys
 import io
 import math
+import time
 import argparse
 import webbrowser
 from dataclasses import dataclass
@@ -17,11 +18,15 @@ from PIL import Image, ImageTk, ImageFont
 from src.configuration import read_configuration, write_configuration, reset_configuration
 from src.limited_sets import LimitedSets
 from src.log_scanner import ArenaScanner
+from src.log_monitor import LogMonitor
+from src.draft_log import DraftEventLog
 from src import file_extractor as FE
 from src import card_logic as CL
+from src.sealed_explorer import explore_sealed_pool
 from src import constants
-from src.logger import create_logger
+from src.logger import create_logger, retrieve_dropped_records
 from src.app_update import AppUpdate
+from src.http_client import default_client
 
 try:
     import win32api
@@ -353,6 +358,10 @@ class Overlay(ScaledWindow):
         self.limited_sets = LimitedSets().retrieve_limited_sets()
         self.draft = ArenaScanner(
             self.arena_file, self.limited_sets, step_through=self.step_through)
+        # A draft that was resumed from the scanner checkpoint is replayed to the listener when it's added
+        self.draft_event_log = DraftEventLog(compress=(self.configuration.settings.draft_log_format ==
+                                                       constants.DRAFT_LOG_FORMAT_JSONL_GZIP))
+        self.draft.add_listener(self.draft_event_log)
 
         self.trace_ids = []
         self.tier_data = {}
@@ -485,6 +494,7 @@ class Overlay(ScaledWindow):
         self.compare_table = None
         self.compare_list = None
         self.suggester_table = None
+        self.suggest_deck_request = None
 
         self.about_window_open = False
         self.sets_window_open = False
@@ -601,9 +611,8 @@ class Overlay(ScaledWindow):
         self.data_source_options.pack(expand=True, fill=None, anchor="w")
         self.deck_colors_label.pack(expand=True, fill=None, anchor="e")
         self.deck_colors_options.pack(expand=True, fill=None, anchor="w")
-        self.current_timestamp = 0
-        self.previous_timestamp = 0
         self.log_check_id = None
+        self.log_monitor = LogMonitor(self.arena_file)
 
         self.__update_settings_data()
         self.__update_overlay_callback(False)
@@ -630,6 +639,11 @@ class Overlay(ScaledWindow):
         if self.log_check_id is not None:
             self.root.after_cancel(self.log_check_id)
             self.log_check_id = None
+        self.log_monitor.stop()
+        self.draft.save_checkpoint()
+        CL.shutdown_suggest_deck_executor()
+        default_client().close()
+        logger.info("Dropped log records: %s", retrieve_dropped_records())
         self.root.destroy()
 
     def lift_window(self):
@@ -645,6 +659,7 @@ class Overlay(ScaledWindow):
     def main_loop(self):
         '''Run the TKinter overlay'''
         self.root.mainloop()
+        self.draft.save_checkpoint()
 
     def __set_os_configuration(self):
         '''Configure the overlay based on the operating system'''
@@ -782,7 +797,7 @@ class Overlay(ScaledWindow):
             #selected_option = self.deck_filter_selection.get()
             selected_color = self.deck_colors[selected_option]
             filtered_colors = CL.option_filter(
-                cards, selected_color, self.set_metrics, self.configuration)
+                cards, selected_color, self.set_metrics, self.configuration, self.draft.retrieve_pool_aggregate())
 
             if selected_color == constants.FILTER_OPTION_AUTO:
                 new_key = f"{constants.FILTER_OPTION_AUTO} ({'/'.join(filtered_colors)})"
@@ -802,7 +817,8 @@ class Overlay(ScaledWindow):
         '''Update the table that lists the cards within the current pack'''
         try:
             result_class = CL.CardResult(
-                self.set_metrics, self.tier_data, self.configuration, self.draft.current_pick)
+                self.set_metrics, self.tier_data, self.configuration, self.draft.current_pick,
+                self.draft.ratings_engine)
             result_list = result_class.return_results(
                 card_list, filtered_colors, fields)
 
@@ -839,7 +855,7 @@ class Overlay(ScaledWindow):
                 self.pack_table.insert(
                     "", index=count, iid=count, values=field_values, tag=(row_tag,))
             self.pack_table.bind("<<TreeviewSelect>>", lambda event: self.__process_table_click(
-                event, table=self.pack_table, card_list=card_list, selected_color=filtered_colors, fields=fields))
+                event, table=self.pack_table, card_list=result_list, selected_color=filtered_colors, fields=fields))
         except Exception as error:
             logger.error(error)
 
@@ -864,7 +880,8 @@ class Overlay(ScaledWindow):
 
                 if list_length:
                     result_class = CL.CardResult(
-                        self.set_metrics, self.tier_data, self.configuration, self.draft.current_pick)
+                        self.set_metrics, self.tier_data, self.configuration, self.draft.current_pick,
+                        self.draft.ratings_engine)
                     result_list = result_class.return_results(
                         missing_cards, filtered_colors, fields)
 
@@ -892,7 +909,7 @@ class Overlay(ScaledWindow):
                         self.missing_table.insert(
                             "", index=count, iid=count, values=field_values, tag=(row_tag,))
                     self.missing_table.bind("<<TreeviewSelect>>", lambda event: self.__process_table_click(
-                        event, table=self.missing_table, card_list=missing_cards, selected_color=filtered_colors, fields=fields))
+                        event, table=self.missing_table, card_list=result_list, selected_color=filtered_colors, fields=fields))
         except Exception as error:
             logger.error(error)
 
@@ -933,7 +950,8 @@ class Overlay(ScaledWindow):
                         self.compare_list.append(cards[0])
 
             result_class = CL.CardResult(
-                self.set_metrics, self.tier_data, self.configuration, self.draft.current_pick)
+                self.set_metrics, self.tier_data, self.configuration, self.draft.current_pick,
+                self.draft.ratings_engine)
             result_list = result_class.return_results(
                 self.compare_list, filtered_colors, fields)
 
@@ -968,7 +986,7 @@ class Overlay(ScaledWindow):
                 self.compare_table.insert(
                     "", index=count, iid=count, values=field_values, tag=(row_tag,))
             self.compare_table.bind("<<TreeviewSelect>>", lambda event: self.__process_table_click(
-                event, table=self.compare_table, card_list=self.compare_list, selected_color=filtered_colors, fields=fields))
+                event, table=self.compare_table, card_list=result_list, selected_color=filtered_colors, fields=fields))
         except Exception as error:
             logger.error(error)
 
@@ -1031,7 +1049,8 @@ class Overlay(ScaledWindow):
                     self.taken_table.delete(row)
 
                 result_class = CL.CardResult(
-                    self.set_metrics, self.tier_data, self.configuration, self.draft.current_pick)
+                    self.set_metrics, self.tier_data, self.configuration, self.draft.current_pick,
+                    self.draft.ratings_engine)
                 result_list = result_class.return_results(
                     stacked_cards, filtered_colors, fields)
 
@@ -1066,7 +1085,7 @@ class Overlay(ScaledWindow):
         except Exception as error:
             logger.error(error)
 
-    def __update_suggest_table(self, selected_color, suggested_decks, color_options):
+    def __update_suggest_table(self, selected_color, suggested_decks, color_options, breakdown_value=None):
         '''Update the table that lists the suggested decks'''
         try:
             if not self.suggester_table:
@@ -1074,6 +1093,8 @@ class Overlay(ScaledWindow):
 
             color = color_options[selected_color.get()]
             suggested_deck = suggested_decks[color]["deck_cards"]
+            if breakdown_value is not None:
+                breakdown_value.set(suggested_decks[color].get("breakdown", ""))
             suggested_deck.sort(
                 key=lambda x: x[constants.DATA_FIELD_CMC], reverse=False)
             for row in self.suggester_table.get_children():
@@ -1099,18 +1120,19 @@ class Overlay(ScaledWindow):
                                           if not self.configuration.settings.color_identity_enabled
                                           else card[constants.DATA_FIELD_COLORS])
 
-                self.suggester_table.insert("", index=count, values=(card[constants.DATA_FIELD_NAME],
+                self.suggester_table.insert("", index=count, iid=count, values=(card[constants.DATA_FIELD_NAME],
                                                                      f"{card[constants.DATA_FIELD_COUNT]}",
                                                                      card_colors,
                                                                      card[constants.DATA_FIELD_CMC],
                                                                      card[constants.DATA_FIELD_TYPES]), tag=(row_tag,))
             self.suggester_table.bind("<<TreeviewSelect>>", lambda event: self.__process_table_click(
-                event, table=self.suggester_table, card_list=suggested_deck, selected_color=[color]))
+                event, table=self.suggester_table, card_list=suggested_deck,
+                selected_color=[suggested_decks[color].get("colors", color)]))
 
         except Exception as error:
             logger.error(error)
 
-    def __update_deck_stats_table(self, taken_cards, filter_type, total_width):
+    def __update_deck_stats_table(self, aggregate, filter_type, total_width):
         '''Update the table that lists the draft stats'''
         try:
             card_types = constants.CARD_TYPE_DICT[filter_type]
@@ -1118,12 +1140,11 @@ class Overlay(ScaledWindow):
             colors_filtered = {}
             for color, symbol in constants.CARD_COLORS_DICT.items():
                 if symbol:
-                    card_colors_sorted = CL.deck_card_search(
-                        taken_cards, symbol, card_types[0], card_types[1], card_types[2], card_types[3])
+                    card_metrics = aggregate.deck_metrics(
+                        symbol, card_types[0], card_types[1], card_types[2], card_types[3])
                 else:
-                    card_colors_sorted = CL.deck_card_search(
-                        taken_cards, symbol, card_types[0], card_types[1], True, False)
-                card_metrics = CL.deck_metrics(card_colors_sorted)
+                    card_metrics = aggregate.deck_metrics(
+                        symbol, card_types[0], card_types[1], True, False)
                 colors_filtered[color] = {}
                 colors_filtered[color]["symbol"] = symbol
                 colors_filtered[color]["total"] = card_metrics.total_cards
@@ -1547,8 +1568,11 @@ class Overlay(ScaledWindow):
         self.__control_trace(True)
 
         if not self.step_through:
+            self.draft_event_log.compress = (self.configuration.settings.draft_log_format ==
+                                             constants.DRAFT_LOG_FORMAT_JSONL_GZIP)
             self.draft.log_enable(
-                self.configuration.settings.draft_log_enabled)
+                self.configuration.settings.draft_log_enabled,
+                self.configuration.settings.draft_log_format)
 
     def __initialize_overlay_widgets(self):
         '''Set the overlay widgets in the main window to a known state at startup'''
@@ -1588,7 +1612,7 @@ class Overlay(ScaledWindow):
             update = self.__update_draft()
 
         if not update:
-            return
+            return update
 
         self.__update_data_source_options(False)
         self.__update_column_options()
@@ -1633,23 +1657,29 @@ class Overlay(ScaledWindow):
                 event_type == constants.LIMITED_TYPE_STRING_TRAD_SEALED:
             self.__open_taken_cards_window()
 
+        return update
+
     def __update_deck_stats_callback(self, *_):
         '''Callback function that updates the Deck Stats table in the main window'''
         self.root.update_idletasks()
-        self.__update_deck_stats_table(self.draft.retrieve_taken_cards(
-        ), self.stat_options_selection.get(), self.pack_table.winfo_width())
+        self.__update_deck_stats_table(self.draft.retrieve_pool_aggregate(),
+                                       self.stat_options_selection.get(), self.pack_table.winfo_width())
 
     def __arena_log_check(self):
-        '''Function that monitors the Arena log every 1000ms to determine if there's new draft data'''
+        '''Function that checks if the log monitor has flagged a change in the Arena log and processes the new draft data'''
         try:
-            self.current_timestamp = os.stat(self.arena_file).st_mtime
-
-            if self.current_timestamp != self.previous_timestamp:
-                self.previous_timestamp = self.current_timestamp
+            change_timestamp = self.log_monitor.consume()
 
+            if change_timestamp is not None:
                 while True:
 
-                    self.__update_overlay_callback(True)
+                    if self.__update_overlay_callback(True):
+                        latency = time.perf_counter() - change_timestamp
+                        self.log_monitor.latency.record(latency)
+                        logger.info("Log change to table render: %.1fms (mean %.1fms, max %.1fms)",
+                                    latency * 1000,
+                                    self.log_monitor.latency.mean * 1000,
+                                    self.log_monitor.latency.maximum * 1000)
                     if self.draft.step_through:
                         input("Continue?")
                     else:
@@ -1658,7 +1688,8 @@ class Overlay(ScaledWindow):
             logger.error(error)
             self.__reset_draft(True)
 
-        self.log_check_id = self.root.after(1000, self.__arena_log_check)
+        self.log_check_id = self.root.after(
+            constants.LOG_MONITOR_CHECK_INTERVAL_MS, self.__arena_log_check)
 
     def __update_set_start_date(self, start, selection, set_list, *_):
         '''Function that's used to determine if a set in the Set View window has minimum start date
@@ -2119,12 +2150,44 @@ class Overlay(ScaledWindow):
         popup.destroy()
 
     def __open_suggest_deck_window(self):
-        '''Creates the Suggest Deck window'''
+        '''Starts building the suggested decks, and opens the Suggest Deck window once they're ready'''
 
-        # Don't open the window if it's already open
-        if self.suggester_table:
+        # Don't open the window if it's already open or if the decks are being built
+        if self.suggester_table or self.suggest_deck_request:
             return
 
+        try:
+            taken_cards = self.draft.retrieve_taken_cards()
+            _, event_type = self.draft.retrieve_current_limited_event()
+            if event_type in (constants.LIMITED_TYPE_STRING_SEALED, constants.LIMITED_TYPE_STRING_TRAD_SEALED):
+                # Rank every base and splash combination for the sealed pool
+                self.__create_suggest_deck_window(explore_sealed_pool(
+                    taken_cards, self.set_metrics, self.configuration).suggested_decks())
+            else:
+                self.suggest_deck_request = CL.SuggestDeckRequest(
+                    taken_cards, self.set_metrics, self.configuration)
+                self.__check_suggest_deck_request()
+        except Exception as error:
+            logger.error(error)
+
+    def __check_suggest_deck_request(self):
+        '''Opens the Suggest Deck window if the suggested decks are ready, otherwise checks again later
+
+           The decks are built in the process pool, so the window is opened from the UI loop instead of waiting
+        '''
+        try:
+            suggested_decks = self.suggest_deck_request.poll()
+            if suggested_decks is None:
+                self.root.after(constants.SUGGEST_DECK_CHECK_INTERVAL_MS, self.__check_suggest_deck_request)
+                return
+            self.suggest_deck_request = None
+            self.__create_suggest_deck_window(suggested_decks)
+        except Exception as error:
+            logger.error(error)
+            self.suggest_deck_request = None
+
+    def __create_suggest_deck_window(self, suggested_decks):
+        '''Creates the Suggest Deck window'''
         popup = tkinter.Toplevel()
         popup.wm_title("Suggested Decks")
         popup.attributes("-topmost", True)
@@ -2144,9 +2207,6 @@ class Overlay(ScaledWindow):
         try:
             tkinter.Grid.rowconfigure(popup, 3, weight=1)
 
-            suggested_decks = CL.suggest_deck(
-                self.draft.retrieve_taken_cards(), self.set_metrics, self.configuration)
-
             choices = ["None"]
             deck_color_options = {}
 
@@ -2166,9 +2226,13 @@ class Overlay(ScaledWindow):
             menu = self.root.nametowidget(deck_colors_entry['menu'])
             menu.config(font=self.fonts_dict["All.TMenubutton"])
 
+            breakdown_value = tkinter.StringVar(popup)
+            breakdown_label = Label(popup, textvariable=breakdown_value, style="Notes.TLabel", anchor="c")
+
             deck_colors_button = Button(popup, command=lambda: self.__update_suggest_table(deck_colors_value,
                                                                                            suggested_decks,
-                                                                                           deck_color_options),
+                                                                                           deck_color_options,
+                                                                                           breakdown_value),
                                         text="Update")
 
             copy_button = Button(popup, command=lambda: copy_suggested(deck_colors_value,
@@ -2200,11 +2264,12 @@ class Overlay(ScaledWindow):
             copy_button.grid(row=2, column=0, columnspan=2, sticky="nsew")
             suggester_table_frame.grid(
                 row=3, column=0, columnspan=2, sticky='nsew')
+            breakdown_label.grid(row=4, column=0, columnspan=2, sticky="nsew")
 
             self.suggester_table.pack(expand=True, fill='both')
 
             self.__update_suggest_table(
-                deck_colors_value, suggested_decks, deck_color_options)
+                deck_colors_value, suggested_decks, deck_color_options, breakdown_value)
         except Exception as error:
             logger.error(error)
 
@@ -2752,45 +2817,45 @@ class Overlay(ScaledWindow):
                             values=file, tag=(row_tag,))
 
     def __process_table_click(self, event, table, card_list, selected_color, fields=None):
-        '''Creates the card tooltip when a table row is clicked'''
+        '''Creates the card tooltip when a table row is clicked
+
+           The table rows are inserted with their index within card_list as the row id
+        '''
         color_dict = {}
         for item in table.selection():
-            card_name = table.item(item, "value")[0]
-            for card in card_list:
-                card_name = card_name if card_name[0] != '*' else card_name[1:]
-                if card_name == card[constants.DATA_FIELD_NAME]:
-                    try:
-                        for color in selected_color:
-                            color_dict[color] = {
-                                x: "NA" for x in constants.DATA_FIELDS_LIST}
-                            for k in color_dict[color]:
-                                if color in card[constants.DATA_FIELD_DECK_COLORS] \
-                                   and k in card[constants.DATA_FIELD_DECK_COLORS][color]:
-                                    if k in constants.WIN_RATE_FIELDS_DICT:
-                                        winrate_count = constants.WIN_RATE_FIELDS_DICT[k]
-                                        color_dict[color][k] = CL.calculate_win_rate(card[constants.DATA_FIELD_DECK_COLORS][color][k],
-                                                                                     card[constants.DATA_FIELD_DECK_COLORS][color][winrate_count],
-                                                                                     self.configuration.settings.bayesian_average_enabled)
-                                    else:
-                                        color_dict[color][k] = card[constants.DATA_FIELD_DECK_COLORS][color][k]
-                        tier_info = {}
-                        if fields and self.tier_data:
-                            for name, tier_list in self.tier_data.items():
-                                if name in fields.values() and card_name in tier_list["ratings"]:
-                                    tier_info[name] = tier_list["ratings"][card_name]["comment"]
-
-                        CreateCardToolTip(table,
-                                          event,
-                                          card[constants.DATA_FIELD_NAME],
-                                          color_dict,
-                                          card[constants.DATA_SECTION_IMAGES],
-                                          self.configuration.features.images_enabled,
-                                          self.scale_factor,
-                                          self.fonts_dict,
-                                          tier_info)
-                    except Exception as error:
-                        logger.error(error)
-                    break
+            try:
+                card = card_list[int(item)]
+                card_name = card[constants.DATA_FIELD_NAME]
+                for color in selected_color:
+                    color_dict[color] = {
+                        x: "NA" for x in constants.DATA_FIELDS_LIST}
+                    for k in color_dict[color]:
+                        if color in card[constants.DATA_FIELD_DECK_COLORS] \
+                           and k in card[constants.DATA_FIELD_DECK_COLORS][color]:
+                            if k in constants.WIN_RATE_FIELDS_DICT:
+                                winrate_count = constants.WIN_RATE_FIELDS_DICT[k]
+                                color_dict[color][k] = CL.calculate_win_rate(card[constants.DATA_FIELD_DECK_COLORS][color][k],
+                                                                             card[constants.DATA_FIELD_DECK_COLORS][color][winrate_count],
+                                                                             self.configuration.settings.bayesian_average_enabled)
+                            else:
+                                color_dict[color][k] = card[constants.DATA_FIELD_DECK_COLORS][color][k]
+                tier_info = {}
+                if fields and self.tier_data:
+                    for name, tier_list in self.tier_data.items():
+                        if name in fields.values() and card_name in tier_list["ratings"]:
+                            tier_info[name] = tier_list["ratings"][card_name]["comment"]
+
+                CreateCardToolTip(table,
+                                  event,
+                                  card_name,
+                                  color_dict,
+                                  card[constants.DATA_SECTION_IMAGES],
+                                  self.configuration.features.images_enabled,
+                                  self.scale_factor,
+                                  self.fonts_dict,
+                                  tier_info)
+            except Exception as error:
+                logger.error(error)
 
     def __open_draft_log(self):
         '''Reads and processes a stored draft log when File->Open is selected'''
@@ -2801,6 +2866,7 @@ class Overlay(ScaledWindow):
             self.arena_file = filename
             self.__reset_draft(True)
             self.draft.set_arena_file(filename)
+            self.log_monitor.set_file(filename)
             self.draft.log_suspend(True)
             self.__update_overlay_callback(True)
             self.draft.log_suspend(False)
@@ -2941,6 +3007,7 @@ class Overlay(ScaledWindow):
             logger.error(error)
 
         if update_flag:
+            self.log_monitor.start()
             self.__arena_log_check()
             self.__control_trace(True)
 
@@ -0,0 +1,106 @@
+"""This module contains the functions that are used for extracting fields from the nested JSON payloads in the Arena log
+
+Arena logs the draft requests as JSON objects that contain JSON strings, which in turn contain JSON strings
+(e.g., line -> request -> Payload). Decoding all three levels builds three object trees just to read a few fields,
+so the fields are pulled directly out of the escaped text. The callers fall back to full decoding whenever
+a field is missing or ambiguous.
+
+orjson decodes the full payload faster than the fields can be extracted with the stdlib regex engine,
+so the targeted extraction is only used when orjson isn't installed (see benchmarks/payload_decoding.py)
+"""
+import re
+import json
+from enum import Enum
+from functools import lru_cache
+
+try:
+    import orjson
+    json_loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    json_loads = json.loads
+    JSON_BACKEND = "json"
+
+TARGETED_EXTRACTION = JSON_BACKEND == "json"
+
+
+class FieldType(Enum):
+    INT = 1
+    STRING = 2
+    CARD_LIST = 3
+
+
+# A key at any nesting level is surrounded by quotes that are escaped by zero or more backslashes (e.g., \\\"PackNumber\\\":)
+# All of the requested keys are matched in a single pass over the line
+FIELDS_PATTERN = (r'"({names})\\*"\s*:\s*'
+                  r'(?:\\*"(-?\d+)\\*"'
+                  r'|(-?\d+)(?=[\s,}}\]\\])'
+                  r'|\[([^\[\]]*)\]'
+                  r'|\\*"([^"\\]*)\\*")')
+
+CARD_LIST_STRIP = str.maketrans("", "", " \\\"")
+
+
+@lru_cache(maxsize=None)
+def fields_pattern(names):
+    '''Return the compiled pattern that matches any of the field names'''
+    return re.compile(FIELDS_PATTERN.format(names="|".join(re.escape(x) for x in names)))
+
+
+def convert_value(match, field_type):
+    '''Convert a matched field value. Returns None if the value doesn't have the expected format'''
+    _, quoted_int, bare_int, card_list, string = match.groups()
+    if field_type is FieldType.INT:
+        value = quoted_int or bare_int
+        return int(value) if value else None
+    if field_type is FieldType.CARD_LIST:
+        if card_list is None:
+            return None
+        # Card ids are either numbers or escaped numeric strings (e.g., [87000,87001] or [\\"87000\\",\\"87001\\"])
+        card_list = card_list.translate(CARD_LIST_STRIP)
+        if not card_list:
+            return []
+        return card_list.split(",") if card_list.replace(",", "").isdigit() else None
+    # Numeric strings are matched by the quoted integer group
+    return string if string is not None else quoted_int
+
+
+def extract_fields(text, fields):
+    '''Extract a set of fields from an escaped JSON string
+
+       fields: dictionary of field names and FieldTypes
+       Returns a dictionary with the field values, or None if any field is missing, appears more than once,
+       or has an unexpected format
+    '''
+    matches = {}
+    for match in fields_pattern(tuple(fields)).finditer(text):
+        name = match.group(1)
+        if name in matches:
+            return None
+        matches[name] = match
+
+    if len(matches) != len(fields):
+        return None
+
+    results = {}
+    for name, field_type in fields.items():
+        value = convert_value(matches[name], field_type)
+        if value is None:
+            return None
+        results[name] = value
+    return results
+
+
+def extract_field(text, name, field_type):
+    '''Extract a single field from an escaped JSON string. Returns None if the field couldn't be extracted'''
+    fields = extract_fields(text, {name: field_type})
+    return fields[name] if fields else None
+
+
+def decode_fields(text, fields, full_decoder):
+    '''Return the fields from a nested payload, using the targeted extraction where it's faster than a full decode
+
+       full_decoder: function that decodes the text and returns a dictionary that contains the fields
+    '''
+    results = extract_fields(text, fields) if TARGETED_EXTRACTION else None
+    return results if results is not None else full_decoder(text)
@@ -0,0 +1,179 @@
+"""This module contains the concurrent downloader for the 17Lands card ratings
+
+The card ratings are downloaded once for each deck color. The requests are issued from a thread pool, and each
+request takes a token from a shared token bucket before it's sent, so the request rate stays within the limit
+regardless of the number of workers. Failed requests are retried with a jittered exponential backoff.
+
+The responses are returned in the order of the requests, so the set file doesn't depend on the order in which the
+requests complete. The caller's thread only waits on the results, so it can keep the UI responsive.
+"""
+import time
+import random
+import threading
+import urllib.error
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Any
+from src import constants
+from src.http_client import default_client
+from src.logger import create_logger
+
+logger = create_logger()
+
+DOWNLOAD_POLL_INTERVAL_SECONDS = 0.1
+
+
+def card_ratings_url(base_url, set_code, draft, start_date, end_date, color):
+    '''Return the card_ratings endpoint URL for a set and deck color'''
+    query = {"expansion": set_code, "format": draft, "start_date": start_date, "end_date": end_date}
+    if color != constants.FILTER_OPTION_ALL_DECKS:
+        query["colors"] = color
+    return f"{base_url}/card_ratings/data?{urlencode(query)}"
+
+
+def backoff_delay(attempt, base_delay, maximum_delay, rng=random):
+    '''Return the delay before a retry, using exponential backoff with full jitter
+
+       attempt: number of failed attempts, starting at 1
+    '''
+    return rng.uniform(0, min(maximum_delay, base_delay * 2 ** (attempt - 1)))
+
+
+class TokenBucket:
+    '''Thread-safe token bucket that limits the rate of the requests
+
+       rate: number of tokens that are added each second
+       capacity: maximum number of tokens, which is the number of requests that can be sent in a burst
+    '''
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.__lock = threading.Lock()
+
+    def acquire(self):
+        '''Wait until a token is available and take it. Returns the time, in seconds, that was spent waiting'''
+        waited = 0.0
+        while True:
+            with self.__lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            self.sleep(delay)
+            waited += delay
+
+
+@dataclass
+class DownloadResult:
+    '''The result of a single request
+       - key: identifier of the request (e.g., the deck color)
+       - data: decoded JSON response, or None if every attempt failed
+    '''
+    key: str
+    url: str
+    data: Any = None
+    attempts: int = 0
+    error: str = ""
+
+    @property
+    def success(self):
+        return self.data is not None
+
+
+class RatingsDownloader:
+    '''Class that downloads a collection of JSON endpoints concurrently under a shared rate limit
+
+       bucket: optional TokenBucket that's shared with other downloaders (e.g., when several sets are downloaded
+       at the same time), in which case the rate and burst arguments are ignored
+    '''
+
+    def __init__(self, client=None, workers=constants.CARD_RATINGS_WORKERS, rate=constants.CARD_RATINGS_RATE_LIMIT,
+                 burst=constants.CARD_RATINGS_BURST, attempts=constants.CARD_RATINGS_ATTEMPT_MAX,
+                 backoff_base=constants.CARD_RATINGS_BACKOFF_BASE_SECONDS,
+                 backoff_max=constants.CARD_RATINGS_BACKOFF_DELAY_SECONDS,
+                 timeout=constants.CARD_RATINGS_REQUEST_TIMEOUT_SECONDS, base_url=constants.URL_17LANDS, seed=None,
+                 bucket=None):
+        self.client = client or default_client()
+        self.workers = workers
+        self.bucket = bucket or TokenBucket(rate, burst)
+        self.attempts = attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.base_url = base_url
+        self.rng = random.Random(seed)
+        self.__cancelled = threading.Event()
+
+    def cancel(self):
+        '''Stop the pending requests and retries'''
+        self.__cancelled.set()
+
+    def fetch(self, key, url):
+        '''Request a URL and decode the response, retrying failed requests with a jittered exponential backoff'''
+        result = DownloadResult(key, url)
+        while result.attempts < self.attempts and not self.__cancelled.is_set():
+            self.bucket.acquire()
+            result.attempts += 1
+            retry_after = 0
+            try:
+                result.data = self.client.get_json(url, timeout=self.timeout)
+                result.error = ""
+                break
+            except Exception as error:
+                logger.error(url)
+                logger.error(error)
+                result.error = str(error)
+                if isinstance(error, urllib.error.HTTPError):
+                    try:
+                        retry_after = float(error.headers.get("Retry-After") or 0)
+                    except ValueError:
+                        pass
+
+            if result.attempts < self.attempts:
+                delay = max(backoff_delay(result.attempts, self.backoff_base, self.backoff_max, self.rng),
+                            min(retry_after, self.backoff_max))
+                self.__cancelled.wait(delay)
+
+        if result.data is None and not result.error:
+            result.error = "Cancelled"
+        return result
+
+    def download(self, requests, progress=None, idle=None):
+        '''Download a list of (key, url) requests and return the results in the order of the requests
+
+           progress: optional function that's called with each DownloadResult as it completes
+           idle: optional function that's called periodically while waiting (e.g., to update the UI)
+           The remaining requests are cancelled if a request fails after all of its attempts
+        '''
+        requests = list(requests)
+        results = [None] * len(requests)
+        self.__cancelled.clear()
+        with ThreadPoolExecutor(max_workers=max(min(self.workers, len(requests)), 1)) as executor:
+            pending = {executor.submit(self.fetch, key, url): index
+                       for index, (key, url) in enumerate(requests)}
+            while pending:
+                done, _ = wait(pending, timeout=DOWNLOAD_POLL_INTERVAL_SECONDS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    key, url = requests[index]
+                    try:
+                        result = future.result()
+                    except Exception as error:
+                        result = DownloadResult(key, url, error=str(error))
+                    results[index] = result
+                    if progress:
+                        progress(result)
+                    if not result.success:
+                        self.cancel()
+                if idle:
+                    idle()
+        return results
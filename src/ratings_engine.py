@@ -0,0 +1,186 @@
+"""This module contains the vectorized ratings engine
+
+The engine computes the adjusted win rates, 5-point ratings, and letter grades for every card, deck color, and
+win rate field of a set in a single pass over the ratings matrix (see src/ratings_matrix.py). The results are cached
+for each combination of settings, so changing the result format or the Bayesian setting doesn't recalculate
+the values card by card.
+
+The engine also holds a cards x picks table of wheel percentages, which is built from the ALSA values and
+constants.WHEEL_COEFFICIENTS when the set is loaded.
+
+The calculations match calculate_win_rate and the CardResult rating, grade, and wheel functions in src/card_logic.py
+"""
+import numpy
+from src import constants
+from src.ratings_matrix import RatingsMatrix
+from src.logger import create_logger
+
+logger = create_logger()
+
+BAYESIAN_WIN_OFFSET = 1000
+BAYESIAN_COUNT_OFFSET = 20
+MINIMUM_SAMPLE_SIZE = 200
+MINIMUM_WHEEL_ALSA = 2
+
+# Values that are within this distance of a rounding boundary are rounded with the built-in round function,
+# since numpy.round scales the values before rounding and can round the other way
+ROUNDING_TOLERANCE = 1e-6
+
+GRADE_LIST = list(constants.GRADE_DEVIATION_DICT.keys()) + [constants.LETTER_GRADE_F, constants.LETTER_GRADE_NA]
+GRADE_DEVIATIONS = numpy.array(list(constants.GRADE_DEVIATION_DICT.values()), dtype=numpy.float64)
+
+
+def round_values(values, digits):
+    '''Round an array with the same results as the built-in round function'''
+    result = numpy.round(values, digits)
+    scaled = values * 10 ** digits
+    ties = numpy.abs(scaled - numpy.floor(scaled) - 0.5) < ROUNDING_TOLERANCE
+    if ties.any():
+        result[ties] = [round(x, digits) for x in values[ties].tolist()]
+    return result
+
+
+def calculate_win_rates(winrates, counts, bayesian_enabled):
+    '''Apply the Bayesian average or the minimum sample size to an array of win rates'''
+    if bayesian_enabled:
+        return round_values((winrates * counts + BAYESIAN_WIN_OFFSET) / (counts + BAYESIAN_COUNT_OFFSET), 2)
+    return numpy.where(counts < MINIMUM_SAMPLE_SIZE, 0.0, winrates)
+
+
+def calculate_ratings(winrates, mean, standard_deviation):
+    '''Convert an array of win rates into 5-point ratings'''
+    deviations = list(constants.GRADE_DEVIATION_DICT.values())
+    upper_limit = mean + standard_deviation * deviations[0]
+    lower_limit = mean + standard_deviation * deviations[-1]
+    if upper_limit == lower_limit:
+        return numpy.zeros_like(winrates)
+    ratings = round_values(((winrates - lower_limit) / (upper_limit - lower_limit)) * 5.0, 1)
+    ratings = numpy.clip(ratings, 0, 5.0)
+    return numpy.where(winrates != 0, ratings, 0)
+
+
+def calculate_grades(winrates, mean, standard_deviation):
+    '''Convert an array of win rates into letter grades based on the number of standard deviations from the mean'''
+    grade_index = numpy.full(winrates.shape, len(GRADE_LIST) - 1)
+    if standard_deviation != 0:
+        standard_scores = (winrates - mean) / standard_deviation
+        # The first grade, in descending order, whose deviation is less than or equal to the standard score
+        grade_index = len(GRADE_DEVIATIONS) - numpy.searchsorted(GRADE_DEVIATIONS[::-1], standard_scores,
+                                                                 side="right")
+        grade_index = numpy.where(winrates != 0, grade_index, len(GRADE_LIST) - 1)
+    return numpy.array(GRADE_LIST, dtype=object)[grade_index]
+
+
+def calculate_wheel_table(alsa):
+    '''Convert an array of ALSA values into a cards x picks array of wheel percentages'''
+    table = numpy.zeros((alsa.size, len(constants.WHEEL_COEFFICIENTS)), dtype=numpy.float64)
+    for pick_index, coefficients in enumerate(constants.WHEEL_COEFFICIENTS):
+        table[:, pick_index] = numpy.maximum(numpy.round(numpy.polyval(coefficients, alsa), 1), 0)
+    # Exclude ALSA values below 2
+    table[alsa < MINIMUM_WHEEL_ALSA] = 0
+    return table
+
+
+class RatingsEngine:
+    '''Class that computes and caches the win rate results for all of the cards within a ratings matrix'''
+
+    def __init__(self, matrix: RatingsMatrix):
+        self.matrix = matrix
+        self.win_rate_fields = [x for x in constants.WIN_RATE_OPTIONS
+                                if x in matrix.field_index
+                                and constants.WIN_RATE_FIELDS_DICT[x] in matrix.field_index]
+        self.win_rate_index = {field: index for index, field in enumerate(self.win_rate_fields)}
+        self.winrates = matrix.values[:, :, [matrix.field_index[x] for x in self.win_rate_fields]]
+        self.counts = matrix.values[:, :, [matrix.field_index[constants.WIN_RATE_FIELDS_DICT[x]]
+                                           for x in self.win_rate_fields]]
+        self.name_index = {}
+        for index, name in enumerate(matrix.names.tolist()):
+            self.name_index.setdefault(name, index)
+        self.__win_rate_cache = {}
+        self.__result_cache = {}
+        alsa = numpy.zeros(len(matrix))
+        if (constants.FILTER_OPTION_ALL_DECKS in matrix.color_index) and (constants.DATA_FIELD_ALSA in matrix.field_index):
+            alsa = matrix.field_values(constants.FILTER_OPTION_ALL_DECKS, constants.DATA_FIELD_ALSA)
+        self.wheel_table = calculate_wheel_table(alsa)
+
+    def win_rates(self, bayesian_enabled):
+        '''Return the adjusted win rates as a cards x deck colors x win rate fields array'''
+        bayesian_enabled = bool(bayesian_enabled)
+        winrates = self.__win_rate_cache.get(bayesian_enabled)
+        if winrates is None:
+            winrates = self.__win_rate_cache[bayesian_enabled] = calculate_win_rates(
+                self.winrates, self.counts, bayesian_enabled)
+        return winrates
+
+    def __gihwr(self, bayesian_enabled):
+        '''Return the adjusted GIHWR values as a cards x deck colors array'''
+        return self.win_rates(bayesian_enabled)[:, :, self.win_rate_index[constants.DATA_FIELD_GIHWR]]
+
+    def set_metrics(self, bayesian_enabled):
+        '''Return the mean and standard deviation of the All Decks GIHWR values (see calculate_mean)'''
+        mean = 0.0
+        standard_deviation = 0.0
+        try:
+            gihwr = self.__gihwr(bayesian_enabled)[:, self.matrix.color_index[constants.FILTER_OPTION_ALL_DECKS]]
+            gihwr = gihwr[gihwr != 0]
+            if gihwr.size:
+                mean = float(gihwr.mean())
+            if gihwr.size > 2:
+                standard_deviation = float(numpy.sqrt(((gihwr - mean) ** 2).sum() / (gihwr.size - 1)))
+        except Exception as error:
+            logger.error(error)
+        return mean, standard_deviation
+
+    def ratings_limits(self, bayesian_enabled):
+        '''Return the upper and lower GIHWR values across all of the deck colors (see ratings_limits)'''
+        upper_limit = 0
+        lower_limit = 100
+        try:
+            gihwr = self.__gihwr(bayesian_enabled)
+            upper_limit = max(upper_limit, float(gihwr.max(initial=0)))
+            gihwr = gihwr[gihwr != 0]
+            if gihwr.size:
+                lower_limit = min(lower_limit, float(gihwr.min()))
+        except Exception as error:
+            logger.error(error)
+        return upper_limit, lower_limit
+
+    def results(self, result_format, bayesian_enabled, mean, standard_deviation):
+        '''Return the results for a result format as a cards x deck colors x win rate fields array'''
+        key = (result_format, bool(bayesian_enabled), mean, standard_deviation)
+        results = self.__result_cache.get(key)
+        if results is None:
+            winrates = self.win_rates(bayesian_enabled)
+            if result_format == constants.RESULT_FORMAT_RATING:
+                results = calculate_ratings(winrates, mean, standard_deviation)
+            elif result_format == constants.RESULT_FORMAT_GRADE:
+                results = calculate_grades(winrates, mean, standard_deviation)
+            else:
+                results = winrates
+            self.__result_cache[key] = results
+        return results
+
+    def lookup(self, card_name, color, field, result_format, bayesian_enabled, mean, standard_deviation):
+        '''Return the result for a single card, or None if the card, color, or field isn't in the matrix'''
+        card_index = self.name_index.get(card_name)
+        color_index = self.matrix.color_index.get(color)
+        field_index = self.win_rate_index.get(field)
+        if card_index is None or color_index is None or field_index is None:
+            return None
+        result = self.results(result_format, bayesian_enabled, mean, standard_deviation)[
+            card_index, color_index, field_index]
+        result = result.item() if isinstance(result, numpy.generic) else result
+        if (result_format == constants.RESULT_FORMAT_RATING) and (result == 0):
+            # Unrated cards are displayed as 0 rather than 0.0
+            result = 0
+        return result
+
+    def wheel_values(self, card_names, pick_number):
+        '''Return the wheel percentages for a list of card names, or None if any of the cards aren't in the matrix'''
+        indexes = [self.name_index.get(x) for x in card_names]
+        if None in indexes:
+            return None
+        if pick_number > len(constants.WHEEL_COEFFICIENTS):
+            return numpy.zeros(len(indexes))
+        # 0 is treated as pick 1 for PremierDraft P1P1
+        return self.wheel_table[indexes, max(pick_number, 1) - 1]
@@ -0,0 +1,253 @@
+"""This module contains the columnar ratings matrix that's stored alongside each set file
+
+The set file stores the 17Lands ratings as card_ratings[card]["deck_colors"][color][field], which is a dictionary
+of boxed floats for every card and deck color. The matrix stores the same values in a single NumPy array that's
+laid out as cards x deck colors x fields, along with the card id and card name index arrays.
+
+The matrix is written to an uncompressed .npz file next to the set file (e.g., LTR_PremierDraft_Data.npz). The file
+also stores the rest of the set file (the card names, types, and images) without the deck_colors sections, along with
+a cards x deck colors mask of the deck colors that each card has in the set file.
+
+A set file that matches its catalog entry (see src/set_catalog.py) is loaded from the matrix file, so the JSON file
+isn't parsed. The card_ratings of the loaded set data is a CardRatings view, which builds the deck_colors of a card
+from the matrix when the card is requested, so the ratings are only held in the matrix.
+"""
+import os
+import json
+import numpy
+from collections.abc import Mapping
+from src import constants
+from src.set_catalog import Result, check_file_integrity
+from src.logger import create_logger
+
+logger = create_logger()
+
+RATINGS_MATRIX_EXTENSION = ".npz"
+RATINGS_MATRIX_DTYPE = numpy.float64
+RATINGS_MATRIX_COUNT_FIELDS = set(constants.WIN_RATE_FIELDS_DICT.values())
+CARD_RATINGS_CACHE_SIZE = 256
+
+
+def ratings_matrix_location(set_file):
+    '''Return the location of the ratings matrix for a set file'''
+    return os.path.splitext(set_file)[0] + RATINGS_MATRIX_EXTENSION
+
+
+def remove_deck_colors(set_data):
+    '''Return a copy of the set data without the deck_colors section of each card'''
+    card_data = {k: v for k, v in set_data.items() if k != "card_ratings"}
+    card_data["card_ratings"] = {card: {k: v for k, v in ratings.items() if k != constants.DATA_FIELD_DECK_COLORS}
+                                 for card, ratings in set_data["card_ratings"].items()}
+    return card_data
+
+
+class RatingsMatrix:
+    '''Class that stores the card ratings of a set as a cards x deck colors x fields array'''
+
+    def __init__(self, ids, names, colors, fields, values, present=None, set_data=None):
+        '''present: cards x deck colors mask of the deck colors in the set file; every color is present if it's None
+           set_data: the set data without the deck_colors sections, or None if it isn't stored in the matrix file
+        '''
+        self.ids = numpy.asarray(ids, dtype=str)
+        self.names = numpy.asarray(names, dtype=str)
+        self.colors = list(colors)
+        self.fields = list(fields)
+        self.values = numpy.asarray(values, dtype=RATINGS_MATRIX_DTYPE)
+        self.present = (numpy.ones(self.values.shape[:2], dtype=bool) if present is None
+                        else numpy.asarray(present, dtype=bool))
+        self.set_data = set_data
+        self.card_index = {card: index for index, card in enumerate(self.ids.tolist())}
+        self.color_index = {color: index for index, color in enumerate(self.colors)}
+        self.field_index = {field: index for index, field in enumerate(self.fields)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_set_data(cls, set_data, colors=None, fields=None):
+        '''Build the matrix from the card_ratings section of a set file'''
+        colors = colors or constants.DECK_COLORS
+        fields = fields or constants.DATA_FIELDS_LIST
+        card_ratings = set_data["card_ratings"]
+        values = numpy.zeros((len(card_ratings), len(colors), len(fields)), dtype=RATINGS_MATRIX_DTYPE)
+        present = numpy.zeros((len(card_ratings), len(colors)), dtype=bool)
+        names = []
+        for card_index, card_data in enumerate(card_ratings.values()):
+            names.append(card_data.get(constants.DATA_FIELD_NAME, ""))
+            deck_colors = card_data.get(constants.DATA_FIELD_DECK_COLORS, {})
+            for color_index, color in enumerate(colors):
+                ratings = deck_colors.get(color)
+                if ratings is None:
+                    continue
+                present[card_index, color_index] = True
+                values[card_index, color_index] = [ratings.get(x) or 0.0 for x in fields]
+        return cls(list(card_ratings.keys()), names, colors, fields, values, present, remove_deck_colors(set_data))
+
+    @classmethod
+    def load(cls, location):
+        '''Read a matrix file. Returns None if the file is missing or unreadable'''
+        matrix = None
+        try:
+            with numpy.load(location, allow_pickle=False) as data:
+                matrix = cls(data["ids"], data["names"], data["colors"].tolist(),
+                             data["fields"].tolist(), data["values"],
+                             data["present"] if "present" in data.files else None,
+                             json.loads(data["set_data"].tobytes()) if "set_data" in data.files else None)
+            if ((matrix.values.shape != (len(matrix.ids), len(matrix.colors), len(matrix.fields))) or
+                    (matrix.present.shape != matrix.values.shape[:2])):
+                logger.error("%s: unexpected shape %s", location, matrix.values.shape)
+                matrix = None
+        except FileNotFoundError:
+            pass
+        except Exception as error:
+            logger.error(error)
+            matrix = None
+        return matrix
+
+    def save(self, location):
+        '''Write the matrix file. Returns True if the file was written'''
+        result = False
+        try:
+            temp_file = location + ".tmp"
+            arrays = {}
+            if self.set_data is not None:
+                arrays["set_data"] = numpy.frombuffer(json.dumps(self.set_data).encode("utf-8"), dtype=numpy.uint8)
+            with open(temp_file, 'wb') as file:
+                numpy.savez(file,
+                            ids=self.ids,
+                            names=self.names,
+                            colors=numpy.asarray(self.colors, dtype=str),
+                            fields=numpy.asarray(self.fields, dtype=str),
+                            values=self.values,
+                            present=self.present,
+                            **arrays)
+            os.replace(temp_file, location)
+            result = True
+        except Exception as error:
+            logger.error(error)
+        return result
+
+    def matches(self, set_data):
+        '''Check if the matrix contains the same cards as the set data'''
+        card_ratings = set_data["card_ratings"]
+        return (len(card_ratings) == len(self.ids)) and all(x in self.card_index for x in card_ratings)
+
+    def field_values(self, color, field):
+        '''Return the values of a field for every card, in the order of the ids array'''
+        return self.values[:, self.color_index[color], self.field_index[field]]
+
+    def card_values(self, card, color):
+        '''Return a dictionary of the field values for a card and deck color'''
+        row = self.values[self.card_index[card], self.color_index[color]]
+        return dict(zip(self.fields, row.tolist()))
+
+    def deck_colors(self, card):
+        '''Return the deck_colors section of a card, in the format of the set file'''
+        index = self.card_index[card]
+        return {color: {field: int(value) if field in RATINGS_MATRIX_COUNT_FIELDS else value
+                        for field, value in zip(self.fields, row)}
+                for color, row, present in zip(self.colors, self.values[index].tolist(), self.present[index].tolist())
+                if present}
+
+    def value(self, card, color, field):
+        '''Return a single value, or 0.0 if the card, color, or field isn't in the matrix'''
+        try:
+            return float(self.values[self.card_index[card], self.color_index[color], self.field_index[field]])
+        except KeyError:
+            return 0.0
+
+
+class CardRatings(Mapping):
+    '''Read-only card_ratings view that adds the deck_colors section from the matrix when a card is requested
+
+       The most recently requested cards are cached, so the same dictionary is returned for consecutive requests
+    '''
+
+    def __init__(self, cards, matrix: RatingsMatrix):
+        self.cards = cards
+        self.matrix = matrix
+        self.__cache = {}
+
+    def __getitem__(self, card):
+        card_data = self.__cache.get(card)
+        if card_data is None:
+            card_data = dict(self.cards[card])
+            card_data[constants.DATA_FIELD_DECK_COLORS] = self.matrix.deck_colors(card)
+            if len(self.__cache) >= CARD_RATINGS_CACHE_SIZE:
+                self.__cache.clear()
+            self.__cache[card] = card_data
+        return card_data
+
+    def __contains__(self, card):
+        return card in self.cards
+
+    def __iter__(self):
+        return iter(self.cards)
+
+    def __len__(self):
+        return len(self.cards)
+
+
+def matrix_set_data(matrix: RatingsMatrix):
+    '''Return the set data that's stored in a matrix, with a CardRatings view of the cards'''
+    set_data = dict(matrix.set_data)
+    set_data["card_ratings"] = CardRatings(matrix.set_data["card_ratings"], matrix)
+    return set_data
+
+
+def export_ratings_matrix(set_file, set_data):
+    '''Build and write the matrix file for a set file. Returns the matrix, or None if the file couldn't be written'''
+    matrix = None
+    try:
+        matrix = RatingsMatrix.from_set_data(set_data)
+        if not matrix.save(ratings_matrix_location(set_file)):
+            matrix = None
+    except Exception as error:
+        logger.error(error)
+    return matrix
+
+
+def load_ratings_matrix(set_file, set_data):
+    '''Return the matrix for a set file
+
+       The matrix file is rebuilt from the set data if it's missing, older than the set file, or has different cards
+    '''
+    location = ratings_matrix_location(set_file)
+    matrix = None
+    try:
+        if os.path.getmtime(location) >= os.path.getmtime(set_file):
+            matrix = RatingsMatrix.load(location)
+    except OSError:
+        pass
+
+    if matrix is None or matrix.set_data is None or not matrix.matches(set_data):
+        matrix = export_ratings_matrix(set_file, set_data) or RatingsMatrix.from_set_data(set_data)
+    return matrix
+
+
+def load_set_file(set_file, entry=None):
+    '''Return the integrity result, the set data, and the matrix for a set file
+
+       entry: catalog entry of the set file. The set is loaded from the matrix file if the entry matches the size and
+       modification time of the set file, and the matrix file is newer. Otherwise, the set file is validated and the
+       matrix file is rebuilt if necessary
+    '''
+    matrix = None
+    try:
+        if entry and entry.valid:
+            stat = os.stat(set_file)
+            if (((entry.size, entry.mtime_ns) == (stat.st_size, stat.st_mtime_ns)) and
+                    (os.stat(ratings_matrix_location(set_file)).st_mtime_ns >= stat.st_mtime_ns)):
+                matrix = RatingsMatrix.load(ratings_matrix_location(set_file))
+    except OSError:
+        pass
+
+    if ((matrix is not None) and (matrix.set_data is not None) and
+            (len(matrix.set_data.get("card_ratings", {})) == len(matrix) == entry.card_count)):
+        return Result.VALID, matrix_set_data(matrix), matrix
+
+    result, json_data = check_file_integrity(set_file)
+    if result != Result.VALID:
+        return result, None, None
+    matrix = load_ratings_matrix(set_file, json_data)
+    return result, matrix_set_data(matrix), matrix
@@ -0,0 +1,66 @@
+"""This module contains the events that the ArenaScanner emits while it parses the Arena log"""
+from dataclasses import dataclass, field, fields, asdict
+from typing import List
+
+
+@dataclass
+class ScannerEvent:
+    '''Base class for the scanner events
+       - offset: log offset of the end of the line that produced the event
+    '''
+    offset: int = 0
+
+    @property
+    def name(self):
+        return type(self).__name__
+
+    def to_dict(self):
+        '''Return the event as a dictionary that includes the event name'''
+        return {"event": self.name, **asdict(self)}
+
+
+@dataclass
+class DraftStarted(ScannerEvent):
+    event_type: str = ""
+    draft_type: int = 0
+    sets: List[str] = field(default_factory=list)
+    event_name: str = ""
+    draft_id: str = ""
+
+
+@dataclass
+class DraftResumed(DraftStarted):
+    '''Draft that was restored from the scanner checkpoint. It's sent to the listeners that are added after the
+       scanner resumes, so they can pick up the draft without a new DraftStarted
+    '''
+
+
+@dataclass
+class PackSeen(ScannerEvent):
+    pack: int = 0
+    pick: int = 0
+    cards: List[str] = field(default_factory=list)
+
+
+@dataclass
+class PickMade(ScannerEvent):
+    pack: int = 0
+    pick: int = 0
+    card: str = ""
+
+
+@dataclass
+class SealedPool(ScannerEvent):
+    cards: List[str] = field(default_factory=list)
+
+
+EVENT_TYPES = {x.__name__: x for x in (DraftStarted, DraftResumed, PackSeen, PickMade, SealedPool)}
+
+
+def event_from_dict(data):
+    '''Create an event from a dictionary that was created with ScannerEvent.to_dict()
+
+       Keys that aren't event fields (e.g., timestamps) are ignored
+    '''
+    event_type = EVENT_TYPES[data["event"]]
+    return event_type(**{x.name: data[x.name] for x in fields(event_type) if x.name in data})
@@ -0,0 +1,217 @@
+"""This module contains the sealed pool explorer
+
+suggest_deck builds one deck per color combination, with the splash color that's selected by color_splash. The
+explorer builds every two-color base with each possible splash color (or no splash) and each deck type, and returns
+the builds ranked by their deck rating, along with the components of each rating.
+
+The win rates of the pool are calculated with NumPy for each base, and they're used to calculate an upper bound of
+the rating for each build. The builds are evaluated in the order of their upper bounds, and a build is skipped
+if its upper bound can't beat the builds that have already been ranked. The evaluation stops when the time budget
+runs out, so the result might not include every build.
+"""
+import time
+from dataclasses import dataclass, field
+import numpy
+from src import constants
+from src.card_logic import (DeckRating, build_deck, deck_rating_breakdown, card_snapshot, card_profile,
+                            color_mask, type_mask, stack_cards, mana_base)
+from src.ratings_engine import calculate_win_rates
+from src.logger import create_logger
+
+logger = create_logger()
+
+SEALED_EXPLORER_MAXIMUM_RESULTS = 10
+SEALED_EXPLORER_NONLAND_TYPES = [constants.CARD_TYPE_CREATURE,
+                                 constants.CARD_TYPE_INSTANT,
+                                 constants.CARD_TYPE_SORCERY,
+                                 constants.CARD_TYPE_ENCHANTMENT,
+                                 constants.CARD_TYPE_ARTIFACT,
+                                 constants.CARD_TYPE_PLANESWALKER]
+
+
+@dataclass
+class SealedBuild:
+    '''A deck that was built from a sealed pool
+       - colors: two-color base; the cards are rated with the ratings for this deck color
+       - splash: splash color, or an empty string
+       - upper_bound: highest rating that the build could have reached (see SealedExplorer.upper_bound)
+       - splash_cards: number of cards in the deck that require the splash color
+    '''
+    colors: str
+    splash: str
+    deck_type: str
+    deck: list
+    sideboard: list
+    breakdown: DeckRating
+    upper_bound: float = 0.0
+    splash_cards: int = 0
+
+    @property
+    def rating(self):
+        return self.breakdown.rating
+
+    @property
+    def label(self):
+        return f"{self.colors}+{self.splash}" if self.splash else self.colors
+
+    def summary(self):
+        '''Return a description of the components of the rating'''
+        breakdown = self.breakdown
+        return (f"{self.label} {self.deck_type}: {self.rating} = "
+                f"cards {breakdown.card_rating:.0f} "
+                f"- creatures {breakdown.creature_penalty} ({breakdown.creature_count}) "
+                f"- CMC {breakdown.cmc_penalty} ({breakdown.cmc_average:.2f}), "
+                f"{self.splash_cards} splash cards")
+
+
+@dataclass
+class ExplorerResult:
+    '''The ranked builds of a sealed pool
+       - evaluated: number of builds that were built and rated
+       - pruned: number of builds that were skipped because their upper bound couldn't beat the ranked builds
+       - skipped: number of builds that weren't evaluated because the time budget ran out
+       - elapsed: time, in seconds, that it took to explore the pool
+    '''
+    builds: list = field(default_factory=list)
+    evaluated: int = 0
+    pruned: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def complete(self):
+        return self.skipped == 0
+
+    def suggested_decks(self):
+        '''Return the builds in the format that's returned by suggest_deck, keyed by the build label'''
+        decks = {}
+        for build in self.builds:
+            deck_cards = stack_cards(build.deck)
+            deck_cards.extend(mana_base(build.deck))
+            decks[build.label] = {"deck_cards": deck_cards,
+                                  "sideboard_cards": stack_cards(build.sideboard),
+                                  "rating": build.rating,
+                                  "type": build.deck_type,
+                                  "colors": build.colors,
+                                  "breakdown": build.summary()}
+        return decks
+
+
+class SealedExplorer:
+    '''Class that builds and ranks every two-color base and splash combination of a sealed pool'''
+
+    def __init__(self, taken_cards, metrics, configuration):
+        self.cards = taken_cards
+        self.metrics = metrics
+        self.configuration = configuration
+        self.deck_types = {"Mid": configuration.card_logic.deck_mid,
+                           "Aggro": configuration.card_logic.deck_aggro,
+                           "Control": configuration.card_logic.deck_control}
+        self.threshold = metrics.mean - 0.33 * metrics.standard_deviation
+        profiles = [card_profile(x) for x in taken_cards]
+        self.color_masks = numpy.array([x.color_mask for x in profiles], dtype=numpy.int64)
+        nonland_mask = type_mask(SEALED_EXPLORER_NONLAND_TYPES)
+        land_mask = type_mask([constants.CARD_TYPE_LAND])
+        self.nonland = numpy.array([bool(x.type_mask & nonland_mask) for x in profiles], dtype=bool)
+        self.land = numpy.array([bool(x.type_mask & land_mask) and
+                                 card[constants.DATA_FIELD_NAME] not in constants.BASIC_LANDS
+                                 for x, card in zip(profiles, taken_cards)], dtype=bool)
+        self.__win_rates = {}
+        self.__snapshots = {}
+
+    def win_rates(self, colors):
+        '''Return the GIHWR values of the pool for a deck color as an array, in the order of the pool'''
+        win_rates = self.__win_rates.get(colors)
+        if win_rates is None:
+            ratings = [x.get(constants.DATA_FIELD_DECK_COLORS, {}).get(colors, {}) for x in self.cards]
+            gihwr = numpy.array([x.get(constants.DATA_FIELD_GIHWR) or 0.0 for x in ratings], dtype=numpy.float64)
+            gih = numpy.array([x.get(constants.DATA_FIELD_GIH) or 0.0 for x in ratings], dtype=numpy.float64)
+            win_rates = self.__win_rates[colors] = calculate_win_rates(
+                gihwr, gih, self.configuration.settings.bayesian_average_enabled)
+        return win_rates
+
+    def upper_bound(self, colors, splash, deck_type):
+        '''Return the highest rating that a build could reach
+
+           The bound is the combined win rate of the best playable nonland cards, up to the number of nonland cards
+           that build_deck can add, plus the combined win rate of the playable special lands. The rating penalties
+           are ignored.
+        '''
+        search_mask = color_mask(colors + splash)
+        win_rates = self.win_rates(colors)
+        playable = ((self.color_masks & ~search_mask) == 0) & (win_rates > self.threshold)
+        scores = numpy.where(playable, win_rates, 0.0)
+        card_count = max(deck_type.maximum_card_count, deck_type.recommended_creature_count,
+                         sum(deck_type.distribution))
+        nonland_scores = numpy.sort(scores[self.nonland])[::-1][:card_count]
+        return float(nonland_scores.sum() + scores[self.land].sum())
+
+    def candidates(self):
+        '''Yield every combination of two-color base, splash color, and deck type'''
+        for colors in [x for x in constants.DECK_COLORS if len(x) == 2]:
+            for splash in [""] + [x for x in constants.CARD_COLORS if x not in colors]:
+                for key, value in self.deck_types.items():
+                    yield colors, splash, key, value
+
+    def build(self, colors, splash, key, deck_type, upper_bound=0.0):
+        '''Build and rate a single deck'''
+        snapshot = self.__snapshots.get(colors)
+        if snapshot is None:
+            snapshot = self.__snapshots[colors] = card_snapshot(self.cards, colors)
+        deck, sideboard = build_deck(deck_type, list(snapshot), colors, self.metrics, self.configuration, splash)
+        breakdown = deck_rating_breakdown(deck, deck_type, colors, self.threshold,
+                                          self.configuration.settings.bayesian_average_enabled)
+        splash_mask = color_mask(splash)
+        splash_cards = sum(1 for x in deck if card_profile(x).color_mask & splash_mask)
+        return SealedBuild(colors, splash, key, deck, sideboard, breakdown, upper_bound, splash_cards)
+
+    def explore(self, time_budget=None, maximum_results=SEALED_EXPLORER_MAXIMUM_RESULTS):
+        '''Build the candidates in the order of their upper bounds and return the highest rated build for each label
+
+           time_budget: wall-clock limit, in seconds; the configured budget is used if it's None
+        '''
+        result = ExplorerResult()
+        start_time = time.perf_counter()
+        try:
+            if time_budget is None:
+                time_budget = self.configuration.card_logic.sealed_explorer_time_budget
+            deadline = start_time + time_budget
+
+            candidates = [(self.upper_bound(colors, splash, deck_type), colors, splash, key, deck_type)
+                          for colors, splash, key, deck_type in self.candidates()]
+            # Python's sort is stable, so candidates with the same bound keep the order of the candidates
+            candidates.sort(key=lambda x: x[0], reverse=True)
+
+            builds = {}
+            for index, (upper_bound, colors, splash, key, deck_type) in enumerate(candidates):
+                if time.perf_counter() >= deadline:
+                    result.skipped = len(candidates) - index
+                    break
+
+                ranked = sorted(builds.values(), key=lambda x: x.rating, reverse=True)
+                label = f"{colors}+{splash}" if splash else colors
+                if ((len(ranked) >= maximum_results and upper_bound <= ranked[maximum_results - 1].rating) or
+                        (label in builds and upper_bound <= builds[label].rating)):
+                    # The build is dominated by the ranked builds
+                    result.pruned += 1
+                    continue
+
+                build = self.build(colors, splash, key, deck_type, upper_bound)
+                result.evaluated += 1
+                if label not in builds or build.rating > builds[label].rating:
+                    builds[label] = build
+
+            result.builds = sorted(builds.values(), key=lambda x: x.rating, reverse=True)[:maximum_results]
+        except Exception as error:
+            logger.error(error)
+
+        result.elapsed = time.perf_counter() - start_time
+        logger.info("Sealed explorer: %d evaluated, %d pruned, %d skipped in %.1f ms", result.evaluated,
+                    result.pruned, result.skipped, result.elapsed * 1000)
+        return result
+
+
+def explore_sealed_pool(taken_cards, metrics, configuration, time_budget=None,
+                        maximum_results=SEALED_EXPLORER_MAXIMUM_RESULTS):
+    '''Return the ranked builds of a sealed pool (see SealedExplorer.explore)'''
+    return SealedExplorer(taken_cards, metrics, configuration).explore(time_budget, maximum_results)
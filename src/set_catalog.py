@@ -0,0 +1,245 @@
+"""This module contains the catalog of the set files within the Sets folder
+
+The catalog stores the metadata of each set file (set code, draft type, date range, version, card count, size, and
+modification time) in the Temp folder. The folder is rescanned with os.scandir, and only the files that are new or
+that have a different size or modification time are opened and validated.
+"""
+import os
+import json
+from enum import Enum
+from typing import Dict, Optional
+from pydantic import BaseModel, Field
+from src import constants
+from src.logger import create_logger
+
+logger = create_logger()
+
+SET_CATALOG_VERSION = 1
+
+
+class Result(Enum):
+    '''Enumeration class for file integrity results'''
+    VALID = 0
+    ERROR_MISSING_FILE = 1
+    ERROR_UNREADABLE_FILE = 2
+
+
+def check_file_integrity(filename):
+    '''Extracts data from a file to determine if it's formatted correctly'''
+    result = Result.VALID
+    json_data = {}
+
+    try:
+        with open(filename, 'r', encoding="utf-8", errors="replace") as json_file:
+            json_data = json_file.read()
+    except FileNotFoundError:
+        return Result.ERROR_MISSING_FILE, json_data
+
+    try:
+        json_data = json.loads(json_data)
+
+        if json_data.get("meta"):
+            meta = json_data["meta"]
+            version = meta.get("version")
+            if version == 1:
+                meta.get("date_range", "").split("->")
+            else:
+                meta.get("start_date")
+                meta.get("end_date")
+        else:
+            return Result.ERROR_UNREADABLE_FILE, json_data
+
+        cards = json_data.get("card_ratings")
+        if isinstance(cards, dict) and len(cards) >= 100:
+            for card in cards.values():
+                card.get(constants.DATA_FIELD_NAME)
+                card.get(constants.DATA_FIELD_COLORS)
+                card.get(constants.DATA_FIELD_CMC)
+                card.get(constants.DATA_FIELD_TYPES)
+                card.get("mana_cost")
+                card.get(constants.DATA_SECTION_IMAGES)
+                deck_colors = card.get(constants.DATA_FIELD_DECK_COLORS, {}).get(
+                    constants.FILTER_OPTION_ALL_DECKS, {})
+                deck_colors.get(constants.DATA_FIELD_GIHWR)
+                deck_colors.get(constants.DATA_FIELD_ALSA)
+                deck_colors.get(constants.DATA_FIELD_IWD)
+                break
+        else:
+            return Result.ERROR_UNREADABLE_FILE, json_data
+
+    except json.JSONDecodeError:
+        return Result.ERROR_UNREADABLE_FILE, json_data
+
+    return result, json_data
+
+
+class SetFileEntry(BaseModel):
+    """This class holds the metadata of a single set file"""
+    set_code: str = ""
+    draft_type: str = ""
+    start_date: str = ""
+    end_date: str = ""
+    version: float = 0.0
+    card_count: int = 0
+    size: int = 0
+    mtime_ns: int = 0
+    valid: bool = False
+
+
+class SetCatalogData(BaseModel):
+    """This class groups together the data stored in the catalog file"""
+    version: int = SET_CATALOG_VERSION
+    location: str = ""
+    files: Dict[str, SetFileEntry] = Field(default_factory=dict)
+
+
+def parse_set_file_name(file_name):
+    '''Return the set code and draft type from a set file name (e.g., LTR_PremierDraft_Data.json), or None'''
+    name_segments = file_name.split("_")
+    if len(name_segments) == 3 and name_segments[2] == constants.SET_FILE_SUFFIX:
+        return name_segments[0], name_segments[1]
+    return None
+
+
+def create_entry(file_name, stat, result, json_data):
+    '''Build the catalog entry for a set file from the integrity check results'''
+    set_code, draft_type = parse_set_file_name(file_name)
+    entry = SetFileEntry(set_code=set_code,
+                         draft_type=draft_type,
+                         size=stat.st_size,
+                         mtime_ns=stat.st_mtime_ns)
+    if result == Result.VALID:
+        try:
+            meta = json_data["meta"]
+            entry.version = meta.get("version") or 0.0
+            if entry.version == 1:
+                entry.start_date, entry.end_date = meta["date_range"].split("->")
+            else:
+                entry.start_date = meta["start_date"]
+                entry.end_date = meta["end_date"]
+            entry.card_count = len(json_data["card_ratings"])
+            entry.valid = True
+        except (KeyError, ValueError, TypeError) as error:
+            logger.error("%s: %s", file_name, error)
+    return entry
+
+
+class SetCatalog:
+    '''Class that maintains the catalog of the set files within a folder'''
+
+    def __init__(self, sets_location: str = constants.SETS_FOLDER,
+                 catalog_file: Optional[str] = constants.SET_CATALOG_FILE):
+        self.sets_location = sets_location
+        self.catalog_file = catalog_file
+        self.data = SetCatalogData(location=os.path.abspath(sets_location))
+        self.validations = 0
+        self.__load()
+
+    def refresh(self):
+        '''Update the catalog with the files that were added, changed, or removed since the last refresh
+
+           Returns True if the catalog changed
+        '''
+        changed = False
+        try:
+            found = set()
+            if os.path.isdir(self.sets_location):
+                with os.scandir(self.sets_location) as entries:
+                    for dir_entry in entries:
+                        if not dir_entry.is_file() or not parse_set_file_name(dir_entry.name):
+                            continue
+                        found.add(dir_entry.name)
+                        stat = dir_entry.stat()
+                        entry = self.data.files.get(dir_entry.name)
+                        if entry and (entry.size, entry.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                            continue
+                        result, json_data = check_file_integrity(dir_entry.path)
+                        self.validations += 1
+                        self.data.files[dir_entry.name] = create_entry(
+                            dir_entry.name, stat, result, json_data)
+                        changed = True
+
+            for file_name in [x for x in self.data.files if x not in found]:
+                del self.data.files[file_name]
+                changed = True
+
+            if changed:
+                self.__save()
+        except Exception as error:
+            logger.error(error)
+        return changed
+
+    def update_file(self, location, result, json_data):
+        '''Store the entry for a file that was just written and validated, so it isn't validated again'''
+        try:
+            file_name = os.path.basename(location)
+            self.data.files[file_name] = create_entry(file_name, os.stat(location), result, json_data)
+            self.__save()
+        except Exception as error:
+            logger.error(error)
+
+    def retrieve_entry(self, file_name):
+        '''Return the entry for a set file name, or None if the file isn't in the catalog'''
+        return self.data.files.get(file_name)
+
+    def valid_files(self):
+        '''Return a list of (file_name, entry) tuples for the valid set files'''
+        return [(k, v) for k, v in self.data.files.items() if v.valid]
+
+    def __load(self):
+        '''Read the catalog file. The catalog is discarded if it belongs to a different folder or version'''
+        if not self.catalog_file:
+            return
+        try:
+            with open(self.catalog_file, 'r', encoding="utf-8", errors="replace") as data:
+                catalog = SetCatalogData.parse_obj(json.loads(data.read()))
+            if (catalog.version == SET_CATALOG_VERSION) and (catalog.location == self.data.location):
+                self.data = catalog
+        except FileNotFoundError:
+            pass
+        except Exception as error:
+            logger.error(error)
+
+    def __save(self):
+        '''Write the catalog file'''
+        if not self.catalog_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.catalog_file), exist_ok=True)
+            temp_file = self.catalog_file + ".tmp"
+            with open(temp_file, 'w', encoding="utf-8", errors="replace") as data:
+                json.dump(self.data.dict(), data)
+            os.replace(temp_file, self.catalog_file)
+        except Exception as error:
+            logger.error(error)
+
+
+set_catalogs = {}
+
+
+def retrieve_set_catalog(sets_location: str = constants.SETS_FOLDER):
+    '''Return the refreshed catalog for a folder. The catalog of the default Sets folder is stored in the Temp folder'''
+    catalog = set_catalogs.get(sets_location)
+    if catalog is None:
+        catalog_file = constants.SET_CATALOG_FILE if sets_location == constants.SETS_FOLDER else None
+        catalog = set_catalogs[sets_location] = SetCatalog(sets_location, catalog_file)
+    catalog.refresh()
+    return catalog
+
+
+def retrieve_local_set_list(sets, sets_location: str = constants.SETS_FOLDER):
+    '''Returns a list of the valid set files within the Sets folder'''
+    file_list = []
+    main_sets = [v.seventeenlands[0] for k, v in sets.items()]
+    set_names = list(sets.keys())
+    for _, entry in retrieve_set_catalog(sets_location).valid_files():
+        try:
+            if ((entry.set_code.upper() in main_sets) and
+                    (entry.draft_type in constants.LIMITED_TYPES_DICT)):
+                set_name = set_names[main_sets.index(entry.set_code.upper())]
+                file_list.append(
+                    (set_name, entry.draft_type, entry.start_date, entry.end_date))
+        except Exception as error:
+            logger.error(error)
+
+    return file_list
@@ -0,0 +1,233 @@
+"""This module contains the command-line tool that rebuilds every set file in the Sets folder
+
+Usage: python -m src.set_refresh [--sets-folder Sets] [--workers 3] [--end-date YYYY-MM-DD] [--dry-run]
+
+The set files are discovered with retrieve_local_set_list, and each file is rebuilt with its start date and an end
+date of today (or --end-date). The Arena card database is extracted once before the downloads start, so the sets only
+read the temporary card data file. The sets are downloaded in a thread pool, and every 17Lands request takes a token
+from a single token bucket, so the request rate stays within the limit regardless of the number of sets.
+"""
+import sys
+import time
+import datetime
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import List
+from src import constants
+from src.file_extractor import FileExtractor
+from src.http_client import default_client
+from src.limited_sets import LimitedSets, SetInfo, TEMP_LIMITED_SETS
+from src.ratings_downloader import RatingsDownloader, TokenBucket
+from src.set_catalog import retrieve_local_set_list, retrieve_set_catalog
+from src.logger import create_logger
+
+logger = create_logger()
+
+SET_REFRESH_WORKERS = 3
+SET_REFRESH_DEFAULT_VERSION = 3.0
+SET_REFRESH_DATE_FORMAT = "%Y-%m-%d"
+
+
+@dataclass
+class RefreshTask:
+    '''A set file that will be rebuilt'''
+    set_name: str
+    set_info: SetInfo
+    draft_type: str
+    start_date: str
+    end_date: str
+    version: float = SET_REFRESH_DEFAULT_VERSION
+
+    @property
+    def label(self):
+        return f"{self.set_name} {self.draft_type}"
+
+
+@dataclass
+class RefreshResult:
+    '''The outcome of a single set refresh
+       - elapsed: time, in seconds, that was spent rebuilding the set file
+       - messages: status messages that were reported during the refresh
+    '''
+    task: RefreshTask
+    success: bool = False
+    message: str = ""
+    elapsed: float = 0.0
+    messages: List[str] = field(default_factory=list)
+
+
+class RefreshStatus:
+    '''Stand-in for the status variable of the Add Sets window'''
+
+    def __init__(self, label, verbose=False):
+        self.label = label
+        self.verbose = verbose
+        self.messages = []
+
+    def set(self, value):
+        self.messages.append(str(value))
+        logger.info("%s: %s", self.label, value)
+        if self.verbose:
+            print(f"{self.label}: {value}", flush=True)
+
+
+class RefreshRoot:
+    '''Stand-in for the Tk root that's updated during the downloads'''
+
+    def update(self):
+        pass
+
+
+def refresh_date_range(set_info, start_date, end_date):
+    '''Return the start and end dates for a refreshed set file
+
+       The previous start date is kept unless the set has a later minimum start date (e.g., the Arena Cube)
+    '''
+    start = start_date
+    try:
+        if set_info.start_date and (
+            datetime.datetime.strptime(set_info.start_date, SET_REFRESH_DATE_FORMAT) >
+                datetime.datetime.strptime(start_date, SET_REFRESH_DATE_FORMAT)):
+            start = set_info.start_date
+    except ValueError as error:
+        logger.error(error)
+        start = set_info.start_date or start_date
+    return start, end_date
+
+
+def plan_refresh(sets, sets_location=constants.SETS_FOLDER, end_date=None):
+    '''Return a list of RefreshTasks for the valid set files within a folder'''
+    end_date = end_date or str(datetime.date.today())
+    catalog = retrieve_set_catalog(sets_location)
+    tasks = []
+    for set_name, draft_type, start_date, _ in retrieve_local_set_list(sets, sets_location):
+        set_info = sets[set_name]
+        file_name = "_".join((set_info.seventeenlands[0], draft_type, constants.SET_FILE_SUFFIX))
+        entry = catalog.retrieve_entry(file_name)
+        start, end = refresh_date_range(set_info, start_date, end_date)
+        tasks.append(RefreshTask(set_name, set_info, draft_type, start, end,
+                                 (entry.version if entry else 0) or SET_REFRESH_DEFAULT_VERSION))
+    return tasks
+
+
+class SetRefresh:
+    '''Class that rebuilds a list of set files in parallel under a shared 17Lands rate limit'''
+
+    def __init__(self, sets_location=constants.SETS_FOLDER, workers=SET_REFRESH_WORKERS, directory="",
+                 rate=constants.CARD_RATINGS_RATE_LIMIT, burst=constants.CARD_RATINGS_BURST, verbose=False):
+        self.sets_location = sets_location
+        self.workers = workers
+        self.directory = directory
+        self.verbose = verbose
+        self.bucket = TokenBucket(rate, burst)
+        self.database_size = 0
+        self.__export_lock = threading.Lock()
+
+    def extract_card_data(self):
+        '''Extract the Arena card database into the temporary card data file before the sets are refreshed
+
+           Returns the size of the database, which tells the sets that the file is already up-to-date
+        '''
+        extractor = FileExtractor(self.directory)
+        extractor.select_sets(SetInfo(arena=[constants.SET_SELECTION_ALL]))
+        self.database_size = extractor.extract_card_data(
+            RefreshRoot(), RefreshStatus("Arena Card Database", self.verbose))
+        return self.database_size
+
+    def refresh_set(self, task):
+        '''Download the data for a set and rebuild its set file'''
+        result = RefreshResult(task)
+        status = RefreshStatus(task.label, self.verbose)
+        start_time = time.perf_counter()
+        try:
+            extractor = FileExtractor(self.directory,
+                                      downloader=RatingsDownloader(bucket=self.bucket))
+            extractor.select_sets(task.set_info)
+            extractor.set_draft_type(task.draft_type)
+            if not extractor.set_start_date(task.start_date) or not extractor.set_end_date(task.end_date):
+                raise ValueError(f"Invalid Date Range ({task.start_date} -> {task.end_date})")
+            extractor.set_version(task.version)
+
+            self.bucket.acquire()
+            extractor.retrieve_17lands_color_ratings()
+
+            success, message, _ = extractor.download_card_data(
+                RefreshRoot(), {"value": 0}, status, self.database_size)
+            if success:
+                # The set catalog and the ratings matrix are shared by the sets
+                with self.__export_lock:
+                    success = extractor.export_card_data(self.sets_location)
+                message = "" if success else "File Write Failure"
+            result.success = success
+            result.message = str(message)
+        except Exception as error:
+            logger.error(error)
+            result.message = str(error)
+        result.elapsed = time.perf_counter() - start_time
+        result.messages = status.messages
+        return result
+
+    def run(self, tasks, progress=None):
+        '''Refresh a list of tasks and return the results in the order of the tasks
+
+           progress: optional function that's called with each RefreshResult as it completes
+        '''
+        results = [None] * len(tasks)
+        if not tasks:
+            return results
+        self.extract_card_data()
+        with ThreadPoolExecutor(max_workers=max(min(self.workers, len(tasks)), 1)) as executor:
+            futures = {executor.submit(self.refresh_set, task): index for index, task in enumerate(tasks)}
+            for future in as_completed(futures):
+                result = future.result()
+                results[futures[future]] = result
+                if progress:
+                    progress(result)
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sets-folder", default=constants.SETS_FOLDER)
+    parser.add_argument("--sets", default=TEMP_LIMITED_SETS,
+                        help="sets file that's used to identify the set codes")
+    parser.add_argument("-w", "--workers", type=int, default=SET_REFRESH_WORKERS)
+    parser.add_argument("--end-date", default=None, help="end date of the refreshed files (default: today)")
+    parser.add_argument("--directory", default="", help="Arena installation directory")
+    parser.add_argument("--rate", type=float, default=constants.CARD_RATINGS_RATE_LIMIT,
+                        help="maximum number of 17Lands requests per second across all of the sets")
+    parser.add_argument("--dry-run", action="store_true", help="list the files without refreshing them")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    set_list, _ = LimitedSets(args.sets).read_sets_file()
+    tasks = plan_refresh(set_list.data, args.sets_folder, args.end_date)
+    for task in tasks:
+        print(f"{task.label}: {task.start_date} -> {task.end_date}")
+    if args.dry_run or not tasks:
+        print(f"Found {len(tasks)} set files")
+        return 0
+
+    completed = 0
+
+    def report(result):
+        nonlocal completed
+        completed += 1
+        outcome = "Refreshed" if result.success else f"Failed ({result.message})"
+        print(f"[{completed}/{len(tasks)}] {result.task.label}: {outcome} in {result.elapsed:.1f}s", flush=True)
+
+    start_time = time.perf_counter()
+    refresh = SetRefresh(args.sets_folder, args.workers, args.directory, args.rate, verbose=args.verbose)
+    results = refresh.run(tasks, report)
+    default_client().close()
+    stats = default_client().stats
+    print(f"Refreshed {sum(x.success for x in results)}/{len(results)} set files in "
+          f"{time.perf_counter() - start_time:.1f}s ({stats.requests} requests, "
+          f"{stats.bytes_received / 1e6:.1f} MB)")
+    return 0 if all(x.success for x in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
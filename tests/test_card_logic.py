@@ -0,0 +1,225 @@
+import json
+import random
+import itertools
+import pytest
+from src import constants
+from src.card_logic import (CardResult, SetMetrics, ResultRow, PoolAggregate, create_card_profile, card_profile,
+                            profile_cards, color_mask, type_mask, card_colors, row_color_tag, deck_card_search,
+                            deck_metrics, calculate_color_affinity, calculate_color_rating, calculate_curve_factor,
+                            select_cmc_cards, suggest_deck, card_snapshot,
+                            shutdown_suggest_deck_executor, suggest_deck_executor, SuggestDeckRequest)
+from src.configuration import Configuration
+
+
+def test_return_results_rows():
+    card = {constants.DATA_FIELD_NAME: "Card A",
+            constants.DATA_FIELD_COLORS: ["W"],
+            constants.DATA_FIELD_TYPES: [constants.CARD_TYPE_CREATURE],
+            constants.DATA_FIELD_MANA_COST: "{1}{W}",
+            constants.DATA_FIELD_DECK_COLORS: {constants.FILTER_OPTION_ALL_DECKS: {
+                constants.DATA_FIELD_GIHWR: 58.5, constants.DATA_FIELD_GIH: 1000.0,
+                constants.DATA_FIELD_ALSA: 3.2}}}
+    fields = {"Column1": constants.DATA_FIELD_NAME,
+              "Column2": constants.DATA_FIELD_COLORS,
+              "Column3": constants.DATA_FIELD_GIHWR,
+              "Column4": constants.DATA_FIELD_ALSA}
+    rows = CardResult(SetMetrics(), {}, Configuration(), 1).return_results(
+        [card], [constants.FILTER_OPTION_ALL_DECKS], fields)
+
+    row = rows[0]
+    assert isinstance(row, ResultRow)
+    assert row["results"] == ["Card A", "W", 58.5, 3.2]
+    # The row references the card data instead of copying it
+    assert row.card is card
+    assert row[constants.DATA_FIELD_TYPES] is card[constants.DATA_FIELD_TYPES]
+    assert "results" not in card
+    assert "results" in row and constants.DATA_FIELD_NAME in row
+
+
+def create_card(name, mana_cost, types, colors=None):
+    return {constants.DATA_FIELD_NAME: name,
+            constants.DATA_FIELD_MANA_COST: mana_cost,
+            constants.DATA_FIELD_TYPES: types,
+            constants.DATA_FIELD_COLORS: colors or []}
+
+
+def test_card_profile():
+    profile = create_card_profile(create_card("Gold", "{1}{G}{W}", [constants.CARD_TYPE_CREATURE]))
+    assert profile.mana_colors == ("W", "G")
+    assert profile.colors == ("W", "G")
+    assert profile.color_mask == color_mask("WG")
+    assert profile.type_mask == type_mask([constants.CARD_TYPE_CREATURE])
+
+    # Lands use the card colors since they don't have a mana cost
+    profile = create_card_profile(create_card("Dual", "", [constants.CARD_TYPE_LAND], ["U", "B"]))
+    assert (profile.mana_colors, profile.colors) == ((), ("U", "B"))
+
+    # The profiles are cached by value rather than stored in the cards, so the cards stay serializable
+    cards = [create_card("Mono", "{R}", [constants.CARD_TYPE_INSTANT]),
+             create_card("Other", "{R}", [constants.CARD_TYPE_INSTANT])]
+    profile_cards(cards)
+    assert card_profile(cards[0]) is card_profile(cards[1])
+    assert json.loads(json.dumps(cards)) == cards
+    assert card_colors("{2}{B}{B}") == {"B": 1}
+    assert row_color_tag(["R"]) == row_color_tag("{R}") == constants.CARD_ROW_COLOR_RED_TAG
+
+
+def test_deck_card_search():
+    deck = [create_card("Gold", "{U}{W}", [constants.CARD_TYPE_CREATURE]),
+            create_card("Blue", "{1}{U}", [constants.CARD_TYPE_CREATURE]),
+            create_card("Red", "{R}", [constants.CARD_TYPE_INSTANT]),
+            create_card("Relic", "{3}", [constants.CARD_TYPE_ARTIFACT]),
+            create_card("Dual", "", [constants.CARD_TYPE_LAND], ["U", "R"]),
+            create_card("White", "{W}", [constants.CARD_TYPE_CREATURE])]
+
+    def search(*args):
+        return [x[constants.DATA_FIELD_NAME] for x in deck_card_search(deck, *args)]
+
+    creatures = [constants.CARD_TYPE_CREATURE]
+    # Cards are grouped by their first color
+    assert search("WU", creatures, True, False, False) == ["Gold", "White", "Blue"]
+    assert search("WU", creatures, False, True, False) == ["Relic"]
+    assert search("UR", constants.CARD_TYPE_LIST, True, False, False) == ["Blue", "Dual", "Red"]
+    # Partial matches are grouped under each of their colors
+    assert search("U", constants.CARD_TYPE_LIST, True, False, True) == ["Gold", "Blue", "Dual"]
+    assert search("", constants.CARD_TYPE_LIST, True, True, False) == ["Relic"]
+
+
+def create_pool(card_count=40, seed=5):
+    rng = random.Random(seed)
+    pool = []
+    for x in range(card_count):
+        card = create_card(f"Card {x}",
+                           "".join(f"{{{c}}}" for c in rng.sample(constants.CARD_COLORS + ["2"], rng.randint(0, 3))),
+                           rng.sample(constants.CARD_TYPE_LIST, rng.randint(1, 2)),
+                           rng.sample(constants.CARD_COLORS, rng.randint(0, 2)))
+        card[constants.DATA_FIELD_CMC] = rng.randint(0, 8)
+        card[constants.DATA_FIELD_DECK_COLORS] = {
+            color: {constants.DATA_FIELD_GIHWR: round(rng.uniform(45.0, 65.0), 2),
+                    constants.DATA_FIELD_GIH: float(rng.choice([0, 150, 500, 3000]))}
+            for color in rng.sample(constants.DECK_COLORS, 12) + [constants.FILTER_OPTION_ALL_DECKS]}
+        pool.append(card)
+    return pool
+
+
+@pytest.mark.parametrize("bayesian_enabled", [False, True])
+def test_pool_aggregate(bayesian_enabled):
+    pool = create_pool()
+    configuration = Configuration()
+    configuration.settings.bayesian_average_enabled = bayesian_enabled
+    threshold = 54.0
+    aggregate = PoolAggregate()
+    # Request the sums before the cards are added, so they're updated incrementally
+    aggregate.color_rating(constants.FILTER_OPTION_ALL_DECKS, threshold, configuration)
+    aggregate.add_cards(pool)
+
+    assert aggregate.color_affinity(threshold, configuration) == calculate_color_affinity(
+        pool, constants.FILTER_OPTION_ALL_DECKS, threshold, configuration)
+    for color in constants.DECK_COLORS:
+        assert aggregate.color_rating(color, threshold, configuration) == calculate_color_rating(
+            pool, color, threshold, configuration)
+        assert calculate_curve_factor(pool, color, configuration, aggregate) == calculate_curve_factor(
+            pool, color, configuration)
+
+    for card_types, include_types, include_colorless, include_partial in constants.CARD_TYPE_DICT.values():
+        for symbol in constants.CARD_COLORS_DICT.values():
+            assert aggregate.deck_metrics(symbol, card_types, include_types, include_colorless, include_partial) == \
+                deck_metrics(deck_card_search(pool, symbol, card_types, include_types, include_colorless,
+                                              include_partial))
+
+
+def test_pool_aggregate_sync():
+    pool = {x[constants.DATA_FIELD_NAME]: x for x in create_pool(20)}
+    set_data = {"card_ratings": pool}
+    card_ids = list(pool.keys())
+    aggregate = PoolAggregate()
+    aggregate.sync(card_ids[:5], set_data, pool.get)
+    aggregate.sync(card_ids[:12], set_data, pool.get)
+    assert aggregate.cards == list(pool.values())[:12]
+
+    # The totals are rebuilt when the taken cards are replaced (e.g., a new draft)
+    aggregate.sync(card_ids[12:], set_data, pool.get)
+    assert aggregate.cards == list(pool.values())[12:]
+    assert sum(x[0] for x in aggregate.categories.values()) == 8
+
+
+def create_creatures(card_count, seed):
+    rng = random.Random(seed)
+    creatures = [{constants.DATA_FIELD_NAME: f"Creature {x}",
+                  constants.DATA_FIELD_CMC: rng.randint(1, 7),
+                  "results": [round(rng.uniform(48.0, 62.0), 1)]} for x in range(card_count)]
+    return sorted(creatures, key=lambda x: x["results"][0], reverse=True)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_select_cmc_cards(seed):
+    creatures = create_creatures(12, seed)
+    for card_count, cmc_limit in [(1, 1), (3, 7.5), (5, 14), (6, 12.16), (12, 100), (4, 3)]:
+        cards, unused = select_cmc_cards(creatures, cmc_limit, card_count)
+
+        # Brute force: the first combination, in list order, with the highest combined win rate
+        best = None
+        for combination in itertools.combinations(range(len(creatures)), card_count):
+            if sum(creatures[x][constants.DATA_FIELD_CMC] for x in combination) <= cmc_limit:
+                score = sum(round(creatures[x]["results"][0] * 10) for x in combination)
+                if best is None or score > best[0]:
+                    best = (score, combination)
+
+        assert cards == ([creatures[x] for x in best[1]] if best else [])
+        assert sorted(cards + unused, key=creatures.index) == creatures
+        assert unused == [x for x in creatures if x not in cards]
+
+
+def test_select_cmc_cards_limits():
+    creatures = create_creatures(5, 1)
+    assert select_cmc_cards(creatures, 30, 0) == ([], creatures)
+    assert select_cmc_cards(creatures, 30, 6) == ([], creatures)
+    assert select_cmc_cards(creatures, -1, 2) == ([], creatures)
+
+
+@pytest.fixture(scope="module")
+def sealed_pool():
+    pool = create_pool(90, seed=11)
+    for card in pool:
+        ratings = card[constants.DATA_FIELD_DECK_COLORS][constants.FILTER_OPTION_ALL_DECKS]
+        card[constants.DATA_FIELD_DECK_COLORS] = {x: dict(ratings) for x in constants.DECK_COLORS}
+    return pool
+
+
+def test_card_snapshot(sealed_pool):
+    snapshot = card_snapshot(sealed_pool, "WU")
+    assert isinstance(snapshot, tuple)
+    assert list(snapshot[0][constants.DATA_FIELD_DECK_COLORS]) == ["WU", constants.FILTER_OPTION_ALL_DECKS]
+    assert snapshot[0][constants.DATA_FIELD_NAME] == sealed_pool[0][constants.DATA_FIELD_NAME]
+    assert snapshot[0] is not sealed_pool[0]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_suggest_deck_sealed_pool(sealed_pool, workers):
+    configuration = Configuration()
+    metrics = SetMetrics(mean=55.0, standard_deviation=4.0)
+    decks = suggest_deck(sealed_pool, metrics, configuration, workers)
+    assert decks and decks == suggest_deck(sealed_pool, metrics, configuration, 1)
+    assert list(decks) == sorted(decks, key=lambda x: decks[x]["rating"], reverse=True)
+    for deck in decks.values():
+        assert deck["type"] in ("Mid", "Aggro", "Control")
+    # The decks are built from snapshots, so the taken cards aren't modified
+    assert all("results" not in x for x in sealed_pool)
+    shutdown_suggest_deck_executor()
+
+
+def test_suggest_deck_request(sealed_pool):
+    configuration = Configuration()
+    metrics = SetMetrics(mean=55.0, standard_deviation=4.0)
+    # The request doesn't wait for the process pool; poll returns the decks once every color is built
+    request = SuggestDeckRequest(sealed_pool, metrics, configuration, workers=2)
+    decks = request.result(timeout=60)
+    assert decks and decks == suggest_deck(sealed_pool, metrics, configuration, 1)
+    assert request.poll() is decks
+
+    # The pool is spawned, and it's replaced if the number of workers changes
+    executor = suggest_deck_executor(2)
+    assert executor._mp_context.get_start_method() == "spawn"
+    assert suggest_deck_executor(2) is executor
+    assert suggest_deck_executor(3) is not executor
+    shutdown_suggest_deck_executor()
@@ -0,0 +1,35 @@
+import os
+from src.download_staging import DownloadStaging, staging_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_staging_key():
+    assert staging_key("LTR", "PremierDraft", "2023-06-20", "2023-07-20") == "LTR_PremierDraft_2023-06-20_2023-07-20"
+    assert staging_key("../LTR", "Premier Draft", "", "") == "LTR_PremierDraft__"
+
+
+def test_stage_and_load(tmp_path):
+    clock = FakeClock()
+    staging = DownloadStaging(str(tmp_path), max_age=60, clock=clock)
+    key = staging_key("LTR", "PremierDraft", "2023-06-20", "2023-07-20")
+    assert staging.stage(key, "WU", [{"name": "Card A"}])
+    assert staging.stage(key, "All Decks", [])
+
+    clock.now = os.path.getmtime(tmp_path / key / "WU.json")
+    assert staging.load(key, "WU") == [{"name": "Card A"}]
+    assert staging.load(key, "B") is None
+    assert staging.load_colors(key, ["All Decks", "W", "WU"]) == {"All Decks": [], "WU": [{"name": "Card A"}]}
+
+    # The responses expire
+    clock.now += 61
+    assert staging.load_colors(key, ["All Decks", "WU"]) == {}
+
+    staging.clear(key)
+    assert not os.path.exists(tmp_path / key)
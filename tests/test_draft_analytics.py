@@ -0,0 +1,85 @@
+import os
+import csv
+import json
+import pytest
+from src.draft_analytics import DraftAnalytics, find_draft_logs, summarize_log, main
+from src.draft_log import convert_draft_log
+from src import constants
+from tests.test_log_scanner import TEST_SETS, premier_draft_lines
+from tests.test_draft_replay import draft_log_lines
+
+
+def write_set_file(sets_folder):
+    card_ratings = {str(x): {constants.DATA_FIELD_NAME: f"Card {x}",
+                             constants.DATA_FIELD_DECK_COLORS: {
+                                 constants.FILTER_OPTION_ALL_DECKS: {constants.DATA_FIELD_ALSA: 2.5,
+                                                                     constants.DATA_FIELD_ATA: 3.0}}}
+                    for x in range(1, 101)}
+    set_data = {"meta": {"version": 3.0, "start_date": "2023-06-20", "end_date": "2023-07-20"},
+                "card_ratings": card_ratings}
+    (sets_folder / "LTR_PremierDraft_Data.json").write_text(json.dumps(set_data), encoding="utf-8")
+
+
+@pytest.fixture
+def log_folder(tmp_path):
+    folder = tmp_path / "Logs"
+    folder.mkdir()
+    for draft in range(3):
+        log_path = folder / f"DraftLog_LTR_PremierDraft_{draft}.log"
+        log_path.write_text("".join(draft_log_lines(premier_draft_lines())), encoding="utf-8")
+    (folder / "debug.log").write_text("unrelated", encoding="utf-8")
+    sets_folder = tmp_path / "Sets"
+    sets_folder.mkdir()
+    write_set_file(sets_folder)
+    return folder, sets_folder
+
+
+def test_summarize_log(log_folder):
+    folder, _ = log_folder
+    summary = summarize_log(str(folder / "DraftLog_LTR_PremierDraft_0.log"), TEST_SETS)
+    assert summary == {("LTR", "PremierDraft"): {"drafts": 1,
+                                                 "cards": {"1": [1, 1, 1], "2": [1, 0, 0], "3": [1, 0, 0],
+                                                           "4": [1, 0, 0], "5": [1, 1, 2]}}}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_aggregate_logs(log_folder, workers):
+    folder, sets_folder = log_folder
+    analytics = DraftAnalytics(TEST_SETS, str(sets_folder))
+    assert analytics.process(find_draft_logs(str(folder)), workers) == 3
+    rows = {x["card"]: x for x in analytics.rows()}
+    assert rows["5"]["seen"] == 3
+    assert rows["5"]["taken"] == 3
+    assert rows["5"]["avg_pick"] == 2
+    assert rows["5"]["name"] == "Card 5"
+    assert rows["5"]["pick_vs_alsa"] == -0.5
+    assert rows["2"]["take_rate"] == 0
+    assert rows["1"]["drafts"] == 3
+
+
+def test_converted_logs(log_folder):
+    folder, sets_folder = log_folder
+    # The converted copy is written next to the raw log, and the draft is only counted once
+    assert convert_draft_log(str(folder / "DraftLog_LTR_PremierDraft_0.log"), TEST_SETS)
+    assert convert_draft_log(str(folder / "DraftLog_LTR_PremierDraft_1.log"), TEST_SETS, compress=True)
+    logs = sorted(os.path.basename(x) for x in find_draft_logs(str(folder)))
+    assert logs == ["DraftLog_LTR_PremierDraft_0.jsonl", "DraftLog_LTR_PremierDraft_1.jsonl.gz",
+                    "DraftLog_LTR_PremierDraft_2.log"]
+
+    analytics = DraftAnalytics(TEST_SETS, str(sets_folder))
+    assert analytics.process(find_draft_logs(str(folder)), 1) == 3
+    rows = {x["card"]: x for x in analytics.rows()}
+    assert (rows["5"]["drafts"], rows["5"]["seen"], rows["5"]["taken"], rows["5"]["avg_pick"]) == (3, 3, 3, 2)
+
+
+def test_analytics_cli(log_folder, tmp_path):
+    folder, sets_folder = log_folder
+    sets_file = tmp_path / "sets.json"
+    sets_file.write_text(TEST_SETS.json(), encoding="utf-8")
+    output = tmp_path / "analytics.csv"
+    assert main([str(folder), "-o", str(output), "-w", "1",
+                 "--sets", str(sets_file), "--sets-folder", str(sets_folder)]) == 0
+    with open(output, encoding="utf-8") as file:
+        rows = list(csv.DictReader(file))
+    assert [x["card"] for x in rows] == ["1", "5", "2", "3", "4"]
+    assert rows[0]["alsa"] == "2.5"
@@ -0,0 +1,108 @@
+import os
+import pytest
+from src.draft_log import (DraftEventLog, convert_draft_log, read_event_log, is_event_log, serialize_event)
+from src.draft_replay import DraftReplay
+from src.draft_analytics import summarize_log
+from src.scanner_events import PickMade
+from src.logger import flush_logs, set_draft_event_log_file
+from src import constants
+from tests.test_log_scanner import (TEST_SETS, premier_draft_lines, create_scanner, notify_line,
+                                    make_pick_line)
+from tests.test_draft_replay import draft_log_lines
+
+
+@pytest.fixture
+def raw_draft_log(tmp_path):
+    log_path = tmp_path / "DraftLog_LTR_PremierDraft_abc123.log"
+    log_path.write_text("".join(draft_log_lines(premier_draft_lines())), encoding="utf-8")
+    return log_path
+
+
+def replay_events(filename):
+    return [x.event for x in DraftReplay(str(filename), TEST_SETS).run().events]
+
+
+def test_serialize_event():
+    line = serialize_event(PickMade(offset=1234, pack=1, pick=2, card="87003"), 1687309323.5)
+    assert line == '{"event":"PickMade","pack":1,"pick":2,"card":"87003","time":1687309323}'
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_convert_draft_log(raw_draft_log, tmp_path, compress):
+    output_path = convert_draft_log(str(raw_draft_log), TEST_SETS, str(tmp_path), compress)
+    assert is_event_log(output_path)
+    assert output_path.endswith(".jsonl.gz" if compress else ".jsonl")
+
+    raw_events = replay_events(raw_draft_log)
+    compact_events = list(read_event_log(output_path))
+    # The compact format doesn't store the Arena log offsets
+    assert compact_events == [type(x)(**{**x.__dict__, "offset": 0}) for x in raw_events]
+    # Replay and analytics read either format
+    assert [x.name for x in replay_events(output_path)] == [x.name for x in raw_events]
+    assert summarize_log(output_path, TEST_SETS) == summarize_log(str(raw_draft_log), TEST_SETS)
+
+
+def test_event_log_writer(tmp_path):
+    player_log = tmp_path / "Player.log"
+    player_log.write_text("".join(premier_draft_lines()), encoding="utf-8")
+    scanner = create_scanner(player_log)
+    scanner.add_listener(DraftEventLog(str(tmp_path), compress=True))
+    scanner.log_enable(True, constants.DRAFT_LOG_FORMAT_JSONL_GZIP)
+    try:
+        scanner.draft_start_search()
+        flush_logs()
+    finally:
+        scanner.log_enable(False)
+
+    event_log = tmp_path / "DraftLog_LTR_PremierDraft_abc123.jsonl.gz"
+    assert [x.name for x in read_event_log(str(event_log))] == [
+        "DraftStarted", "PackSeen", "PickMade", "PackSeen", "PickMade"]
+    # The raw draft log is disabled while the compact format is selected
+    assert not os.path.exists(os.path.join(constants.DRAFT_LOG_FOLDER, "DraftLog_LTR_PremierDraft_abc123.log"))
+
+
+def test_event_log_resumed_draft(tmp_path):
+    player_log = tmp_path / "Player.log"
+    lines = premier_draft_lines()
+    player_log.write_text("".join(lines[:4]), encoding="utf-8")
+    checkpoint_file = str(tmp_path / "scanner_checkpoint.json")
+    scanner = create_scanner(player_log, checkpoint_file)
+    scanner.add_listener(DraftEventLog(str(tmp_path)))
+    scanner.log_enable(True, constants.DRAFT_LOG_FORMAT_JSONL)
+    try:
+        scanner.draft_start_search()
+        flush_logs()
+        assert scanner.save_checkpoint()
+    finally:
+        scanner.log_enable(False)
+    # Detach the draft log, as if the application was restarted
+    set_draft_event_log_file(str(tmp_path / "unrelated.jsonl"), False)
+
+    # The restarted scanner resumes the draft from the checkpoint, and the listener is added afterwards
+    with open(player_log, "a", encoding="utf-8") as log:
+        log.write("".join(lines[4:]))
+    resumed_scanner = create_scanner(player_log, checkpoint_file)
+    event_log = DraftEventLog(str(tmp_path))
+    resumed_scanner.add_listener(event_log)
+    resumed_scanner.log_enable(True, constants.DRAFT_LOG_FORMAT_JSONL)
+    try:
+        resumed_scanner.draft_data_search()
+        flush_logs()
+
+        # The format change reopens the log of the resumed draft
+        event_log.compress = True
+        resumed_scanner.log_enable(True, constants.DRAFT_LOG_FORMAT_JSONL_GZIP)
+        with open(player_log, "a", encoding="utf-8") as log:
+            log.write(notify_line(1, 3, [6, 7]) + make_pick_line(1, 3, 7))
+        resumed_scanner.draft_data_search()
+        flush_logs()
+    finally:
+        resumed_scanner.log_enable(False)
+
+    # The resumed draft is appended without a second DraftStarted record
+    assert [x.name for x in read_event_log(str(tmp_path / "DraftLog_LTR_PremierDraft_abc123.jsonl"))] == [
+        "DraftStarted", "PackSeen", "PickMade", "PackSeen", "PickMade"]
+    # The new file starts with the DraftStarted record
+    assert [x.name for x in read_event_log(str(tmp_path / "DraftLog_LTR_PremierDraft_abc123.jsonl.gz"))] == [
+        "DraftStarted", "PackSeen", "PickMade"]
+    assert not os.path.exists(tmp_path / "unrelated.jsonl")
@@ -0,0 +1,59 @@
+import json
+from src.draft_replay import DraftReplay, main
+from src.scanner_events import DraftStarted, PackSeen, PickMade, event_from_dict
+from src import constants
+from tests.test_log_scanner import (TEST_SETS, event_join_line, premier_draft_lines, notify_line,
+                                    make_pick_line)
+
+
+def draft_log_lines(lines):
+    # Lines within the application draft logs are prefixed with a timestamp
+    return ["<21062023 10:00:00>," + x for x in lines]
+
+
+def test_replay_event_stream(tmp_path):
+    log_path = tmp_path / "DraftLog_LTR_PremierDraft_abc123.log"
+    log_path.write_text("".join(draft_log_lines(premier_draft_lines())), encoding="utf-8")
+
+    result = DraftReplay(str(log_path), TEST_SETS).run()
+    events = [x.event for x in result.events]
+    assert [x.name for x in events] == ["DraftStarted", "PackSeen", "PickMade", "PackSeen", "PickMade"]
+    assert events[0] == DraftStarted(offset=events[0].offset,
+                                     event_type=constants.LIMITED_TYPE_STRING_DRAFT_PREMIER,
+                                     draft_type=constants.LIMITED_TYPE_DRAFT_PREMIER_V1,
+                                     sets=["LTR"],
+                                     event_name="PremierDraft_LTR_20230620",
+                                     draft_id="abc123")
+    assert events[3] == PackSeen(offset=events[3].offset, pack=1, pick=2, cards=["4", "5"])
+    assert events[4] == PickMade(offset=log_path.stat().st_size, pack=1, pick=2, card="5")
+    assert all(x.elapsed >= 0 for x in result.events)
+    assert result.bytes_read == log_path.stat().st_size
+
+
+def test_replay_every_draft(tmp_path):
+    # The catch-up search would skip to the last draft, but the replay parses the whole log
+    log_path = tmp_path / "Player.log"
+    lines = (premier_draft_lines() +
+             [event_join_line("PremierDraft_LTR_20230620", "second"),
+              notify_line(1, 2, [8, 9]),
+              make_pick_line(1, 2, 9)])
+    log_path.write_text("".join(lines), encoding="utf-8")
+
+    result = DraftReplay(str(log_path), TEST_SETS).run()
+    drafts = [x.event.draft_id for x in result.events if isinstance(x.event, DraftStarted)]
+    assert drafts == ["abc123", "second"]
+    assert result.event_timings()["PickMade"][0] == 3
+
+
+def test_replay_cli_events(tmp_path, capsys):
+    log_path = tmp_path / "Player.log"
+    log_path.write_text("".join(premier_draft_lines()), encoding="utf-8")
+    sets_path = tmp_path / "sets.json"
+    sets_path.write_text(TEST_SETS.json(), encoding="utf-8")
+
+    assert main([str(log_path), "--events", "--sets", str(sets_path)]) == 0
+    output = [x for x in capsys.readouterr().out.splitlines() if x.startswith("{")]
+    events = [event_from_dict({k: v for k, v in json.loads(x).items() if not k.endswith("_us")})
+              for x in output]
+    assert events[0].sets == ["LTR"]
+    assert events[-1] == PickMade(offset=log_path.stat().st_size, pack=1, pick=2, card="5")
@@ -0,0 +1,209 @@
+import os
+import threading
+import urllib.error
+import pytest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from src.http_cache import ResponseCache, HTTP_CACHE_INDEX_FILE, content_digest
+from src.http_client import HTTPClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ValidatorServer(ThreadingHTTPServer):
+    '''Local server that returns an ETag and answers conditional requests with 304 Not Modified'''
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ValidatorHandler)
+        self.body = b'{"version": 1}'
+        self.etag = '"v1"'
+        self.status = 200
+        self.requests = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class ValidatorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append(self.headers.get("If-None-Match"))
+        if self.server.status != 200:
+            body = b"Error"
+            self.send_response(self.server.status)
+        elif self.headers.get("If-None-Match") == self.server.etag:
+            body = b""
+            self.send_response(304)
+            self.send_header("ETag", self.server.etag)
+        else:
+            body = self.server.body
+            self.send_response(200)
+            self.send_header("ETag", self.server.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ValidatorServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_store_and_lookup(tmp_path):
+    clock = FakeClock()
+    cache = ResponseCache(str(tmp_path), max_size=1000, ttl=60, clock=clock)
+    assert cache.lookup("http://a") is None
+    cache.store("http://a", b"data", {"ETag": '"a"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+
+    cached = cache.lookup("http://a")
+    assert cached.fresh and cached.data == b"data"
+    assert cache.conditional_headers(cached) == {"If-None-Match": '"a"',
+                                                 "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    clock.now += 61
+    assert not cache.lookup("http://a").fresh
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+    # The index is reloaded by a new instance
+    reloaded = ResponseCache(str(tmp_path), max_size=1000, ttl=60, clock=clock)
+    assert reloaded.lookup("http://a").data == b"data"
+
+    assert cache.store("http://b", b"private", {"Cache-Control": "no-store"}) is None
+    assert cache.lookup("http://b") is None
+
+
+def test_content_addressed_bodies(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_size=1000, ttl=60, clock=FakeClock())
+    cache.store("http://a", b"same")
+    cache.store("http://b", b"same")
+    assert sorted(os.listdir(tmp_path)) == sorted([content_digest(b"same"), HTTP_CACHE_INDEX_FILE])
+    assert cache.size == 4
+
+    # A body that doesn't match its digest is discarded
+    with open(os.path.join(tmp_path, content_digest(b"same")), "wb") as body:
+        body.write(b"corrupted")
+    assert cache.lookup("http://a") is None
+    # The corrupted file is replaced when the same content is stored again
+    cache.store("http://a", b"same")
+    assert cache.lookup("http://a").data == b"same"
+    assert cache.lookup("http://b").data == b"same"
+
+
+def test_shared_folder(tmp_path):
+    # Two caches (e.g., the overlay and the set_refresh tool) writing the same bodies to one folder
+    caches = [ResponseCache(str(tmp_path), max_size=10 ** 6, ttl=60, clock=FakeClock()) for _ in range(2)]
+    threads = [threading.Thread(target=lambda cache=cache: [cache.store(f"http://{x}", b"body %d" % x)
+                                                          for x in range(50)])
+               for cache in caches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not [x for x in os.listdir(tmp_path) if x.endswith((".tmp", ".lock"))]
+    assert all(x.lookup("http://7").data == b"body 7" for x in caches)
+
+
+def test_shared_index(tmp_path):
+    clock = FakeClock()
+    first, second = [ResponseCache(str(tmp_path), max_size=12, ttl=60, clock=clock) for _ in range(2)]
+    first.store("http://a", b"aaaa")
+    clock.now += 1
+    second.store("http://b", b"bbbb")
+    clock.now += 1
+    # The entries of the other cache are kept when the index is written
+    assert sorted(ResponseCache(str(tmp_path)).index.entries) == ["http://a", "http://b"]
+
+    # The access times of the hits aren't written until the next change or until the cache is closed
+    index_time = os.path.getmtime(os.path.join(tmp_path, HTTP_CACHE_INDEX_FILE))
+    assert first.lookup("http://a").fresh
+    assert os.path.getmtime(os.path.join(tmp_path, HTTP_CACHE_INDEX_FILE)) == index_time
+    first.close()
+    assert ResponseCache(str(tmp_path)).index.entries["http://a"].accessed == clock.now
+
+    # "b" is the least recently used response across both caches, and the body of "a" is kept
+    clock.now += 1
+    second.store("http://c", b"cccccc")
+    assert sorted(second.index.entries) == ["http://a", "http://c"]
+    assert first.lookup("http://b") is None
+    assert first.lookup("http://a").data == b"aaaa"
+
+
+def test_lru_eviction(tmp_path):
+    clock = FakeClock()
+    cache = ResponseCache(str(tmp_path), max_size=10, ttl=60, clock=clock)
+    for url, data in [("http://a", b"aaaa"), ("http://b", b"bbbb")]:
+        cache.store(url, data)
+        clock.now += 1
+    # Reading "a" makes "b" the least recently used response
+    cache.lookup("http://a")
+    clock.now += 1
+    cache.store("http://c", b"cccc")
+
+    assert cache.lookup("http://b") is None
+    assert cache.lookup("http://a").data == b"aaaa"
+    assert cache.lookup("http://c").data == b"cccc"
+    assert cache.size == 8
+    assert cache.stats.evictions == 1
+    assert not os.path.exists(os.path.join(tmp_path, content_digest(b"bbbb")))
+
+
+def test_client_revalidation(server, tmp_path):
+    clock = FakeClock()
+    client = HTTPClient(timeout=5, cache=ResponseCache(str(tmp_path), ttl=60, clock=clock))
+    url = f"{server.url}/data"
+
+    assert not client.request(url).cached
+    # A fresh response is served without a request
+    assert client.get_json(url) == {"version": 1}
+    assert server.requests == [None]
+
+    # An expired response is revalidated with a conditional request
+    clock.now += 61
+    response = client.request(url)
+    assert response.cached and response.data == server.body
+    assert server.requests == [None, '"v1"']
+    assert client.cache.stats.revalidated == 1
+
+    # A changed response replaces the cached response
+    clock.now += 61
+    server.body, server.etag = b'{"version": 2}', '"v2"'
+    assert client.get_json(url) == {"version": 2}
+
+    # An expired response is served if the server returns an error
+    clock.now += 61
+    server.status = 503
+    assert client.get_json(url) == {"version": 2}
+    assert client.cache.stats.stale == 1
+
+    server.status = 404
+    with pytest.raises(urllib.error.HTTPError):
+        client.get(url)
+    client.close()
+
+
+def test_client_offline(tmp_path):
+    clock = FakeClock()
+    cache = ResponseCache(str(tmp_path), ttl=60, clock=clock)
+    url = "http://127.0.0.1:9/data"
+    cache.store(url, b"offline")
+    clock.now += 61
+
+    client = HTTPClient(timeout=1, cache=cache)
+    assert client.get(url) == b"offline"
+    assert cache.stats.stale == 1
+    with pytest.raises(OSError):
+        client.get("http://127.0.0.1:9/missing")
@@ -0,0 +1,67 @@
+import pytest
+import time
+from src.log_monitor import LogMonitor, PollingBackend, create_backend
+
+
+def wait_for_change(monitor, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        change = monitor.consume()
+        if change is not None:
+            return change
+        time.sleep(0.01)
+    return None
+
+
+@pytest.fixture
+def log_monitor(tmp_path):
+    log_path = tmp_path / "Player.log"
+    log_path.write_text("start\n", encoding="utf-8")
+    monitor = LogMonitor(str(log_path))
+    monitor.start()
+    yield monitor, log_path
+    monitor.stop()
+
+
+def test_initial_change(log_monitor):
+    monitor, _ = log_monitor
+    assert monitor.consume() is not None
+    assert monitor.consume() is None
+
+
+def test_append_detected(log_monitor):
+    monitor, log_path = log_monitor
+    monitor.consume()
+    with open(log_path, "a", encoding="utf-8") as log:
+        log.write("pick\n")
+    assert wait_for_change(monitor) is not None
+
+
+def test_burst_coalesced(log_monitor):
+    monitor, log_path = log_monitor
+    monitor.consume()
+    with open(log_path, "a", encoding="utf-8") as log:
+        for count in range(20):
+            log.write(f"line {count}\n")
+            log.flush()
+    assert wait_for_change(monitor) is not None
+    time.sleep(0.5)
+    assert monitor.changes <= 2
+
+
+def test_polling_backend(tmp_path):
+    log_path = tmp_path / "Player.log"
+    log_path.write_text("start\n", encoding="utf-8")
+    backend = PollingBackend(str(log_path), interval=0.01)
+    assert not backend.wait(0.05)
+    with open(log_path, "a", encoding="utf-8") as log:
+        log.write("pick\n")
+    assert backend.wait(1)
+
+
+def test_missing_file_backend(tmp_path):
+    backend = create_backend(str(tmp_path / "Player.log"))
+    assert not backend.wait(0.05)
+    (tmp_path / "Player.log").write_text("start\n", encoding="utf-8")
+    assert backend.wait(1)
+    backend.close()
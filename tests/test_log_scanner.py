@@ -0,0 +1,210 @@
+import pytest
+import json
+from src.log_scanner import ArenaScanner
+from src.log_tailer import LogTailer, LineMatcher
+from src.limited_sets import SetInfo, SetDictionary
+from src import constants
+
+TEST_SETS = SetDictionary(data={
+    "The Lord of the Rings: Tales of Middle-earth": SetInfo(arena=["LTR"], scryfall=["LTR"], seventeenlands=["LTR"]),
+})
+
+
+def event_join_line(event_name, draft_id="abc123"):
+    payload = json.dumps({"EventName": event_name})
+    request = json.dumps({"Payload": payload})
+    return "[UnityCrossThreadLogger]==> Event_Join " + json.dumps({"id": draft_id, "request": request}) + "\n"
+
+
+def p1p1_line(cards):
+    payload = json.dumps({"CardsInPack": cards, "PackNumber": 1, "PickNumber": 1})
+    request = json.dumps({"Payload": payload})
+    return "<01012023 10:00:00>," + json.dumps({"id": "p1p1", "request": request}) + "\n"
+
+
+def notify_line(pack, pick, cards):
+    data = {"draftId": "abc123", "SelfPick": pick, "SelfPack": pack,
+            "PackCards": ",".join(str(x) for x in cards)}
+    return "[UnityCrossThreadLogger]Draft.Notify " + json.dumps(data) + "\n"
+
+
+def make_pick_line(pack, pick, card):
+    payload = json.dumps({"Pack": pack, "Pick": pick, "GrpId": card})
+    request = json.dumps({"Payload": payload})
+    return "[UnityCrossThreadLogger]==> Event_PlayerDraftMakePick " + json.dumps({"id": "pick", "request": request}) + "\n"
+
+
+def premier_draft_lines():
+    return [
+        "[UnityCrossThreadLogger]Unrelated line\n",
+        event_join_line("PremierDraft_LTR_20230620"),
+        p1p1_line([1, 2, 3]),
+        make_pick_line(1, 1, 1),
+        notify_line(1, 2, [4, 5]),
+        make_pick_line(1, 2, 5),
+    ]
+
+
+@pytest.fixture
+def player_log(tmp_path):
+    log_path = tmp_path / "Player.log"
+    log_path.write_text("".join(premier_draft_lines()), encoding="utf-8")
+    return log_path
+
+
+@pytest.fixture
+def checkpoint_file(tmp_path):
+    return str(tmp_path / "scanner_checkpoint.json")
+
+
+def create_scanner(log_path, checkpoint_file=None):
+    arena_scanner = ArenaScanner(str(log_path), TEST_SETS, checkpoint_file=checkpoint_file)
+    arena_scanner.log_enable(False)
+    return arena_scanner
+
+
+@pytest.fixture
+def scanner(player_log, checkpoint_file):
+    return create_scanner(player_log, checkpoint_file)
+
+
+def test_tailer_single_pass(tmp_path):
+    log_path = tmp_path / "tail.log"
+    log_path.write_text("alpha 1\nbeta 2\nalpha beta 3\npartial alpha", encoding="utf-8")
+    alpha_lines = []
+    both_lines = []
+    tailer = LogTailer(str(log_path))
+    tailer.register(LineMatcher(name="alpha", markers=["alpha"],
+                                callback=lambda line, string_offset, offset: alpha_lines.append(line)))
+    tailer.register(LineMatcher(name="both", markers=["alpha", "beta"],
+                                callback=lambda line, string_offset, offset: both_lines.append(line)))
+
+    tailer.process()
+    assert alpha_lines == ["alpha 1\n", "alpha beta 3\n"]
+    assert both_lines == ["alpha beta 3\n"]
+    # Only the lines that contain a marker are decoded
+    assert tailer.metrics.lines_decoded == 2
+
+    # The unterminated line is only dispatched once it's complete
+    with open(log_path, "a", encoding="utf-8") as log:
+        log.write(" 4\n")
+    tailer.process()
+    assert alpha_lines[-1] == "partial alpha 4\n"
+    assert tailer.metrics.bytes_read == log_path.stat().st_size
+
+
+def test_tailer_small_chunks(tmp_path):
+    log_path = tmp_path / "tail.log"
+    lines = [f"line {x} {'marker' if x % 3 == 0 else 'noise'} {'x' * x}\n" for x in range(50)]
+    log_path.write_text("".join(lines), encoding="utf-8")
+    matched = []
+    tailer = LogTailer(str(log_path), chunk_size=16)
+    tailer.register(LineMatcher(name="marker", markers=["marker"],
+                                callback=lambda line, string_offset, offset: matched.append(line)))
+    tailer.process()
+    assert matched == [x for x in lines if "marker" in x]
+
+
+def test_premier_draft_search(scanner):
+    assert scanner.draft_start_search()
+    assert scanner.draft_type == constants.LIMITED_TYPE_DRAFT_PREMIER_V1
+    assert scanner.draft_sets == ["LTR"]
+    assert scanner.draft_data_search()
+    assert scanner.retrieve_current_pack_and_pick() == (1, 2)
+    assert scanner.taken_cards == ["1", "5"]
+    assert scanner.initial_pack[0] == ["1", "2", "3"]
+    assert scanner.pack_cards[1] == ["4", "5"]
+
+    # Nothing new in the log
+    assert not scanner.draft_start_search()
+    assert not scanner.draft_data_search()
+
+
+def test_incremental_draft_search(scanner, player_log):
+    scanner.draft_start_search()
+    scanner.draft_data_search()
+    with open(player_log, "a", encoding="utf-8") as log:
+        log.write(notify_line(1, 3, [6, 7]))
+    assert not scanner.draft_start_search()
+    assert scanner.draft_data_search()
+    assert scanner.retrieve_current_pack_and_pick() == (1, 3)
+
+
+def test_new_arena_log(scanner, player_log):
+    scanner.draft_start_search()
+    scanner.draft_data_search()
+    player_log.write_text(event_join_line("QuickDraft_LTR_20230620"), encoding="utf-8")
+    assert scanner.draft_start_search()
+    assert scanner.draft_type == constants.LIMITED_TYPE_DRAFT_QUICK
+    assert scanner.taken_cards == []
+
+
+def test_tailer_reverse_search(tmp_path):
+    log_path = tmp_path / "tail.log"
+    lines = [f"line {x} {'marker' if x % 7 == 0 else 'noise'}\n" for x in range(40)]
+    log_path.write_text("".join(lines) + "marker unterminated", encoding="utf-8")
+    tailer = LogTailer(str(log_path), chunk_size=24)
+    results = list(tailer.reverse_search(["marker"]))
+    assert [x[1] for x in results] == [x for x in reversed(lines) if "marker" in x]
+    with open(log_path, "rb") as log:
+        for line_start, line in results:
+            log.seek(line_start)
+            assert log.readline().decode("utf-8") == line
+
+
+def test_catch_up_to_last_draft(tmp_path):
+    log_path = tmp_path / "Player.log"
+    noise = ["[UnityCrossThreadLogger]GameStateMessage " + "x" * 100 + "\n"] * 200
+    lines = ([event_join_line("QuickDraft_LTR_20230620", "old")] + noise +
+             premier_draft_lines() +
+             [event_join_line("Ladder", "constructed")] + noise)
+    log_path.write_text("".join(lines), encoding="utf-8")
+    arena_scanner = create_scanner(log_path)
+    arena_scanner.tailer.chunk_size = 512
+
+    assert arena_scanner.draft_start_search()
+    assert arena_scanner.draft_data_search()
+    assert arena_scanner.draft_type == constants.LIMITED_TYPE_DRAFT_PREMIER_V1
+    assert arena_scanner.taken_cards == ["1", "5"]
+    # The old draft and the noise that precedes the last draft are skipped
+    assert arena_scanner.tailer.metrics.lines_matched == len(premier_draft_lines())
+
+
+def test_resume_from_checkpoint(scanner, player_log, checkpoint_file):
+    scanner.draft_start_search()
+    scanner.draft_data_search()
+    assert scanner.save_checkpoint()
+
+    with open(player_log, "a", encoding="utf-8") as log:
+        log.write(notify_line(1, 3, [6, 7]))
+
+    resumed_scanner = create_scanner(player_log, checkpoint_file)
+    assert resumed_scanner.tailer.offset == scanner.tailer.offset
+    assert resumed_scanner.draft_start_search()
+    assert resumed_scanner.draft_data_search()
+    assert resumed_scanner.taken_cards == ["1", "5"]
+    assert resumed_scanner.retrieve_current_pack_and_pick() == (1, 3)
+    # Only the appended line was parsed
+    assert resumed_scanner.tailer.metrics.lines_matched == 1
+
+
+def test_checkpoint_ignored_for_new_log(scanner, player_log, checkpoint_file, tmp_path):
+    scanner.draft_start_search()
+    scanner.draft_data_search()
+    assert scanner.save_checkpoint()
+
+    new_log = tmp_path / "Player-new.log"
+    new_log.write_text(event_join_line("QuickDraft_LTR_20230620"), encoding="utf-8")
+    new_scanner = create_scanner(new_log, checkpoint_file)
+    assert new_scanner.tailer.offset == 0
+    assert new_scanner.draft_start_search()
+    assert new_scanner.draft_type == constants.LIMITED_TYPE_DRAFT_QUICK
+
+
+def test_new_log_larger(scanner, player_log):
+    scanner.draft_start_search()
+    scanner.draft_data_search()
+    # Replace the log contents with a different log that's larger than the original
+    player_log.write_text(event_join_line("QuickDraft_LTR_20230620") * 40, encoding="utf-8")
+    assert scanner.draft_start_search()
+    assert scanner.draft_type == constants.LIMITED_TYPE_DRAFT_QUICK
@@ -0,0 +1,102 @@
+import queue
+import logging
+import threading
+import multiprocessing
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from src.logger import (BatchQueueListener, BatchStreamHandler, BatchFileHandler, BatchGzipFileHandler,
+                        DroppingQueueHandler, use_direct_handlers, debug_listener, DEBUG_LOGGER_NAME)
+
+
+class CountingStream:
+    def __init__(self):
+        self.lines = []
+        self.flushes = 0
+
+    def write(self, text):
+        self.lines.append(text)
+
+    def flush(self):
+        self.flushes += 1
+
+
+def create_test_logger(name, log_queue, *handlers):
+    queue_handler = DroppingQueueHandler(log_queue)
+    test_logger = logging.getLogger(name)
+    test_logger.propagate = False
+    test_logger.setLevel(logging.INFO)
+    test_logger.handlers = [queue_handler]
+    listener = BatchQueueListener(log_queue, *handlers)
+    return test_logger, queue_handler, listener
+
+
+def test_batched_flush():
+    stream = CountingStream()
+    log_queue = queue.Queue(maxsize=100)
+    test_logger, _, listener = create_test_logger("test_batched_flush", log_queue, BatchStreamHandler(stream))
+    for count in range(50):
+        test_logger.info("line %d", count)
+    listener.start()
+    listener.stop()
+    assert len(stream.lines) == 50
+    # The burst is written with a single flush instead of one flush per record
+    assert stream.flushes <= 2
+
+
+def test_dropped_records():
+    log_queue = queue.Queue(maxsize=5)
+    test_logger, queue_handler, listener = create_test_logger("test_dropped_records", log_queue)
+    for count in range(8):
+        test_logger.info("line %d", count)
+    assert queue_handler.dropped == 3
+    listener.start()
+    listener.stop()
+
+
+def test_handler_swap(tmp_path):
+    log_queue = queue.Queue(maxsize=100)
+    first_handler = BatchFileHandler(str(tmp_path / "first.log"), delay=True)
+    test_logger, _, listener = create_test_logger("test_handler_swap", log_queue, first_handler)
+    listener.start()
+    test_logger.info("first")
+    listener.swap_handlers(BatchFileHandler(str(tmp_path / "second.log"), delay=True))
+    test_logger.info("second")
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+    assert (tmp_path / "first.log").read_text() == "first\n"
+    assert (tmp_path / "second.log").read_text() == "second\n"
+
+
+def test_direct_handlers(tmp_path):
+    log_queue = queue.Queue(maxsize=100)
+    test_logger, queue_handler, listener = create_test_logger(
+        "test_direct_handlers", log_queue, BatchFileHandler(str(tmp_path / "direct.log"), delay=True),
+        BatchGzipFileHandler(str(tmp_path / "events.jsonl.gz"), delay=True))
+    use_direct_handlers(test_logger, queue_handler, listener)
+    # The records are written without a listener thread, and the gzip file isn't shared
+    test_logger.info("direct")
+    assert (tmp_path / "direct.log").read_text() == "direct\n"
+    assert not (tmp_path / "events.jsonl.gz").exists()
+    assert listener._thread is None
+    assert [type(x) for x in test_logger.handlers] == [logging.FileHandler]
+    for handler in test_logger.handlers:
+        handler.close()
+
+
+def worker_logging_state():
+    debug_logger = logging.getLogger(DEBUG_LOGGER_NAME)
+    debug_logger.info("Process pool worker")
+    return (debug_listener._thread, sorted(type(x).__name__ for x in debug_logger.handlers),
+            threading.active_count())
+
+
+@pytest.mark.parametrize("start_method", [x for x in ("fork", "spawn")
+                                          if x in multiprocessing.get_all_start_methods()])
+def test_worker_logging(start_method):
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context(start_method)) as executor:
+        listener_thread, handlers, thread_count = executor.submit(worker_logging_state).result()
+    # The workers write the debug log directly instead of starting listener threads
+    assert listener_thread is None
+    assert handlers == ["FileHandler", "StreamHandler"]
+    assert thread_count == 1
@@ -0,0 +1,82 @@
+import pytest
+import json
+from src import payload_decoder as PD
+from src import log_scanner as LS
+
+
+def nested_line(prefix, payload, key="Payload"):
+    request = json.dumps({key: json.dumps(payload)})
+    return prefix + json.dumps({"id": "1234", "request": request}) + "\n"
+
+
+@pytest.mark.parametrize("field_type, text, expected", [
+    (PD.FieldType.INT, '{"PackNumber":2}', 2),
+    (PD.FieldType.INT, '{\\"PackNumber\\":12,\\"PickNumber\\":3}', 12),
+    (PD.FieldType.INT, '{\\\\\\"PackNumber\\\\\\":\\\\\\"7\\\\\\"}', 7),
+    (PD.FieldType.STRING, '{\\"PackNumber\\":\\"abc\\"}', "abc"),
+    (PD.FieldType.CARD_LIST, '{\\"PackNumber\\":[1, 2,3]}', ["1", "2", "3"]),
+    (PD.FieldType.CARD_LIST, '{\\"PackNumber\\":[\\"1\\",\\"2\\"]}', ["1", "2"]),
+    (PD.FieldType.CARD_LIST, '{\\"PackNumber\\":[]}', []),
+])
+def test_extract_field(field_type, text, expected):
+    assert PD.extract_field(text, "PackNumber", field_type) == expected
+
+
+@pytest.mark.parametrize("field_type, text", [
+    (PD.FieldType.INT, '{"PackNumber":2,"Other":{"PackNumber":3}}'),
+    (PD.FieldType.INT, '{"SelfPackNumber":2}'),
+    (PD.FieldType.INT, '{"PackNumber":null}'),
+    (PD.FieldType.CARD_LIST, '{"PackNumber":["a","b"]}'),
+])
+def test_extract_field_fallback(field_type, text):
+    assert PD.extract_field(text, "PackNumber", field_type) is None
+
+
+@pytest.fixture(params=[True, False], ids=["targeted", "full"])
+def targeted_extraction(request, monkeypatch):
+    monkeypatch.setattr(PD, "TARGETED_EXTRACTION", request.param)
+    return request.param
+
+
+def test_decode_p1p1_pack(targeted_extraction):
+    line = nested_line("<01012023 10:00:00>,", {"CardsInPack": [11, 22, 33], "PackNumber": 1, "PickNumber": 1})
+    assert LS.decode_p1p1_pack(line) == (["11", "22", "33"], 1, 1)
+
+
+def test_decode_make_pick(targeted_extraction):
+    line = nested_line("[UnityCrossThreadLogger]==> Event_PlayerDraftMakePick ",
+                       {"EventName": "PremierDraft_LTR", "Pack": 2, "Pick": 5, "GrpId": 87123})
+    assert LS.decode_make_pick(line) == (2, 5, "87123")
+
+
+def test_decode_quick_pick(targeted_extraction):
+    line = nested_line(LS.DRAFT_BOT_PICK_STRING,
+                       {"PickInfo": {"PackNumber": 0, "PickNumber": 3, "CardId": "87123"}})
+    assert LS.decode_quick_pick(line) == (1, 4, "87123")
+
+
+def test_decode_p1p1_pack_fallback(targeted_extraction):
+    # The second PackNumber makes the targeted extraction ambiguous, so the full decode is used
+    line = nested_line("<01012023 10:00:00>,", {"CardsInPack": [11, 22], "PackNumber": 1, "PickNumber": 2,
+                                                 "Extra": {"PackNumber": 9}})
+    assert PD.extract_fields(line, LS.P1P1_PACK_FIELDS) is None
+    assert LS.decode_p1p1_pack(line) == (["11", "22"], 1, 2)
+
+
+def test_decode_human_pick(targeted_extraction):
+    request = json.dumps({"params": {"draftId": "abc", "packNumber": 1, "pickNumber": 3, "cardId": 87123}})
+    line = LS.DRAFT_HUMAN_PICK_STRING + json.dumps({"id": "1234", "request": request}) + "\n"
+    assert LS.decode_human_pick(line) == (1, 3, "87123")
+
+
+def test_decode_quick_pack():
+    payload = {"DraftStatus": "PickNext", "PackNumber": 1, "PickNumber": 2, "DraftPack": ["1", "2"]}
+    line = "[UnityCrossThreadLogger]<== BotDraft_DraftStatus " + json.dumps(
+        {"CurrentModule": "BotDraft", "Payload": json.dumps(payload)}) + "\n"
+    assert LS.decode_quick_pack(line) == ("PickNext", ["1", "2"], 2, 3)
+
+
+def test_decode_notify_pack():
+    line = "[UnityCrossThreadLogger]Draft.Notify " + json.dumps(
+        {"draftId": "abc", "SelfPick": 4, "SelfPack": 2, "PackCards": "1,2,3"}) + "\n"
+    assert LS.decode_notify_pack(line, 0) == (["1", "2", "3"], 2, 4)
@@ -0,0 +1,212 @@
+import json
+import random
+import threading
+import pytest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from src import constants
+from src.file_extractor import FileExtractor
+from src.http_client import HTTPClient
+from src.download_staging import DownloadStaging, staging_key
+from src.ratings_downloader import RatingsDownloader, TokenBucket, backoff_delay, card_ratings_url
+
+
+def card_ratings_response(color):
+    return [{"name": "Card A", "ever_drawn_win_rate": 0.55, "avg_seen": 3.25, "color": color},
+            {"name": "Card B", "ever_drawn_win_rate": 0.6, "avg_seen": 5.5, "color": color}]
+
+
+class RatingsServer(ThreadingHTTPServer):
+    '''Local stand-in for the 17Lands card_ratings endpoint'''
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), RatingsHandler)
+        self.failures = {}
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class RatingsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        color = query.get("colors", [constants.FILTER_OPTION_ALL_DECKS])[0]
+        with self.server.lock:
+            self.server.requests.append(color)
+            status = self.server.failures.get(color)
+            if status and status[1] > 0:
+                status[1] -= 1
+            else:
+                status = None
+        if status:
+            self.send_response(status[0])
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+        body = json.dumps(card_ratings_response(color)).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = RatingsServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def create_downloader(server, **kwargs):
+    options = {"workers": 4, "rate": 1000.0, "burst": 10, "backoff_base": 0.01, "backoff_max": 0.05,
+               "timeout": 5, "base_url": server.url, "seed": 1, "client": HTTPClient()}
+    options.update(kwargs)
+    return RatingsDownloader(**options)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_token_bucket():
+    clock = FakeClock()
+    bucket = TokenBucket(2.0, 3, clock=clock, sleep=clock.sleep)
+    # The burst is sent without waiting, then the requests are spaced by 1 / rate
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert clock.now == pytest.approx(1.0)
+
+
+def test_backoff_delay():
+    rng = random.Random(3)
+    delays = [backoff_delay(attempt, 2, 30, rng) for attempt in range(1, 7) for _ in range(50)]
+    assert all(0 <= x <= 30 for x in delays)
+    assert max(delays[:50]) <= 2
+    assert max(delays[-50:]) > 16
+
+
+def test_card_ratings_url():
+    assert card_ratings_url(constants.URL_17LANDS, "LTR", "PremierDraft", "2023-06-20", "2023-07-20",
+                            constants.FILTER_OPTION_ALL_DECKS) == \
+        ("https://www.17lands.com/card_ratings/data?expansion=LTR&format=PremierDraft"
+         "&start_date=2023-06-20&end_date=2023-07-20")
+    assert card_ratings_url("http://localhost", "LTR", "PremierDraft", "2023-06-20", "2023-07-20",
+                            "WU").endswith("&colors=WU")
+
+
+def test_download_order_and_retries(server):
+    server.failures = {"WU": [503, 2], "B": [429, 1]}
+    downloader = create_downloader(server)
+    requests = [(x, card_ratings_url(server.url, "LTR", "PremierDraft", "2023-06-20", "2023-07-20", x))
+                for x in constants.DECK_COLORS]
+    completed = []
+    results = downloader.download(requests, progress=completed.append)
+
+    assert [x.key for x in results] == constants.DECK_COLORS
+    assert all(x.success for x in results)
+    assert [x.data[0]["color"] for x in results] == constants.DECK_COLORS
+    assert {x.key: x.attempts for x in results if x.attempts > 1} == {"WU": 3, "B": 2}
+    assert len(completed) == len(constants.DECK_COLORS)
+    assert len(server.requests) == len(constants.DECK_COLORS) + 3
+
+
+def test_download_failure(server):
+    server.failures = {"WU": [500, 100]}
+    downloader = create_downloader(server, attempts=3, workers=2)
+    requests = [(x, card_ratings_url(server.url, "LTR", "PremierDraft", "2023-06-20", "2023-07-20", x))
+                for x in constants.DECK_COLORS]
+    results = downloader.download(requests)
+    failed = results[constants.DECK_COLORS.index("WU")]
+    assert not failed.success
+    assert failed.attempts == 3
+    assert "500" in failed.error
+    assert server.requests.count("WU") == 3
+
+
+class FakeStatus:
+    def __init__(self):
+        self.values = []
+
+    def set(self, value):
+        self.values.append(value)
+
+
+class FakeRoot:
+    def update(self):
+        pass
+
+
+def create_extractor(staging_location):
+    extractor = FileExtractor("", staging=DownloadStaging(str(staging_location)))
+    extractor.set_draft_type("PremierDraft")
+    extractor.set_start_date("2023-06-20")
+    extractor.set_end_date("2023-07-20")
+    return extractor
+
+
+def test_retrieve_17lands_data(server, tmp_path):
+    extractor = create_extractor(tmp_path)
+    progress = {"value": 10}
+    status = FakeStatus()
+    deck_colors = [constants.FILTER_OPTION_ALL_DECKS, "W", "WU"]
+
+    assert extractor.retrieve_17lands_data(["LTR"], deck_colors, FakeRoot(), progress, 10, status,
+                                           create_downloader(server))
+    # The ratings are processed in the order of the deck colors
+    ratings = extractor.card_ratings["Card A"][constants.DATA_SECTION_RATINGS]
+    assert [list(x.keys())[0] for x in ratings] == deck_colors
+    assert ratings[0][constants.FILTER_OPTION_ALL_DECKS][constants.DATA_FIELD_GIHWR] == 55.0
+    assert progress["value"] == pytest.approx(19)
+    assert status.values[-1] == "Collecting 17Lands Data (3/3)"
+
+    server.failures = {"W": [500, 100]}
+    extractor.set_end_date("2023-07-21")
+    assert not extractor.retrieve_17lands_data(["LTR"], deck_colors, FakeRoot(), progress, 10, status,
+                                               create_downloader(server, attempts=2))
+
+
+def test_retrieve_17lands_data_resume(server, tmp_path):
+    extractor = create_extractor(tmp_path)
+    deck_colors = [constants.FILTER_OPTION_ALL_DECKS, "W", "WU", "B"]
+    server.failures = {"W": [500, 2]}
+    assert not extractor.retrieve_17lands_data(["LTR"], deck_colors, FakeRoot(), {"value": 0}, 0, FakeStatus(),
+                                               create_downloader(server, attempts=2, workers=1))
+    key = staging_key("LTR", "PremierDraft", "2023-06-20", "2023-07-20")
+    staged = extractor.staging.load_colors(key, deck_colors)
+    assert "W" not in staged
+    assert staged.get(constants.FILTER_OPTION_ALL_DECKS) == card_ratings_response(constants.FILTER_OPTION_ALL_DECKS)
+
+    # The retry only requests the colors that weren't staged
+    server.requests = []
+    progress = {"value": 0}
+    assert extractor.retrieve_17lands_data(["LTR"], deck_colors, FakeRoot(), progress, 0, FakeStatus(),
+                                           create_downloader(server))
+    assert set(server.requests) == set(deck_colors) - set(staged)
+    assert progress["value"] == pytest.approx(12)
+    ratings = extractor.card_ratings["Card B"][constants.DATA_SECTION_RATINGS]
+    assert [list(x.keys())[0] for x in ratings] == deck_colors
+
+    # A different date range doesn't use the staged responses
+    extractor.set_end_date("2023-07-21")
+    server.requests = []
+    assert extractor.retrieve_17lands_data(["LTR"], deck_colors, FakeRoot(), {"value": 0}, 0, FakeStatus(),
+                                           create_downloader(server))
+    assert len(server.requests) == len(deck_colors)
@@ -0,0 +1,115 @@
+import random
+import numpy
+import pytest
+from src import constants
+from src.card_logic import (CardResult, SetMetrics, calculate_mean, calculate_standard_deviation,
+                            ratings_limits)
+from src.configuration import Configuration
+from src.ratings_matrix import RatingsMatrix
+from src.ratings_engine import RatingsEngine, round_values, calculate_win_rates, calculate_wheel_table
+
+WIN_RATE_FIELDS = {"All Decks": constants.FILTER_OPTION_ALL_DECKS, "GIHWR": constants.DATA_FIELD_GIHWR,
+                   "OHWR": constants.DATA_FIELD_OHWR, "GPWR": constants.DATA_FIELD_GPWR,
+                   "GNSWR": constants.DATA_FIELD_GNSWR, "GDWR": constants.DATA_FIELD_GDWR,
+                   "ALSA": constants.DATA_FIELD_ALSA}
+
+
+def create_card_ratings(card_count=250, seed=17):
+    rng = random.Random(seed)
+    card_ratings = {}
+    for x in range(card_count):
+        deck_colors = {}
+        for color in rng.sample(constants.DECK_COLORS, 8) + [constants.FILTER_OPTION_ALL_DECKS]:
+            deck_colors[color] = {field: round(rng.uniform(40.0, 70.0), 2) for field in constants.WIN_RATE_OPTIONS}
+            deck_colors[color].update({field: float(rng.choice([0, 50, 199, 200, 5000, rng.randint(0, 90000)]))
+                                       for field in constants.WIN_RATE_FIELDS_DICT.values()})
+            deck_colors[color][constants.DATA_FIELD_ALSA] = round(rng.uniform(1.0, 9.0), 2)
+        card_ratings[str(80000 + x)] = {constants.DATA_FIELD_NAME: f"Card {x}",
+                                        constants.DATA_FIELD_DECK_COLORS: deck_colors}
+    return card_ratings
+
+
+@pytest.fixture(scope="module")
+def card_ratings():
+    return create_card_ratings()
+
+
+@pytest.fixture(scope="module")
+def engine(card_ratings):
+    return RatingsEngine(RatingsMatrix.from_set_data({"card_ratings": card_ratings}))
+
+
+def test_round_values():
+    values = [2.675, 1.005, 0.125, 0.375, 55.555, 61.245, 49.995, 123.456]
+    assert round_values(numpy.array(values), 2).tolist() == [round(x, 2) for x in values]
+
+
+@pytest.mark.parametrize("bayesian_enabled", [False, True])
+def test_set_metrics(card_ratings, engine, bayesian_enabled):
+    mean = calculate_mean(card_ratings, bayesian_enabled)
+    standard_deviation = calculate_standard_deviation(card_ratings, mean, bayesian_enabled)
+    assert engine.set_metrics(bayesian_enabled) == pytest.approx((mean, standard_deviation))
+    assert engine.ratings_limits(bayesian_enabled) == ratings_limits(card_ratings, bayesian_enabled)
+
+
+@pytest.mark.parametrize("bayesian_enabled", [False, True])
+@pytest.mark.parametrize("result_format", constants.RESULT_FORMAT_LIST)
+def test_engine_matches_card_result(card_ratings, engine, result_format, bayesian_enabled):
+    configuration = Configuration()
+    configuration.settings.result_format = result_format
+    configuration.settings.bayesian_average_enabled = bayesian_enabled
+    mean = calculate_mean(card_ratings, False)
+    metrics = SetMetrics(mean=mean, standard_deviation=calculate_standard_deviation(card_ratings, mean, False))
+    cards = list(card_ratings.values())
+
+    for colors in ([constants.FILTER_OPTION_ALL_DECKS], ["WU"], ["B", "UBR", "WG"]):
+        expected = CardResult(metrics, {}, configuration, 1).return_results(cards, colors, WIN_RATE_FIELDS)
+        results = CardResult(metrics, {}, configuration, 1, engine).return_results(cards, colors, WIN_RATE_FIELDS)
+        assert [x["results"] for x in results] == [x["results"] for x in expected]
+
+
+def test_engine_fallback(engine):
+    '''Cards that aren't in the matrix are processed card by card'''
+    configuration = Configuration()
+    card = {constants.DATA_FIELD_NAME: "Missing Card",
+            constants.DATA_FIELD_DECK_COLORS: {constants.FILTER_OPTION_ALL_DECKS: {
+                constants.DATA_FIELD_GIHWR: 58.5, constants.DATA_FIELD_GIH: 1000.0}}}
+    results = CardResult(SetMetrics(), {}, configuration, 1, engine).return_results(
+        [card], [constants.FILTER_OPTION_ALL_DECKS], {"GIHWR": constants.DATA_FIELD_GIHWR})
+    assert results[0]["results"] == [58.5]
+
+
+def test_results_are_cached(engine):
+    results = engine.results(constants.RESULT_FORMAT_GRADE, True, 55.0, 3.0)
+    assert engine.results(constants.RESULT_FORMAT_GRADE, True, 55.0, 3.0) is results
+    assert calculate_win_rates(engine.winrates, engine.counts, True).tolist() == engine.win_rates(True).tolist()
+
+
+def test_wheel_table():
+    alsa = numpy.array([0.0, 1.99, 2.0, 4.5, 7.25, 9.0])
+    table = calculate_wheel_table(alsa)
+    assert table.shape == (6, len(constants.WHEEL_COEFFICIENTS))
+    for pick, coefficients in enumerate(constants.WHEEL_COEFFICIENTS):
+        assert table[:, pick].tolist() == [max(round(numpy.polyval(coefficients, x), 1), 0) if x >= 2 else 0
+                                           for x in alsa]
+
+
+@pytest.mark.parametrize("pick_number", [0, 1, 4, 6, 7, 15])
+def test_wheel_results(card_ratings, engine, pick_number):
+    cards = list(card_ratings.values())[:14]
+    fields = {"WHEEL": constants.DATA_FIELD_WHEEL}
+    expected = CardResult(SetMetrics(), {}, Configuration(), pick_number).return_results(
+        cards, [constants.FILTER_OPTION_ALL_DECKS], fields)
+    results = CardResult(SetMetrics(), {}, Configuration(), pick_number, engine).return_results(
+        cards, [constants.FILTER_OPTION_ALL_DECKS], fields)
+    assert [x["results"] for x in results] == [x["results"] for x in expected]
+    if pick_number <= len(constants.WHEEL_COEFFICIENTS):
+        assert sum(x["results"][0] for x in results) == pytest.approx(100, abs=1)
+
+    # Packs with cards that aren't in the matrix are processed card by card
+    missing = {constants.DATA_FIELD_NAME: "Missing Card", constants.DATA_FIELD_DECK_COLORS: {
+        constants.FILTER_OPTION_ALL_DECKS: {constants.DATA_FIELD_ALSA: 4.0}}}
+    assert engine.wheel_values(["Missing Card"], pick_number) is None
+    results = CardResult(SetMetrics(), {}, Configuration(), pick_number, engine).return_results(
+        cards + [missing], [constants.FILTER_OPTION_ALL_DECKS], fields)
+    assert len(results) == len(cards) + 1
@@ -0,0 +1,125 @@
+import os
+import json
+import numpy
+import pytest
+import src.ratings_matrix as RM
+from src.ratings_matrix import RatingsMatrix, CardRatings, ratings_matrix_location, load_ratings_matrix
+from src.file_extractor import Result
+from src.log_scanner import ArenaScanner
+from src import constants
+from tests.test_log_scanner import create_scanner, TEST_SETS
+
+
+def create_set_data(card_count=100):
+    card_ratings = {}
+    for x in range(card_count):
+        card_ratings[str(90000 + x)] = {
+            constants.DATA_FIELD_NAME: f"Card {x}",
+            constants.DATA_FIELD_DECK_COLORS: {
+                constants.FILTER_OPTION_ALL_DECKS: {constants.DATA_FIELD_GIHWR: 50.0 + x / 10,
+                                                    constants.DATA_FIELD_ALSA: 4.5,
+                                                    constants.DATA_FIELD_NGP: 1000 + x},
+                "WU": {constants.DATA_FIELD_GIHWR: 60.0, constants.DATA_FIELD_IWD: None}}}
+    return {"meta": {"version": 3.0, "start_date": "2023-06-20", "end_date": "2023-07-20"},
+            "card_ratings": card_ratings}
+
+
+@pytest.fixture
+def set_file(tmp_path):
+    location = tmp_path / "LTR_PremierDraft_Data.json"
+    location.write_text(json.dumps(create_set_data()), encoding="utf-8")
+    return str(location)
+
+
+def test_from_set_data():
+    matrix = RatingsMatrix.from_set_data(create_set_data())
+    assert matrix.values.shape == (100, len(constants.DECK_COLORS), len(constants.DATA_FIELDS_LIST))
+    assert matrix.value("90005", constants.FILTER_OPTION_ALL_DECKS, constants.DATA_FIELD_GIHWR) == 50.5
+    assert matrix.value("90005", "WU", constants.DATA_FIELD_IWD) == 0.0
+    assert matrix.value("90005", "BRG", constants.DATA_FIELD_GIHWR) == 0.0
+    assert matrix.value("12345", "WU", constants.DATA_FIELD_GIHWR) == 0.0
+    assert matrix.card_values("90001", constants.FILTER_OPTION_ALL_DECKS)[constants.DATA_FIELD_NGP] == 1001
+    assert matrix.names[1] == "Card 1"
+    numpy.testing.assert_array_equal(matrix.field_values("WU", constants.DATA_FIELD_GIHWR), numpy.full(100, 60.0))
+
+
+def test_save_load(tmp_path):
+    matrix = RatingsMatrix.from_set_data(create_set_data())
+    location = str(tmp_path / "LTR_PremierDraft_Data.npz")
+    assert matrix.save(location)
+    loaded = RatingsMatrix.load(location)
+    assert loaded.ids.tolist() == matrix.ids.tolist()
+    assert loaded.names.tolist() == matrix.names.tolist()
+    assert (loaded.colors, loaded.fields) == (matrix.colors, matrix.fields)
+    numpy.testing.assert_array_equal(loaded.values, matrix.values)
+    assert RatingsMatrix.load(str(tmp_path / "missing.npz")) is None
+
+
+def test_load_rebuilds_stale_matrix(set_file):
+    set_data = create_set_data()
+    location = ratings_matrix_location(set_file)
+    assert location.endswith("LTR_PremierDraft_Data.npz")
+    load_ratings_matrix(set_file, set_data)
+    assert os.path.exists(location)
+
+    # A matrix that's older than the set file is rebuilt
+    set_data["card_ratings"]["90000"][constants.DATA_FIELD_DECK_COLORS][
+        constants.FILTER_OPTION_ALL_DECKS][constants.DATA_FIELD_GIHWR] = 65.0
+    os.utime(location, (0, 0))
+    matrix = load_ratings_matrix(set_file, set_data)
+    assert matrix.value("90000", constants.FILTER_OPTION_ALL_DECKS, constants.DATA_FIELD_GIHWR) == 65.0
+    assert RatingsMatrix.load(location).value("90000", constants.FILTER_OPTION_ALL_DECKS,
+                                              constants.DATA_FIELD_GIHWR) == 65.0
+
+
+def test_scanner_loads_matrix(set_file, tmp_path):
+    player_log = tmp_path / "Player.log"
+    player_log.write_text("", encoding="utf-8")
+    scanner = create_scanner(player_log)
+    assert scanner.retrieve_set_data(set_file) == Result.VALID
+    assert len(scanner.ratings_matrix) == len(scanner.set_data["card_ratings"])
+    assert os.path.exists(ratings_matrix_location(set_file))
+
+
+def test_card_ratings():
+    set_data = create_set_data()
+    matrix = RatingsMatrix.from_set_data(set_data)
+    assert constants.DATA_FIELD_DECK_COLORS not in matrix.set_data["card_ratings"]["90001"]
+    cards = CardRatings(matrix.set_data["card_ratings"], matrix)
+    assert len(cards) == 100 and "90001" in cards and "12345" not in cards
+
+    # The deck_colors section is rebuilt with the colors and fields of the set file
+    card = cards["90001"]
+    assert card[constants.DATA_FIELD_NAME] == "Card 1"
+    assert sorted(card[constants.DATA_FIELD_DECK_COLORS]) == [constants.FILTER_OPTION_ALL_DECKS, "WU"]
+    all_decks = card[constants.DATA_FIELD_DECK_COLORS][constants.FILTER_OPTION_ALL_DECKS]
+    assert (all_decks[constants.DATA_FIELD_GIHWR], all_decks[constants.DATA_FIELD_NGP]) == (50.1, 1001)
+    assert isinstance(all_decks[constants.DATA_FIELD_NGP], int)
+    assert cards["90001"] is card
+
+
+def test_scanner_loads_matrix_file(set_file, tmp_path, monkeypatch):
+    player_log = tmp_path / "Player.log"
+    player_log.write_text("", encoding="utf-8")
+    scanner = ArenaScanner(str(player_log), TEST_SETS, sets_location=str(tmp_path), checkpoint_file=None)
+    # The first load validates the set file and writes the matrix file
+    assert scanner.retrieve_set_data(set_file) == Result.VALID
+
+    # The set file isn't parsed if it matches the catalog entry
+    def fail(filename):
+        raise AssertionError(filename)
+    monkeypatch.setattr(RM, "check_file_integrity", fail)
+    assert scanner.retrieve_set_data(set_file) == Result.VALID
+    assert len(scanner.set_data["card_ratings"]) == 100
+    assert scanner.set_data["meta"]["start_date"] == "2023-06-20"
+    assert scanner.set_data["card_ratings"]["90005"][constants.DATA_FIELD_DECK_COLORS][
+        constants.FILTER_OPTION_ALL_DECKS][constants.DATA_FIELD_GIHWR] == 50.5
+    assert scanner.ratings_engine is not None
+    monkeypatch.undo()
+
+    # A matrix file without the set data (or a changed set file) is rebuilt from the set file
+    legacy = RatingsMatrix.load(ratings_matrix_location(set_file))
+    legacy.set_data = None
+    legacy.save(ratings_matrix_location(set_file))
+    assert scanner.retrieve_set_data(set_file) == Result.VALID
+    assert RatingsMatrix.load(ratings_matrix_location(set_file)).set_data is not None
@@ -0,0 +1,71 @@
+import pytest
+from src import constants
+from src.card_logic import SetMetrics, deck_rating
+from src.configuration import Configuration
+from src.sealed_explorer import SealedExplorer, explore_sealed_pool
+from tests.test_card_logic import create_pool
+
+
+@pytest.fixture(scope="module")
+def sealed_pool():
+    pool = create_pool(84, seed=3)
+    for card in pool:
+        ratings = card[constants.DATA_FIELD_DECK_COLORS][constants.FILTER_OPTION_ALL_DECKS]
+        # Vary the win rates between the deck colors so the bases are ranked differently
+        card[constants.DATA_FIELD_DECK_COLORS] = {
+            x: dict(ratings, **{constants.DATA_FIELD_GIHWR: ratings[constants.DATA_FIELD_GIHWR] + index % 5 - 2})
+            for index, x in enumerate(constants.DECK_COLORS)}
+    return pool
+
+
+@pytest.fixture(scope="module")
+def explorer(sealed_pool):
+    return SealedExplorer(sealed_pool, SetMetrics(mean=55.0, standard_deviation=4.0), Configuration())
+
+
+def test_candidates(explorer):
+    candidates = list(explorer.candidates())
+    # 10 two-color bases x (no splash + 3 splash colors) x 3 deck types
+    assert len(candidates) == 120
+    assert ("WU", "B", "Mid", explorer.deck_types["Mid"]) in candidates
+    assert all(splash not in colors for colors, splash, _, _ in candidates if splash)
+
+
+def test_explore_matches_exhaustive_search(explorer):
+    builds = {}
+    for colors, splash, key, deck_type in explorer.candidates():
+        upper_bound = explorer.upper_bound(colors, splash, deck_type)
+        build = explorer.build(colors, splash, key, deck_type, upper_bound)
+        assert build.rating <= upper_bound
+        assert build.rating == deck_rating(build.deck, deck_type, colors, explorer.threshold, False)
+        if build.label not in builds or build.rating > builds[build.label].rating:
+            builds[build.label] = build
+    expected = sorted(builds.values(), key=lambda x: x.rating, reverse=True)[:5]
+
+    result = explorer.explore(time_budget=60, maximum_results=5)
+    assert result.complete
+    assert result.evaluated + result.pruned == 120
+    assert [(x.label, x.deck_type, x.rating) for x in result.builds] == \
+        [(x.label, x.deck_type, x.rating) for x in expected]
+
+
+def test_time_budget(explorer):
+    result = explorer.explore(time_budget=0)
+    assert not result.complete
+    assert result.skipped == 120
+    assert result.builds == []
+
+
+def test_suggested_decks(sealed_pool):
+    result = explore_sealed_pool(sealed_pool, SetMetrics(mean=55.0, standard_deviation=4.0), Configuration(),
+                                 time_budget=60)
+    decks = result.suggested_decks()
+    assert list(decks) == [x.label for x in result.builds]
+    build = result.builds[0]
+    deck = decks[build.label]
+    assert deck["rating"] == build.rating
+    assert deck["colors"] == build.colors
+    assert deck["breakdown"].startswith(f"{build.label} {build.deck_type}: {build.rating} = cards")
+    assert sum(x[constants.DATA_FIELD_COUNT] for x in deck["deck_cards"]) == 40
+    # The pool isn't modified by the builds
+    assert all("results" not in x for x in sealed_pool)
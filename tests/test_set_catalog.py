@@ -0,0 +1,83 @@
+import os
+import json
+import pytest
+from src.set_catalog import SetCatalog, retrieve_local_set_list, check_file_integrity, Result
+from src.limited_sets import SetInfo
+from src import constants
+
+
+def write_set_file(folder, file_name, card_count=100, version=3.0):
+    card_ratings = {str(x): {constants.DATA_FIELD_NAME: f"Card {x}"} for x in range(card_count)}
+    if version == 1:
+        meta = {"version": 1, "date_range": "2023-06-20->2023-07-20"}
+    else:
+        meta = {"version": version, "start_date": "2023-06-20", "end_date": "2023-07-20"}
+    location = folder / file_name
+    location.write_text(json.dumps({"meta": meta, "card_ratings": card_ratings}), encoding="utf-8")
+    return location
+
+
+@pytest.fixture
+def sets_folder(tmp_path):
+    folder = tmp_path / "Sets"
+    folder.mkdir()
+    write_set_file(folder, "LTR_PremierDraft_Data.json")
+    write_set_file(folder, "LTR_QuickDraft_Data.json", version=1)
+    write_set_file(folder, "MOM_PremierDraft_Data.json", card_count=10)
+    (folder / "notes.txt").write_text("unrelated", encoding="utf-8")
+    return folder
+
+
+def test_catalog_entries(sets_folder):
+    catalog = SetCatalog(str(sets_folder), None)
+    assert catalog.refresh()
+    entry = catalog.retrieve_entry("LTR_PremierDraft_Data.json")
+    assert (entry.set_code, entry.draft_type, entry.card_count, entry.valid) == ("LTR", "PremierDraft", 100, True)
+    assert catalog.retrieve_entry("LTR_QuickDraft_Data.json").start_date == "2023-06-20"
+    # Files with less than 100 cards fail the integrity check
+    assert not catalog.retrieve_entry("MOM_PremierDraft_Data.json").valid
+    assert catalog.retrieve_entry("notes.txt") is None
+    assert catalog.validations == 3
+
+
+def test_incremental_refresh(sets_folder, tmp_path):
+    catalog_file = str(tmp_path / "set_catalog.json")
+    catalog = SetCatalog(str(sets_folder), catalog_file)
+    catalog.refresh()
+
+    # A new catalog object reads the stored entries, so nothing is validated again
+    catalog = SetCatalog(str(sets_folder), catalog_file)
+    assert not catalog.refresh()
+    assert catalog.validations == 0
+
+    # Only the changed file is validated
+    location = write_set_file(sets_folder, "MOM_PremierDraft_Data.json", card_count=150)
+    os.utime(location, ns=(0, 10**9))
+    os.remove(sets_folder / "LTR_QuickDraft_Data.json")
+    assert catalog.refresh()
+    assert catalog.validations == 1
+    assert catalog.retrieve_entry("MOM_PremierDraft_Data.json").valid
+    assert catalog.retrieve_entry("LTR_QuickDraft_Data.json") is None
+
+
+def test_update_file(sets_folder):
+    catalog = SetCatalog(str(sets_folder), None)
+    catalog.refresh()
+    location = write_set_file(sets_folder, "WOE_PremierDraft_Data.json")
+    catalog.update_file(str(location), *check_file_integrity(str(location)))
+    assert not catalog.refresh()
+    assert catalog.retrieve_entry("WOE_PremierDraft_Data.json").valid
+
+
+def test_retrieve_local_set_list(sets_folder):
+    sets = {"The Lord of the Rings: Tales of Middle-earth": SetInfo(arena=["LTR"], scryfall=["LTR"],
+                                                                   seventeenlands=["LTR"])}
+    file_list = retrieve_local_set_list(sets, str(sets_folder))
+    assert sorted(file_list) == [
+        ("The Lord of the Rings: Tales of Middle-earth", "PremierDraft", "2023-06-20", "2023-07-20"),
+        ("The Lord of the Rings: Tales of Middle-earth", "QuickDraft", "2023-06-20", "2023-07-20"),
+    ]
+
+
+def test_missing_file_integrity(tmp_path):
+    assert check_file_integrity(str(tmp_path / "LTR_PremierDraft_Data.json"))[0] == Result.ERROR_MISSING_FILE
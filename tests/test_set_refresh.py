@@ -0,0 +1,84 @@
+import time
+import threading
+import pytest
+from src.limited_sets import SetInfo, SetDictionary
+from src.set_refresh import SetRefresh, RefreshResult, plan_refresh, refresh_date_range, main
+from tests.test_set_catalog import write_set_file
+
+SETS = {"The Lord of the Rings": SetInfo(arena=["LTR"], scryfall=["LTR"], seventeenlands=["LTR"]),
+        "Arena Cube": SetInfo(arena=["ALL"], seventeenlands=["CUBE"], start_date="2023-07-01")}
+
+
+@pytest.fixture
+def sets_folder(tmp_path):
+    folder = tmp_path / "Sets"
+    folder.mkdir()
+    write_set_file(folder, "LTR_PremierDraft_Data.json", version=3.05)
+    write_set_file(folder, "LTR_QuickDraft_Data.json", version=1)
+    write_set_file(folder, "CUBE_PremierDraft_Data.json")
+    write_set_file(folder, "MOM_PremierDraft_Data.json")
+    return folder
+
+
+def test_refresh_date_range():
+    cube = SETS["Arena Cube"]
+    assert refresh_date_range(cube, "2023-06-20", "2023-08-01") == ("2023-07-01", "2023-08-01")
+    assert refresh_date_range(cube, "2023-07-15", "2023-08-01") == ("2023-07-15", "2023-08-01")
+    assert refresh_date_range(SETS["The Lord of the Rings"], "2019-1-1", "2023-08-01") == ("2019-1-1", "2023-08-01")
+
+
+def test_plan_refresh(sets_folder):
+    tasks = plan_refresh(SETS, str(sets_folder), "2023-08-01")
+    # MOM isn't in the sets list
+    assert sorted((x.label, x.start_date, x.end_date, x.version) for x in tasks) == [
+        ("Arena Cube PremierDraft", "2023-07-01", "2023-08-01", 3.0),
+        ("The Lord of the Rings PremierDraft", "2023-06-20", "2023-08-01", 3.05),
+        ("The Lord of the Rings QuickDraft", "2023-06-20", "2023-08-01", 1.0)]
+
+
+class FakeRefresh(SetRefresh):
+    '''Records the concurrent refreshes instead of downloading the sets'''
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.extractions = 0
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def extract_card_data(self):
+        self.extractions += 1
+        return 0
+
+    def refresh_set(self, task):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        return RefreshResult(task, success=task.draft_type == "PremierDraft", elapsed=0.05)
+
+
+def test_run(sets_folder):
+    tasks = plan_refresh(SETS, str(sets_folder), "2023-08-01")
+    refresh = FakeRefresh(str(sets_folder), workers=3)
+    completed = []
+    results = refresh.run(tasks, completed.append)
+
+    assert [x.task for x in results] == tasks
+    assert len(completed) == len(tasks)
+    assert [x.success for x in results] == [x.draft_type == "PremierDraft" for x in tasks]
+    # The card database is extracted once for all of the sets
+    assert refresh.extractions == 1
+    assert refresh.peak > 1
+
+
+def test_main_dry_run(sets_folder, tmp_path, capsys):
+    sets_file = tmp_path / "sets.json"
+    sets_file.write_text(SetDictionary(data=SETS).json(), encoding="utf-8")
+    assert main(["--sets-folder", str(sets_folder), "--sets", str(sets_file),
+                 "--end-date", "2023-08-01", "--dry-run"]) == 0
+    output = capsys.readouterr().out
+    assert "Arena Cube PremierDraft: 2023-07-01 -> 2023-08-01" in output
+    assert "Found 3 set files" in output